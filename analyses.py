@@ -0,0 +1,112 @@
+# Analyses de performance vectorisées sur des matrices de rendements (dates × actifs)
+import numpy as np
+import pandas as pd
+
+import intraday
+
+
+# Statistiques relatives de chaque actif (colonnes de `rendements`) par rapport à un indice :
+# une seule régression vectorisée de la matrice des rendements sur les rendements de l'indice.
+# Les valeurs manquantes sont ignorées date par date, actif par actif.
+def statistiques_relatives(rendements, rendements_indice, taux_sans_risque=0.0, periodes_par_an=intraday.JOURS_PAR_AN):
+    rendements_indice = rendements_indice.reindex(rendements.index)
+    r = rendements.to_numpy(dtype='float64')
+    b = rendements_indice.to_numpy(dtype='float64')[:, None]
+
+    valides = ~np.isnan(r) & ~np.isnan(b)
+    n = valides.sum(axis=0).astype('float64')
+    n_sur = np.where(n > 1, n, np.nan)
+    r0 = np.where(valides, r, 0.0)
+    b0 = np.where(valides, b, 0.0)
+
+    moyenne_r = r0.sum(axis=0) / n_sur
+    moyenne_b = b0.sum(axis=0) / n_sur
+    ecart_r = np.where(valides, r0 - moyenne_r, 0.0)
+    ecart_b = np.where(valides, b0 - moyenne_b, 0.0)
+    covariance = (ecart_r * ecart_b).sum(axis=0) / (n_sur - 1)
+    variance_r = (ecart_r ** 2).sum(axis=0) / (n_sur - 1)
+    variance_b = (ecart_b ** 2).sum(axis=0) / (n_sur - 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = covariance / variance_b
+        correlation = covariance / np.sqrt(variance_r * variance_b)
+
+        # Alpha de Jensen annualisé
+        taux_periode = taux_sans_risque / periodes_par_an
+        alpha = ((moyenne_r - taux_periode) - beta * (moyenne_b - taux_periode)) * periodes_par_an
+
+        # Écart de suivi et ratio d'information sur les rendements actifs
+        actifs = np.where(valides, r0 - b0, 0.0)
+        moyenne_active = actifs.sum(axis=0) / n_sur
+        variance_active = (np.where(valides, actifs - moyenne_active, 0.0) ** 2).sum(axis=0) / (n_sur - 1)
+        tracking_error = np.sqrt(variance_active * periodes_par_an)
+        ratio_information = moyenne_active * periodes_par_an / tracking_error
+
+        # Captures haussière et baissière (moyennes arithmétiques des périodes de hausse / baisse de l'indice)
+        hausse = valides & (b > 0)
+        baisse = valides & (b < 0)
+        capture_haussiere = (np.where(hausse, r0, 0.0).sum(axis=0) / np.where(hausse, b0, 0.0).sum(axis=0))
+        capture_baissiere = (np.where(baisse, r0, 0.0).sum(axis=0) / np.where(baisse, b0, 0.0).sum(axis=0))
+
+    return pd.DataFrame({
+        'Bêta': beta,
+        'Alpha de Jensen': alpha,
+        'Tracking error': tracking_error,
+        "Ratio d'information": ratio_information,
+        'Capture haussière': capture_haussiere,
+        'Capture baissière': capture_baissiere,
+        'Corrélation': correlation,
+    }, index=rendements.columns)
+
+
+# Drawdown de chaque série (colonnes de `valeurs`) : écart à la plus haute valeur atteinte jusque-là,
+# obtenu en un seul passage (maximum courant) sur toute la matrice ; les valeurs manquantes sont ignorées
+def drawdowns(valeurs):
+    v = valeurs.to_numpy(dtype='float64')
+    sommets = np.fmax.accumulate(v, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pd.DataFrame(v / sommets - 1, index=valeurs.index, columns=valeurs.columns)
+
+
+# Les `nombre` plus fortes baisses d'une série de drawdowns : profondeur, sommet de départ, creux,
+# date de reprise (NaT si la série n'est pas revenue à son sommet) et durée jusqu'à la reprise.
+# Les épisodes sont délimités et leurs profondeurs obtenues en un seul passage ; le creux n'est
+# recherché que dans les épisodes retenus.
+def principaux_drawdowns(drawdown, nombre=5):
+    drawdown = drawdown.dropna()
+    d = drawdown.to_numpy(dtype='float64')
+    bords = np.diff(np.concatenate([[0], (d < 0).astype(np.int8), [0]]))
+    debuts = np.flatnonzero(bords == 1)  # Première séance sous le sommet
+    fins = np.flatnonzero(bords == -1)  # Séance de reprise (len(d) si pas de reprise)
+    if not len(debuts):
+        return pd.DataFrame(columns=['Profondeur', 'Début', 'Creux', 'Reprise', 'Durée (jours)'])
+
+    profondeurs = np.minimum.reduceat(d, debuts)
+    retenus = np.argpartition(profondeurs, nombre - 1)[:nombre] if len(debuts) > nombre else np.arange(len(debuts))
+    retenus = retenus[np.argsort(profondeurs[retenus])]
+
+    dates = drawdown.index
+    lignes = []
+    for i in retenus:
+        debut, fin = debuts[i], fins[i]
+        creux = debut + int(np.argmin(d[debut:fin]))
+        sommet = dates[max(debut - 1, 0)]
+        reprise = dates[fin] if fin < len(d) else pd.NaT
+        lignes.append({
+            'Profondeur': profondeurs[i],
+            'Début': sommet,
+            'Creux': dates[creux],
+            'Reprise': reprise,
+            'Durée (jours)': ((reprise if fin < len(d) else dates[-1]) - sommet).days,
+        })
+    return pd.DataFrame(lignes, index=pd.RangeIndex(1, len(lignes) + 1, name='Rang'))
+
+
+# Tableau des principales baisses de chaque colonne d'une matrice de drawdowns, une ligne par
+# (colonne, rang) ; les colonnes sont des tuples (actif, série)
+def tableau_drawdowns(drawdowns_series, nombre=5):
+    tableaux = {colonne: principaux_drawdowns(drawdowns_series[colonne], nombre) for colonne in drawdowns_series.columns}
+    tableaux = {colonne: t for colonne, t in tableaux.items() if not t.empty}
+    if not tableaux:
+        return pd.DataFrame()
+    return pd.concat(tableaux, names=['Actif', 'Série'])
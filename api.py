@@ -0,0 +1,280 @@
+# API HTTP/JSON du simulateur, pour les autres services : métriques, simulation Lump Sum / DCA,
+# prévision et rapport PDF. Les calculs passent par la même chaîne de traitement que la page
+# (pipeline) et donc par les mêmes caches (magasin de prix, taux de change, stockage local).
+#
+#     python api.py --port 8000
+#     curl "http://localhost:8000/metriques?symboles=AAPL,MSFT&debut=2020-01-01&fin=2024-10-25&devise=EUR"
+#
+# Les paramètres sont lus dans l'URL ou dans un corps JSON (POST), avec les valeurs par défaut
+# de la barre latérale. Les réponses sont mises en cache par (route, paramètres) ; seuls les
+# calculs non mis en cache sont soumis à la limite de requêtes simultanées. Une période encore
+# ouverte (fin à partir d'aujourd'hui, barres intrajournalières) n'est gardée que DUREE_PERIODE_OUVERTE
+# secondes, le temps que de nouvelles cotations arrivent.
+import argparse
+import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import intraday
+import magasin
+import pipeline
+import prevision
+import profilage
+import rapport
+
+CONCURRENCE = int(os.environ.get('SIMULATEUR_API_CONCURRENCE', 8))  # Calculs simultanés au plus
+DELAI_ATTENTE = float(os.environ.get('SIMULATEUR_API_DELAI', 30))  # Secondes avant de répondre 503
+TAILLE_CACHE_REPONSES = 1024
+TAILLE_CACHE_RESULTATS = 512
+DUREE_PERIODE_OUVERTE = float(os.environ.get('SIMULATEUR_API_DUREE_OUVERTE', 60))  # Secondes en cache d'une période ouverte
+JSON = 'application/json; charset=utf-8'
+
+_limite = threading.BoundedSemaphore(CONCURRENCE)
+_verrou = threading.Lock()
+_cache_reponses = OrderedDict()  # (route, paramètres) -> ((statut, type, corps), expiration)
+_cache_resultats = OrderedDict()  # (symbole, Parametres) -> (pipeline.ResultatActif, expiration)
+
+
+class ErreurRequete(pipeline.ParametresInvalides):
+    pass
+
+
+# Conversion en types JSON : nombres numpy, dates, NaN/inf -> null
+def _vers_json(valeur):
+    if isinstance(valeur, dict):
+        return {str(cle): _vers_json(v) for cle, v in valeur.items()}
+    if isinstance(valeur, (list, tuple)):
+        return [_vers_json(v) for v in valeur]
+    if isinstance(valeur, (pd.Timestamp, datetime.date)):
+        return valeur.isoformat()
+    if isinstance(valeur, (float, np.floating)):
+        return float(valeur) if np.isfinite(valeur) else None
+    if isinstance(valeur, np.integer):
+        return int(valeur)
+    return valeur
+
+
+def _serie(serie):
+    return [[date.isoformat(), valeur] for date, valeur in zip(serie.index, _vers_json(serie.tolist()))]
+
+
+# Période encore ouverte : de nouvelles cotations peuvent s'ajouter aux résultats
+def periode_ouverte(parametres):
+    return intraday.est_intraday(parametres.intervalle) or parametres.date_fin >= datetime.date.today()
+
+
+# Entrées des caches : valeur et date d'expiration (None pour une période close, qui ne change plus)
+def _lire_cache(cache, cle):
+    entree = cache.get(cle)
+    if entree is None:
+        return None
+    valeur, expiration = entree
+    if expiration is not None and time.monotonic() >= expiration:
+        del cache[cle]
+        return None
+    cache.move_to_end(cle)
+    return valeur
+
+
+def _memoriser(cache, cle, valeur, taille_max, parametres):
+    expiration = time.monotonic() + DUREE_PERIODE_OUVERTE if periode_ouverte(parametres) else None
+    magasin.memoriser(cache, cle, (valeur, expiration), taille_max)
+
+
+# Résultats de la chaîne de traitement, mis en cache par (symbole, paramètres) et partagés entre routes
+def resultats(symboles, parametres):
+    trouves = {}
+    with _verrou:
+        for symbole in symboles:
+            resultat = _lire_cache(_cache_resultats, (symbole, parametres))
+            if resultat is not None:
+                trouves[symbole] = resultat
+    for symbole in symboles:
+        profilage.enregistrer_cache('api_resultats', symbole in trouves)
+
+    manquants = [s for s in symboles if s not in trouves]
+    if manquants:
+        for resultat in pipeline.analyser_actifs(manquants, parametres):
+            trouves[resultat.symbole] = resultat
+            if resultat.erreur is None:
+                with _verrou:
+                    _memoriser(_cache_resultats, (resultat.symbole, parametres), resultat, TAILLE_CACHE_RESULTATS, parametres)
+    return [trouves[s] for s in symboles]
+
+
+def _par_symbole(liste, fonction):
+    return {r.symbole: ({'erreur': r.erreur} if r.erreur is not None else fonction(r)) for r in liste}
+
+
+def route_metriques(symboles, parametres, brut):
+    return _par_symbole(resultats(symboles, parametres), lambda r: r.metriques)
+
+
+def route_simulation(symboles, parametres, brut):
+    avec_series = str(brut.get('series', '0')).lower() in ('1', 'true', 'oui')
+
+    def simulation(r):
+        reponse = {'montant_initial': parametres.montant_initial, **r.strategies}
+        if avec_series:
+            reponse['lump_sum'] = _serie(r.valeur_lump_sum)
+            reponse['dca'] = _serie(r.dca['Valeur Portefeuille DCA'])
+        return reponse
+
+    return _par_symbole(resultats(symboles, parametres), simulation)
+
+
+def route_prevision(symboles, parametres, brut):
+    try:
+        horizon = int(brut.get('horizon', prevision.HORIZON_JOURS))
+    except (TypeError, ValueError):
+        raise ErreurRequete("Paramètre 'horizon' invalide (nombre de jours).")
+    if not 1 <= horizon <= prevision.HORIZON_MAX_JOURS:
+        raise ErreurRequete(f"Paramètre 'horizon' hors limites (de 1 à {prevision.HORIZON_MAX_JOURS} jours).")
+    modele = brut.get('modele', prevision.MODELE_DEFAUT)
+    if modele not in prevision.MODELES:
+        raise ErreurRequete(f"Modèle invalide, valeurs possibles : {', '.join(prevision.MODELES)}.")
+
+    def prevoir(r):
+        p = prevision.ajuster(modele, r.symbole, r.donnees['Prix Ajusté'], horizon)
+        dates = pd.date_range(start=p.fin + pd.Timedelta(days=1), periods=horizon, freq='D')
+        bas, haut = prevision.bornes(p, dates, 1)
+        return {
+            'modele': p.modele, 'pente': p.pente, 'ordonnee': p.ordonnee, 'sigma': p.sigma,
+            'origine': p.origine, 'fin': p.fin,
+            'prevision': _serie(pd.Series(prevision.prix_prevus(p, dates), index=dates)),
+            'borne_basse': _serie(pd.Series(bas, index=dates)),
+            'borne_haute': _serie(pd.Series(haut, index=dates)),
+        }
+
+    return _par_symbole(resultats(symboles, parametres), prevoir)
+
+
+def route_rapport(symboles, parametres, brut):
+    valides = [r for r in resultats(symboles, parametres) if r.erreur is None]
+    if not valides:
+        raise ErreurRequete("Aucun actif exploitable pour le rapport.")
+    with tempfile.TemporaryDirectory(prefix="api_rapport_") as dossier:
+        chemin = rapport.creer_pdf(valides, parametres.frequence_contributions, os.path.join(dossier, "rapport_analyse.pdf"))
+        with open(chemin, 'rb') as fichier:
+            return fichier.read()
+
+
+ROUTES = {
+    '/metriques': (route_metriques, JSON),
+    '/simulation': (route_simulation, JSON),
+    '/prevision': (route_prevision, JSON),
+    '/rapport': (route_rapport, 'application/pdf'),
+}
+
+
+# Réponse d'une route : cache par paramètres normalisés, puis calcul sous la limite de concurrence
+def repondre(chemin, brut):
+    fonction, type_contenu = ROUTES[chemin]
+    symboles, parametres = pipeline.lire_parametres(brut)
+    options = tuple(sorted((cle, str(v)) for cle, v in brut.items() if cle not in pipeline.PARAMETRES_DEFAUT and cle != 'symboles'))
+    cle = (chemin, tuple(symboles), parametres, options)
+    with _verrou:
+        reponse = _lire_cache(_cache_reponses, cle)
+    profilage.enregistrer_cache('api_reponses', reponse is not None)
+    if reponse is not None:
+        return reponse
+
+    if not _limite.acquire(timeout=DELAI_ATTENTE):
+        return 503, JSON, json.dumps({'erreur': "Serveur saturé, réessayer plus tard."}).encode('utf-8')
+    try:
+        with profilage.chronometre(f'api{chemin}'):
+            corps = fonction(symboles, parametres, brut)
+    finally:
+        _limite.release()
+    if type_contenu == JSON:
+        corps = json.dumps(_vers_json(corps), ensure_ascii=False).encode('utf-8')
+    reponse = (200, type_contenu, corps)
+    with _verrou:
+        _memoriser(_cache_reponses, cle, reponse, TAILLE_CACHE_REPONSES, parametres)
+    return reponse
+
+
+class GestionnaireAPI(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Connexions persistantes
+    disable_nagle_algorithm = True  # En-têtes et corps écrits séparément : pas d'attente de l'accusé de réception
+
+    def _envoyer(self, statut, type_contenu, corps):
+        self.send_response(statut)
+        self.send_header('Content-Type', type_contenu)
+        self.send_header('Content-Length', str(len(corps)))
+        if statut == 503:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _erreur(self, statut, message):
+        self._envoyer(statut, JSON, json.dumps({'erreur': message}, ensure_ascii=False).encode('utf-8'))
+
+    def _traiter(self, brut):
+        chemin = urlsplit(self.path).path.rstrip('/') or '/'
+        if chemin == '/sante':
+            self._envoyer(200, JSON, b'{"statut": "ok"}')
+            return
+        if chemin == '/metrics':
+            self._envoyer(200, 'text/plain; version=0.0.4; charset=utf-8', profilage.format_prometheus().encode('utf-8'))
+            return
+        if chemin not in ROUTES:
+            self._erreur(404, f"Route inconnue : {chemin}. Routes disponibles : {', '.join(ROUTES)}.")
+            return
+        try:
+            self._envoyer(*repondre(chemin, brut))
+        except pipeline.ParametresInvalides as e:
+            self._erreur(400, str(e))
+        except Exception as e:
+            self._erreur(500, f"Erreur interne : {e}")
+
+    def do_GET(self):
+        self._traiter(dict(parse_qsl(urlsplit(self.path).query)))
+
+    def do_POST(self):
+        brut = dict(parse_qsl(urlsplit(self.path).query))
+        longueur = int(self.headers.get('Content-Length') or 0)
+        if longueur:
+            try:
+                corps = json.loads(self.rfile.read(longueur))
+            except json.JSONDecodeError:
+                corps = None
+            if not isinstance(corps, dict):
+                self._erreur(400, "Corps JSON invalide (objet attendu).")
+                return
+            if isinstance(corps.get('symboles'), list):
+                corps['symboles'] = ','.join(corps['symboles'])
+            brut.update(corps)
+        self._traiter(brut)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def creer_serveur(hote='127.0.0.1', port=8000):
+    serveur = ThreadingHTTPServer((hote, port), GestionnaireAPI)
+    serveur.daemon_threads = True
+    return serveur
+
+
+if __name__ == '__main__':
+    parseur = argparse.ArgumentParser(description="API HTTP/JSON du simulateur d'investissement")
+    parseur.add_argument('--hote', default='127.0.0.1')
+    parseur.add_argument('--port', type=int, default=8000)
+    arguments = parseur.parse_args()
+
+    serveur = creer_serveur(arguments.hote, arguments.port)
+    print(f"API disponible sur http://{arguments.hote}:{arguments.port} ({', '.join(ROUTES)}, /sante, /metrics)")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
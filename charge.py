@@ -0,0 +1,191 @@
+# Test de charge : N sessions simulées parcourent la page en même temps, chacune avec des
+# paramètres de barre latérale tirés au hasard (lien partagé), puis quelques interactions
+# (changement de section, d'actifs ou de modèle de prévision). Les sessions sont pilotées par
+# l'API de test de Streamlit (AppTest) dans un seul processus, comme sur un serveur réel où
+# elles partagent les caches, et les données viennent du fournisseur hors ligne : aucun accès
+# réseau n'est nécessaire. Rapport : percentiles de latence, débit, mémoire par session et
+# taux de succès des caches.
+#
+#     python charge.py --sessions 20 --interactions 5
+#     python charge.py --sessions 50 --json rapport_charge.json
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest import mock
+
+# Caches et stockage vierges, propres au test (sauf dossiers imposés par l'environnement) :
+# à fixer avant l'import des modules du simulateur, qui les lisent au chargement
+os.environ.setdefault('SIMULATEUR_CACHE', tempfile.mkdtemp(prefix='charge_cache_'))
+os.environ.setdefault('SIMULATEUR_STOCKAGE', tempfile.mkdtemp(prefix='charge_stockage_'))
+os.environ.setdefault('STREAMLIT_LOGGER_LEVEL', 'error')  # Avertissements du mode sans serveur, sans objet ici
+
+import numpy as np
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+
+import devises
+import hors_ligne
+import pipeline
+import prevision
+import profilage
+import referentiel
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'finance.py')
+FIN_MAX = 2024
+
+
+# Paramètres d'un lien partagé tirés au hasard : 1 à 3 actifs du référentiel, période de 2 à
+# 10 ans, devise, montants, fréquence et section (parmi celles proposées par la page)
+def parametres_aleatoires(generateur, symboles, sections):
+    debut = generateur.randint(2005, FIN_MAX - 2)
+    return {
+        'symboles': ', '.join(generateur.sample(symboles, generateur.randint(1, 3))),
+        'debut': f"{debut}-01-01",
+        'fin': f"{min(debut + generateur.randint(2, 10), FIN_MAX)}-10-25",
+        'devise': generateur.choice(list(devises.SYMBOLES_DEVISES)),
+        'taux': str(generateur.choice([0.0, 1.0, 2.0, 3.5])),
+        'initial': str(generateur.choice([1000, 5000, 10000, 50000])),
+        'contribution': str(generateur.choice([100, 250, 500, 1000])),
+        'frequence': generateur.choice(pipeline.FREQUENCES),
+        'section': generateur.choice(sections),
+    }
+
+
+# Une interaction au hasard sur une page déjà affichée
+def interagir(page, generateur, symboles, sections):
+    choix = generateur.random()
+    if choix < 0.5:
+        page.radio(key='section').set_value(generateur.choice(sections))
+    elif choix < 0.8:
+        page.text_input(key='symboles_actifs').set_value(', '.join(generateur.sample(symboles, generateur.randint(1, 3))))
+    else:
+        page.radio(key='section').set_value('Prévision')
+        page.run(timeout=page.default_timeout)
+        page.radio(key='modele_prevision').set_value(generateur.choice(list(prevision.MODELES)))
+
+
+# AppTest installe un Runtime factice global au début de chaque exécution et le retire à la
+# fin : entre sessions simultanées, la première qui termine le retirerait aux autres. Un
+# Runtime factice unique est donc partagé par toutes les sessions, comme le vrai serveur,
+# le temps du test seulement.
+@contextmanager
+def runtime_partage():
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    with mock.patch.object(Runtime, 'instance', classmethod(lambda cls: runtime)), \
+            mock.patch.object(Runtime, 'exists', classmethod(lambda cls: True)):
+        yield runtime
+
+
+def _memoire_residente():
+    with open('/proc/self/statm') as fichier:
+        return int(fichier.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+# Une session : premier affichage puis interactions, chaque exécution étant chronométrée ;
+# la page reste en mémoire jusqu'à la fin du test, comme une session ouverte
+def session(numero, interactions, graine, symboles, sections, delai, mesures, pages, verrou):
+    generateur = random.Random(graine + numero)
+    page = AppTest.from_file(SCRIPT, default_timeout=delai)
+    for cle, valeur in parametres_aleatoires(generateur, symboles, sections).items():
+        page.query_params[cle] = valeur
+    for rang in range(interactions + 1):
+        if rang:
+            interagir(page, generateur, symboles, sections)
+        debut = time.perf_counter()
+        try:
+            page.run(timeout=delai)
+            erreur = page.exception[0].value if len(page.exception) else None
+        except Exception as e:
+            erreur = str(e)
+        with verrou:
+            mesures.append((time.perf_counter() - debut, erreur))
+    with verrou:
+        pages.append(page)
+
+
+# Taux de succès des caches cumulés pendant le test {cache: (succès, échecs, taux)}
+def taux_caches(statistiques):
+    taux = {}
+    for nom, stat in sorted(statistiques.items()):
+        total = stat['cache_hits'] + stat['cache_miss']
+        if total:
+            taux[nom] = (stat['cache_hits'], stat['cache_miss'], stat['cache_hits'] / total)
+    return taux
+
+
+def executer(sessions, interactions, graine=0, delai=300):
+    hors_ligne.installer()
+    symboles = sorted(referentiel.referentiel().fiches)
+
+    with runtime_partage():
+        # Premier affichage hors mesure : imports et compilation du script, sections proposées
+        premiere = AppTest.from_file(SCRIPT, default_timeout=delai)
+        premiere.run(timeout=delai)
+        sections = list(premiere.radio(key='section').options)
+        profilage.reinitialiser()
+        memoire_initiale = _memoire_residente()
+
+        mesures, pages, verrou = [], [], threading.Lock()
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            taches = [pool.submit(session, numero, interactions, graine, symboles, sections, delai, mesures, pages, verrou)
+                      for numero in range(sessions)]
+            for tache in taches:
+                tache.result()
+        duree = time.perf_counter() - debut
+
+    latences = np.array([latence for latence, _ in mesures])
+    erreurs = [erreur for _, erreur in mesures if erreur is not None]
+    return {
+        'sessions': sessions,
+        'executions': len(mesures),
+        'erreurs': len(erreurs),
+        'exemples_erreurs': sorted(set(erreurs))[:5],
+        'duree_s': duree,
+        'debit_executions_par_s': len(mesures) / duree,
+        'latence_s': {f"p{p}": float(np.percentile(latences, p)) for p in (50, 90, 95, 99)} | {'max': float(latences.max())},
+        'memoire_par_session_mo': (_memoire_residente() - memoire_initiale) / sessions / 2 ** 20,
+        'memoire_max_processus_mo': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10,
+        'caches': {nom: {'succes': s, 'echecs': e, 'taux': t} for nom, (s, e, t) in taux_caches(profilage.statistiques_cumulees()).items()},
+    }
+
+
+def afficher(rapport):
+    print(f"{rapport['sessions']} sessions, {rapport['executions']} exécutions en {rapport['duree_s']:.1f} s "
+          f"({rapport['debit_executions_par_s']:.2f} exécutions/s), {rapport['erreurs']} en erreur")
+    print("Latence (s) : " + ", ".join(f"{nom} {valeur:.2f}" for nom, valeur in rapport['latence_s'].items()))
+    print(f"Mémoire : {rapport['memoire_par_session_mo']:.1f} Mo par session, "
+          f"{rapport['memoire_max_processus_mo']:.0f} Mo au maximum pour le processus")
+    print("Caches :")
+    for nom, cache in rapport['caches'].items():
+        print(f"  {nom:28s} {cache['taux']:6.1%}  ({cache['succes']} succès, {cache['echecs']} échecs)")
+    for erreur in rapport['exemples_erreurs']:
+        print(f"Erreur : {erreur}")
+
+
+if __name__ == '__main__':
+    parseur = argparse.ArgumentParser(description="Test de charge de la page avec des sessions simultanées, hors ligne")
+    parseur.add_argument('--sessions', type=int, default=10, help="Sessions simultanées")
+    parseur.add_argument('--interactions', type=int, default=3, help="Interactions par session après le premier affichage")
+    parseur.add_argument('--graine', type=int, default=0, help="Graine des tirages (paramètres et interactions)")
+    parseur.add_argument('--delai', type=float, default=300, help="Délai maximal d'une exécution, en secondes")
+    parseur.add_argument('--json', help="Écrire aussi le rapport dans ce fichier JSON")
+    arguments = parseur.parse_args()
+
+    rapport = executer(arguments.sessions, arguments.interactions, arguments.graine, arguments.delai)
+    afficher(rapport)
+    if arguments.json:
+        with open(arguments.json, 'w', encoding='utf-8') as fichier:
+            json.dump(rapport, fichier, ensure_ascii=False, indent=2)
@@ -0,0 +1,105 @@
+# Corrélations et covariances entre actifs, sur toute la période et sur fenêtre glissante
+# Les statistiques sont conservées paire par paire pour tout le processus, avec pour clé le
+# contexte (période, devise, intervalle) et l'empreinte des rendements de chaque actif : ajouter
+# un symbole à la comparaison ne calcule que sa ligne de la matrice, les autres paires étant
+# relues dans le cache, et un historique réécrit (dividendes, splits) ou prolongé est recalculé.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import leaves_list, linkage
+from scipy.spatial.distance import squareform
+
+import intraday
+import magasin
+import profilage
+
+FENETRE_GLISSANTE = 63  # Trois mois de séances
+
+_verrou = threading.Lock()
+_cache_paires = OrderedDict()  # (contexte, (symbole, empreinte) × 2) -> (covariance, corrélation, observations)
+_cache_glissantes = OrderedDict()  # (fenêtre, contexte, (symbole, empreinte) × 2) -> pd.Series
+
+
+# Empreinte des rendements connus de chaque actif (dates et valeurs) : {symbole: entier} ; les
+# dates ajoutées par un autre actif (valeurs manquantes) ne la modifient pas
+def _empreintes(rendements):
+    return {symbole: int(pd.util.hash_pandas_object(rendements[symbole].dropna()).sum()) for symbole in rendements.columns}
+
+
+def _cle(contexte, empreintes, a, b):
+    return (contexte,) + tuple(sorted(((a, empreintes[a]), (b, empreintes[b]))))
+
+
+# Covariance et corrélation d'une colonne avec toutes les colonnes de la matrice, en un seul
+# calcul vectorisé ; seules les dates où les deux rendements sont connus sont utilisées
+def _statistiques_colonne(matrice, indice):
+    x = matrice[:, indice][:, None]
+    valides = ~np.isnan(x) & ~np.isnan(matrice)
+    n = valides.sum(axis=0).astype('float64')
+    n_sur = np.where(n > 1, n, np.nan)
+    x0 = np.where(valides, x, 0.0)
+    y0 = np.where(valides, matrice, 0.0)
+    ecart_x = np.where(valides, x0 - x0.sum(axis=0) / n_sur, 0.0)
+    ecart_y = np.where(valides, y0 - y0.sum(axis=0) / n_sur, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = (ecart_x * ecart_y).sum(axis=0) / (n_sur - 1)
+        correlation = covariance / np.sqrt((ecart_x ** 2).sum(axis=0) * (ecart_y ** 2).sum(axis=0) / (n_sur - 1) ** 2)
+    return covariance, correlation, n
+
+
+# Matrices de covariance (annualisée) et de corrélation sur toute la période
+def matrices(rendements, contexte, periodes_par_an=intraday.JOURS_PAR_AN):
+    symboles = list(rendements.columns)
+    empreintes = _empreintes(rendements)
+    with _verrou:
+        connues = {cle: _cache_paires[cle] for cle in (_cle(contexte, empreintes, a, b) for a in symboles for b in symboles)
+                   if cle in _cache_paires}
+
+    # Lignes à calculer : symboles dont au moins une paire manque
+    nouveaux = [i for i, a in enumerate(symboles) if any(_cle(contexte, empreintes, a, b) not in connues for b in symboles)]
+    profilage.enregistrer_cache('correlations', not nouveaux)
+    if nouveaux:
+        matrice = rendements.to_numpy(dtype='float64')
+        with profilage.chronometre('correlations_calcul'):
+            for i in nouveaux:
+                covariance, correlation, n = _statistiques_colonne(matrice, i)
+                for j, b in enumerate(symboles):
+                    connues[_cle(contexte, empreintes, symboles[i], b)] = (covariance[j], correlation[j], int(n[j]))
+        with _verrou:
+            for cle, valeur in connues.items():
+                magasin.memoriser(_cache_paires, cle, valeur, taille_max=4096)
+
+    covariance = np.array([[connues[_cle(contexte, empreintes, a, b)][0] for b in symboles] for a in symboles]) * periodes_par_an
+    correlation = np.array([[connues[_cle(contexte, empreintes, a, b)][1] for b in symboles] for a in symboles])
+    return (pd.DataFrame(covariance, index=symboles, columns=symboles),
+            pd.DataFrame(correlation, index=symboles, columns=symboles))
+
+
+# Corrélations glissantes de chaque paire (une colonne "A / B" par paire), calculées paire par paire
+def correlations_glissantes(rendements, contexte, fenetre=FENETRE_GLISSANTE):
+    symboles = list(rendements.columns)
+    paires = [(a, b) for i, a in enumerate(symboles) for b in symboles[i + 1:]]
+    empreintes = _empreintes(rendements)
+    series = {}
+    for a, b in paires:
+        cle = (fenetre,) + _cle(contexte, empreintes, a, b)
+        with _verrou:
+            serie = _cache_glissantes.get(cle)
+        if serie is None:
+            serie = rendements[a].rolling(fenetre, min_periods=fenetre // 2).corr(rendements[b]).dropna()
+            with _verrou:
+                magasin.memoriser(_cache_glissantes, cle, serie, taille_max=1024)
+        series[f"{a} / {b}"] = serie
+    return pd.DataFrame(series)
+
+
+# Ordre des actifs issu d'une classification hiérarchique (distance = √((1 − ρ) / 2))
+def ordre_classification(correlation):
+    if len(correlation) < 3:
+        return list(correlation.index)
+    distance = np.sqrt(np.clip((1 - correlation.fillna(0).to_numpy()) / 2, 0, 1))
+    np.fill_diagonal(distance, 0)
+    arbre = linkage(squareform(distance, checks=False), method='average')
+    return [correlation.index[i] for i in leaves_list(arbre)]
@@ -0,0 +1,177 @@
+# Criblage de tout l'univers du stockage local (historiques quotidiens tenus à jour par le
+# préchargement) : rendement, CAGR, volatilité, Sharpe, drawdown et issue des stratégies
+# Lump Sum / DCA de chaque actif sur la période choisie, pour les classer et les filtrer.
+# L'univers est découpé en lots traités par un pool de processus ; chaque lot est lu depuis le
+# disque, aligné en une matrice dates × actifs et calculé d'un bloc. La taille des lots suit
+# la longueur de la période, de sorte que la mémoire de chaque processus reste bornée.
+import itertools
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import devises
+import intraday
+import magasin
+import periodes
+import profilage
+import referentiel
+import stockage
+
+PROCESSUS = int(os.environ.get('SIMULATEUR_CRIBLAGE_PROCESSUS', os.cpu_count() or 1))
+BUDGET_CELLULES = 2_000_000  # Dates × actifs par lot : une vingtaine de Mo par matrice de travail
+TAILLE_LOT_MIN = 16
+TAILLE_CACHE = 16
+
+COLONNES = ['Nom', 'Première date', 'Rendement total (%)', 'CAGR (%)', 'Volatilité (%)', 'Ratio de Sharpe',
+            'Drawdown maximal (%)', 'Valeur finale Lump Sum', 'Valeur finale DCA', 'Gain DCA (%)']
+
+_verrou = threading.Lock()
+_pool = None
+_cache_criblages = OrderedDict()  # (univers, paramètres, version du stockage) -> pd.DataFrame
+
+
+# Univers : symboles dont l'historique quotidien est stocké, hors paires de change
+def univers():
+    return [s for s in stockage.symboles_stockes(magasin.INTERVALLE_HISTORIQUE) if not s.endswith('=X')]
+
+
+# Remplir chaque colonne par sa dernière valeur connue (lignes où l'actif n'a pas coté)
+def _remplir(matrice):
+    return pd.DataFrame(matrice).ffill().to_numpy()
+
+
+# Métriques de chaque actif (colonne) d'une matrice de prix alignés. Une case vide est une date
+# où l'actif n'a pas coté : les rendements relient ses observations successives, et les
+# résultats sont ceux de la chaîne de traitement appliquée actif par actif.
+def metriques_matrice(prix, parametres):
+    valeurs = prix.to_numpy(dtype='float64')
+    presents = ~np.isnan(valeurs)
+    remplis = _remplir(valeurs)
+    colonnes = np.arange(valeurs.shape[1])
+    premiers = presents.argmax(axis=0)
+    derniers = len(valeurs) - 1 - presents[::-1].argmax(axis=0)
+    prix_initial = valeurs[premiers, colonnes]
+    prix_final = valeurs[derniers, colonnes]
+    jours = prix.index.to_numpy(dtype='datetime64[D]').astype('int64')
+
+    # Rendements entre observations successives, moments calculés sur les seules valeurs présentes
+    precedents = np.vstack([np.full((1, valeurs.shape[1]), np.nan), remplis[:-1]])
+    rendements = valeurs / precedents - 1
+    valides = ~np.isnan(rendements)
+    n = valides.sum(axis=0).astype('float64')
+    n_sur = np.where(n > 1, n, np.nan)
+    moyenne = np.where(valides, rendements, 0.0).sum(axis=0) / n_sur
+    variance = (np.where(valides, rendements - moyenne, 0.0) ** 2).sum(axis=0) / (n_sur - 1)
+    periodes_par_an = intraday.periodes_par_an(parametres.taille_barres)
+    volatilite = np.sqrt(variance * periodes_par_an)
+
+    # Contributions DCA à la fin de chaque période de l'actif (découpage de periodes.construire,
+    # qui part du premier mois coté) : la dernière ligne de chaque période où l'actif a coté
+    pas = periodes.MOIS_PAR_PERIODE[parametres.frequence_contributions]
+    mois = prix.index.year.to_numpy() * 12 + prix.index.month.to_numpy() - 1
+    numeros = (mois[:, None] - mois[premiers][None, :] + pas - 1) // pas
+    fins = np.ones_like(presents)
+    fins[:-1] = numeros[1:] != numeros[:-1]
+    comptes = np.cumsum(presents, axis=0)
+    comptes_precedents = np.vstack([np.zeros((1, valeurs.shape[1])), _remplir(np.where(fins, comptes, np.nan))[:-1]])
+    achats = fins & (comptes > np.nan_to_num(comptes_precedents))
+    contribution = parametres.montant_contribution * pas
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        multiple = prix_final / prix_initial
+        nombre_annees = (jours[derniers] - jours[premiers]) / 365.25
+        valeur_dca = np.where(achats, contribution / remplis, 0.0).sum(axis=0) * prix_final
+        verse = contribution * achats.sum(axis=0)
+        tableau = pd.DataFrame({
+            'Première date': prix.index[premiers],
+            'Rendement total (%)': (multiple - 1) * 100,
+            'CAGR (%)': (multiple ** (1 / nombre_annees) - 1) * 100,
+            'Volatilité (%)': volatilite * 100,
+            'Ratio de Sharpe': (moyenne * periodes_par_an - parametres.taux_sans_risque) / volatilite,
+            'Drawdown maximal (%)': np.fmin.reduce(remplis / np.fmax.accumulate(remplis, axis=0) - 1, axis=0) * 100,
+            'Valeur finale Lump Sum': parametres.montant_initial * multiple,
+            'Valeur finale DCA': valeur_dca,
+            'Gain DCA (%)': (valeur_dca / verse - 1) * 100,
+        }, index=prix.columns)
+    return tableau[n > 1]
+
+
+# Un lot, dans un processus du pool : lecture brute des historiques stockés sur [début, fin[,
+# alignement sur l'union des dates, conversion dans la devise de l'investisseur avec les taux
+# {devise: taux} chargés par le processus principal, et calcul
+def analyser_lot(symboles, parametres, taux):
+    fin = pd.Timestamp(parametres.date_fin) - pd.Timedelta(days=1)
+    lus = {}
+    for symbole in symboles:
+        dates, valeurs = stockage.lire_colonne(symbole, magasin.INTERVALLE_HISTORIQUE, 'Adj Close',
+                                               parametres.date_debut, fin)
+        garder = valeurs > 0
+        if garder.any():
+            lus[symbole] = (dates[garder], valeurs[garder])
+    if not lus:
+        return pd.DataFrame(columns=COLONNES[1:])
+    calendrier = np.unique(np.concatenate([dates for dates, _ in lus.values()]))
+    matrice = np.full((len(calendrier), len(lus)), np.nan)
+    for colonne, (dates, valeurs) in enumerate(lus.values()):
+        matrice[np.searchsorted(calendrier, dates), colonne] = valeurs
+    prix = pd.DataFrame(matrice, index=pd.DatetimeIndex(calendrier), columns=list(lus))
+    prix = devises.convertir_matrice(prix, {s: devises.devise_symbole(s) for s in prix.columns},
+                                     parametres.devise, parametres.date_debut, parametres.date_fin, taux)
+    return metriques_matrice(prix, parametres)
+
+
+# Pool partagé par toutes les sessions ; processus issus d'un serveur dédié (forkserver),
+# sans copier l'état ni les threads du serveur Streamlit
+def _pool_processus():
+    global _pool
+    with _verrou:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROCESSUS, mp_context=multiprocessing.get_context('forkserver'))
+    return _pool
+
+
+# Version du stockage : dernière mise à jour d'un historique de l'univers
+def _version(symboles):
+    dates = [stockage.date_mise_a_jour(s, magasin.INTERVALLE_HISTORIQUE) for s in symboles]
+    return max((d for d in dates if d is not None), default=None)
+
+
+# Tableau de criblage de l'univers (par défaut : tout le stockage local), classé par ratio de
+# Sharpe décroissant et gardé en cache tant que le stockage n'a pas changé
+@profilage.chronometrer('criblage')
+def cribler(parametres, symboles=None):
+    symboles = univers() if symboles is None else list(symboles)
+    cle = (tuple(symboles), parametres, _version(symboles))
+    with _verrou:
+        tableau = _cache_criblages.get(cle)
+    profilage.enregistrer_cache('criblage', tableau is not None)
+    if tableau is not None:
+        return tableau
+
+    lignes = max(1, int(np.busday_count(parametres.date_debut, parametres.date_fin)))
+    # Lots bornés en mémoire, et assez nombreux pour occuper tous les processus
+    taille_lot = max(TAILLE_LOT_MIN, min(BUDGET_CELLULES // lignes, -(-len(symboles) // (2 * PROCESSUS))))
+    lots = [symboles[i:i + taille_lot] for i in range(0, len(symboles), taille_lot)]
+    # Taux de change de toutes les devises de l'univers chargés une seule fois ; chaque lot ne
+    # reçoit que ceux de ses propres devises
+    devises_symboles = {s: devises.devise_symbole(s) for s in symboles}
+    taux = devises.taux_de_change(list(devises_symboles.values()), parametres.devise,
+                                  parametres.date_debut, parametres.date_fin)
+    taux_lots = [{devises_symboles[s]: taux[devises_symboles[s]] for s in lot} for lot in lots]
+    if PROCESSUS <= 1 or len(lots) <= 1:
+        resultats = [analyser_lot(lot, parametres, taux_lot) for lot, taux_lot in zip(lots, taux_lots)]
+    else:
+        resultats = list(_pool_processus().map(analyser_lot, lots, itertools.repeat(parametres), taux_lots))
+
+    tableau = pd.concat(resultats) if resultats else pd.DataFrame(columns=COLONNES[1:])
+    noms = [referentiel.fiche(s) for s in tableau.index]
+    tableau.insert(0, 'Nom', [fiche.nom if fiche is not None else '' for fiche in noms])
+    tableau = tableau.sort_values('Ratio de Sharpe', ascending=False)
+    with _verrou:
+        magasin.memoriser(_cache_criblages, cle, tableau, TAILLE_CACHE)
+    return tableau
@@ -0,0 +1,102 @@
+# Décumulation : retraits périodiques indexés sur l'inflation à partir d'un capital initial,
+# simulés sur des fenêtres historiques glissantes et sur des chemins rééchantillonnés (bootstrap).
+#
+# Avec un retrait en début de période, V_t = G_t × (V_0 − w × S_t) où G_t est la croissance
+# cumulée du chemin et S_t = Σ_{k≤t} c_k / G_{k−1} la somme actualisée des retraits unitaires.
+# S_t étant croissante, un chemin tient jusqu'à l'horizon si et seulement si w ≤ V_0 / S_H :
+# le taux maximal de chaque chemin s'obtient donc pour tous les chemins à la fois, sans
+# relancer de simulation par taux candidat, et le taux soutenable pour une probabilité de
+# succès p est le quantile (1 − p) de ces taux maximaux.
+import numpy as np
+
+import profilage
+
+PERIODES_PAR_AN = 12  # Retraits mensuels
+TAILLE_BLOC = 12  # Blocs de 12 mois pour conserver l'autocorrélation des rendements
+CENTILES = [5, 50, 95]
+
+
+# Rendements mensuels à partir des prix de fin de mois (vue mensuelle de la pyramide des périodes)
+def rendements_mensuels(prix_mensuels):
+    return prix_mensuels.pct_change().dropna().to_numpy(dtype='float64')
+
+
+# Fenêtres glissantes de `nombre_periodes` mois, une par mois de départ ; l'historique est
+# parcouru de façon circulaire lorsqu'il est plus court que l'horizon
+def fenetres_historiques(rendements, nombre_periodes):
+    indices = (np.arange(len(rendements))[:, None] + np.arange(nombre_periodes)[None, :]) % len(rendements)
+    return rendements[indices]
+
+
+# Chemins obtenus par rééchantillonnage de blocs consécutifs de l'historique
+def chemins_bootstrap(rendements, nombre_periodes, nombre_chemins, taille_bloc=TAILLE_BLOC, graine=0):
+    generateur = np.random.default_rng(graine)
+    nombre_blocs = -(-nombre_periodes // taille_bloc)
+    debuts = generateur.integers(0, len(rendements), size=(nombre_chemins, nombre_blocs))
+    indices = (debuts[:, :, None] + np.arange(taille_bloc)[None, None, :]) % len(rendements)
+    return rendements[indices.reshape(nombre_chemins, -1)[:, :nombre_periodes]]
+
+
+# Croissance cumulée de chaque chemin (frais de gestion annuels prélevés chaque mois)
+def _croissance(chemins, frais=0.0):
+    return np.cumprod(1 + chemins - frais / PERIODES_PAR_AN, axis=1)
+
+
+# Retraits d'un taux annuel unitaire (fraction du capital initial), indexés sur l'inflation
+def _retraits_unitaires(nombre_periodes, inflation):
+    return (1 + inflation) ** (np.arange(nombre_periodes) / PERIODES_PAR_AN) / PERIODES_PAR_AN
+
+
+# Somme actualisée des retraits unitaires S_t, pour toutes les périodes de tous les chemins
+def _retraits_actualises(croissance, inflation):
+    croissance_debut = np.hstack([np.ones((croissance.shape[0], 1)), croissance[:, :-1]])
+    return np.cumsum(_retraits_unitaires(croissance.shape[1], inflation) / croissance_debut, axis=1)
+
+
+# Taux de retrait annuel maximal de chaque chemin (fraction du capital initial) ;
+# `capital_final` est la part du capital initial à conserver à l'horizon
+def taux_maximaux(chemins, inflation=0.0, frais=0.0, capital_final=0.0):
+    croissance = _croissance(chemins, frais)
+    retraits = _retraits_actualises(croissance, inflation)
+    return np.maximum((1 - capital_final / croissance[:, -1]) / retraits[:, -1], 0.0)
+
+
+def taux_soutenable(taux, probabilite):
+    return float(np.quantile(taux, 1 - probabilite))
+
+
+def probabilite_succes(taux, taux_retrait):
+    return float((taux >= taux_retrait).mean())
+
+
+# Valeur du capital sur chaque chemin pour un taux donné (nulle après la ruine)
+def valeurs_capital(chemins, montant_initial, taux_retrait, inflation=0.0, frais=0.0):
+    croissance = _croissance(chemins, frais)
+    retraits = _retraits_actualises(croissance, inflation)
+    return np.maximum(croissance * montant_initial * (1 - taux_retrait * retraits), 0.0)
+
+
+# Simulation complète pour un actif : taux soutenable, probabilité de succès du taux choisi
+# et centiles de la valeur du capital, pour les fenêtres historiques et pour le bootstrap
+@profilage.chronometrer('decumulation')
+def simuler(prix_mensuels, montant_initial, taux_retrait, inflation, horizon_annees, probabilite,
+            nombre_chemins=2000, frais=0.0, graine=0):
+    rendements = rendements_mensuels(prix_mensuels)
+    if len(rendements) < PERIODES_PAR_AN:
+        return None  # Historique trop court pour des chemins significatifs
+    nombre_periodes = int(round(horizon_annees * PERIODES_PAR_AN))
+    ensembles = {
+        'Fenêtres historiques': fenetres_historiques(rendements, nombre_periodes),
+        'Bootstrap': chemins_bootstrap(rendements, nombre_periodes, nombre_chemins, graine=graine),
+    }
+    resultats = {}
+    for nom, chemins in ensembles.items():
+        taux = taux_maximaux(chemins, inflation, frais)
+        valeurs = valeurs_capital(chemins, montant_initial, taux_retrait, inflation, frais)
+        resultats[nom] = {
+            'chemins': len(chemins),
+            'taux_soutenable': taux_soutenable(taux, probabilite),
+            'probabilite_succes': probabilite_succes(taux, taux_retrait),
+            'centiles': np.percentile(valeurs, CENTILES, axis=0),
+        }
+    return resultats
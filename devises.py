@@ -0,0 +1,100 @@
+# Conversion des prix dans la devise de l'investisseur
+# Les taux de change sont des séries de prix comme les autres ("EURUSD=X") : ils sont
+# téléchargés une seule fois par paire et par période dans le magasin de prix partagé,
+# puis alignés sur le calendrier des prix et appliqués par une multiplication vectorisée.
+import numpy as np
+import pandas as pd
+
+import magasin
+import referentiel
+
+SYMBOLES_DEVISES = {'EUR': '€', 'USD': '$', 'GBP': '£', 'CHF': 'CHF', 'JPY': '¥'}
+
+# Devise de cotation déduite du suffixe de place de Yahoo Finance (sans suffixe : USD)
+DEVISES_SUFFIXES = {
+    'PA': 'EUR', 'DE': 'EUR', 'F': 'EUR', 'AS': 'EUR', 'MI': 'EUR', 'MC': 'EUR', 'BR': 'EUR',
+    'LS': 'EUR', 'VI': 'EUR', 'HE': 'EUR', 'IR': 'EUR',
+    'L': 'GBp', 'SW': 'CHF', 'T': 'JPY', 'TO': 'CAD', 'AX': 'AUD', 'HK': 'HKD',
+    'ST': 'SEK', 'OL': 'NOK', 'CO': 'DKK',
+}
+
+# Devises cotées en centièmes (ex. pence britanniques) : (devise principale, facteur)
+SOUS_UNITES = {'GBp': ('GBP', 0.01), 'GBX': ('GBP', 0.01), 'ZAc': ('ZAR', 0.01), 'ILA': ('ILS', 0.01)}
+
+# Corrections ponctuelles {symbole: devise}, prioritaires sur le référentiel local
+DEVISES_SYMBOLES = {}
+
+
+def devise_symbole(symbole):
+    symbole = symbole.upper()
+    if symbole in DEVISES_SYMBOLES:
+        return DEVISES_SYMBOLES[symbole]
+    fiche = referentiel.fiche(symbole)
+    if fiche is not None and fiche.devise:
+        return fiche.devise
+    if symbole.endswith('=X'):  # Paire de devises : cotée dans la seconde devise
+        return symbole[3:6]
+    _, point, suffixe = symbole.rpartition('.')
+    return DEVISES_SUFFIXES.get(suffixe, 'USD') if point else 'USD'
+
+
+def _devise_principale(devise):
+    return SOUS_UNITES.get(devise, (devise, 1.0))
+
+
+def symbole_paire(devise_source, devise_cible):
+    return f"{devise_source}{devise_cible}=X"
+
+
+# Paires de change à télécharger pour passer de chaque devise source à la devise cible
+# {devise source: (symbole de la paire, facteur des sous-unités)}
+def paires_de_change(devises_sources, devise_cible):
+    cible, facteur_cible = _devise_principale(devise_cible)
+    paires = {}
+    for devise in set(devises_sources):
+        source, facteur = _devise_principale(devise)
+        if source != cible:
+            paires[devise] = (symbole_paire(source, cible), facteur / facteur_cible)
+    return paires
+
+
+# Taux de change source -> cible de chaque devise, en un seul appel groupé au magasin de prix
+def taux_de_change(devises_sources, devise_cible, date_debut, date_fin):
+    facteur_cible = _devise_principale(devise_cible)[1]
+    paires = paires_de_change(devises_sources, devise_cible)
+    series = magasin.prix_ajustes(sorted({p for p, _ in paires.values()}), date_debut, date_fin) if paires else {}
+    taux = {}
+    for devise in set(devises_sources):
+        if devise in paires:
+            paire, facteur = paires[devise]
+            if series[paire].empty:
+                raise ValueError(f"Taux de change {paire} indisponible pour la période demandée.")
+            taux[devise] = series[paire] * facteur
+        else:
+            taux[devise] = _devise_principale(devise)[1] / facteur_cible
+    return taux
+
+
+# Aligner un taux (pd.Series) sur un calendrier : dernière valeur connue, puis première disponible
+def _aligner_taux(taux, calendrier):
+    if not isinstance(taux, pd.Series):
+        return np.full(len(calendrier), float(taux))
+    return taux.reindex(taux.index.union(calendrier)).ffill().bfill().reindex(calendrier).to_numpy()
+
+
+# Convertir une matrice de prix (dates × symboles) dont chaque colonne a sa propre devise ;
+# `taux` ({devise: taux}, voir taux_de_change) évite de relire les taux déjà chargés
+def convertir_matrice(prix, devises_colonnes, devise_cible, date_debut, date_fin, taux=None):
+    if taux is None:
+        taux = taux_de_change([devises_colonnes[c] for c in prix.columns], devise_cible, date_debut, date_fin)
+    alignes = {devise: _aligner_taux(taux[devise], prix.index) for devise in set(devises_colonnes[c] for c in prix.columns)}
+    matrice_taux = np.column_stack([alignes[devises_colonnes[c]] for c in prix.columns])
+    return pd.DataFrame(prix.to_numpy(dtype='float64') * matrice_taux, index=prix.index, columns=prix.columns)
+
+
+# Convertir une série de prix cotée dans `devise_source`
+def convertir(prix, devise_source, devise_cible, date_debut, date_fin):
+    if devise_source == devise_cible:
+        return prix
+    taux = taux_de_change([devise_source], devise_cible, date_debut, date_fin)[devise_source]
+    return prix * _aligner_taux(taux, prix.index)
@@ -0,0 +1,108 @@
+# Export en colonnes des séries calculées (prix, rendements, stratégies, prévision, métriques)
+# au format Parquet, Arrow IPC ou CSV, entièrement en mémoire. Chaque actif devient un lot
+# Arrow construit sans copie sur les tableaux numpy du résultat (float64 contigus, dates en
+# datetime64[ns], symbole en dictionnaire) ; les lots sont écrits l'un après l'autre dans le
+# fichier, sans assembler de tableau complet pour plusieurs actifs.
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as pa_ipc
+import pyarrow.parquet as pq
+
+import prevision
+import profilage
+
+# Format -> (extension, type MIME)
+FORMATS = {
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'Arrow IPC': ('arrow', 'application/vnd.apache.arrow.file'),
+    'CSV': ('csv', 'text/csv'),
+}
+
+
+def _colonne(valeurs):
+    return pa.array(np.ascontiguousarray(valeurs))
+
+
+# Colonne constante du symbole : indice de l'actif dans un dictionnaire commun à tous les lots
+# (le format Arrow IPC n'accepte qu'un seul dictionnaire par colonne)
+def _actif(position, symboles, longueur):
+    return pa.DictionaryArray.from_arrays(pa.array(np.full(longueur, position, dtype='int32')), symboles)
+
+
+def _lot(position, symboles, index, colonnes):
+    noms = ['Date', 'Actif'] + list(colonnes)
+    tableaux = [_colonne(index.to_numpy(dtype='datetime64[ns]')), _actif(position, symboles, len(index))]
+    tableaux += [_colonne(np.asarray(valeurs, dtype='float64')) for valeurs in colonnes.values()]
+    return pa.record_batch(tableaux, names=noms)
+
+
+# Lots de chaque table exportable, un par actif
+def lots_series(resultats):
+    symboles = pa.array([r.symbole for r in resultats])
+    for position, r in enumerate(resultats):
+        yield _lot(position, symboles, r.donnees.index, {
+            'Prix Ajusté': r.donnees['Prix Ajusté'].to_numpy(),
+            'Rendement Quotidien': r.donnees['Rendement Quotidien'].to_numpy(),
+            'Rendement Cumulé': r.donnees['Rendement Cumulé'].to_numpy(),
+            'Valeur Lump Sum': r.valeur_lump_sum.to_numpy(),
+        })
+
+
+def lots_dca(resultats):
+    symboles = pa.array([r.symbole for r in resultats])
+    for position, r in enumerate(resultats):
+        yield _lot(position, symboles, r.dca.index, {
+            'Prix': r.dca['Prix'].to_numpy(),
+            'Valeur Portefeuille DCA': r.dca['Valeur Portefeuille DCA'].to_numpy(),
+        })
+
+
+def lots_prevision(resultats, horizon=prevision.HORIZON_JOURS):
+    symboles = pa.array([r.symbole for r in resultats])
+    for position, r in enumerate(resultats):
+        dates = prevision.dates_prevision(r.prevision, r.donnees.index, horizon)
+        bas, haut = prevision.bornes(r.prevision, dates, 1)
+        yield _lot(position, symboles, dates, {
+            'Prix Prévu': prevision.prix_prevus(r.prevision, dates),
+            'Écart Type': (haut - bas) / 2,  # Demi-largeur de la bande ±1, en prix
+        })
+
+
+# Métriques et résultats des stratégies : une ligne par actif
+def lots_metriques(resultats):
+    cles = list(resultats[0].metriques) + list(resultats[0].strategies)
+    yield pa.record_batch(
+        [pa.array([r.symbole for r in resultats])]
+        + [pa.array([float({**r.metriques, **r.strategies}[cle]) for r in resultats]) for cle in cles],
+        names=['Actif'] + cles
+    )
+
+
+# Nom affiché -> (lots de la table, nom du fichier sans extension)
+TABLES = {
+    'Séries quotidiennes': (lots_series, 'series_quotidiennes'),
+    'Portefeuille DCA': (lots_dca, 'portefeuille_dca'),
+    'Prévision': (lots_prevision, 'prevision'),
+    'Métriques': (lots_metriques, 'metriques'),
+}
+
+
+# Écrire les lots d'une table dans le format demandé ; renvoie (contenu, nom du fichier, type MIME)
+@profilage.chronometrer('export')
+def exporter(resultats, table, format_export):
+    lots = TABLES[table][0](resultats)
+    premier = next(lots)
+    sortie = pa.BufferOutputStream()
+    if format_export == 'Parquet':
+        ecrivain = pq.ParquetWriter(sortie, premier.schema, compression='zstd')
+    elif format_export == 'Arrow IPC':
+        ecrivain = pa_ipc.new_file(sortie, premier.schema)
+    else:
+        ecrivain = pa_csv.CSVWriter(sortie, premier.schema)
+    with ecrivain:
+        ecrivain.write_batch(premier)
+        for lot in lots:
+            ecrivain.write_batch(lot)
+    extension, type_mime = FORMATS[format_export]
+    return sortie.getvalue().to_pybytes(), f"{TABLES[table][1]}.{extension}", type_mime
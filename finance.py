@@ -1,18 +1,39 @@
 # Application developpée par OUMAR CISSE et ASMAA MEDHI
 # importation des librairies nécessaires
 import os
-os.system("pip install --upgrade pip")
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from fpdf import FPDF
-import plotly.io as pio
 import streamlit as st
-from sklearn.linear_model import LinearRegression
 import plotly.graph_objs as go
-import platform
 import mplcursors
+import profilage
+import prevision
+import indices
+import analyses
+import devises
+import intraday
+import flux
+import pipeline
+import rapport
+import scenarios
+import decumulation
+import objectif
+import correlations
+import referentiel
+import periodes
+import export
+import prechargement
+import criblage
+
+# Début du chronométrage de cette exécution du script
+profilage.debut_execution()
+if os.environ.get("SIMULATEUR_PROMETHEUS_PORT"):
+    profilage.demarrer_serveur_prometheus(int(os.environ["SIMULATEUR_PROMETHEUS_PORT"]),
+                                          os.environ.get("SIMULATEUR_PROMETHEUS_HOTE", "127.0.0.1"))
+# Préchargement de la liste de surveillance et rafraîchissement du soir, en arrière-plan
+if os.environ.get("SIMULATEUR_PRECHARGEMENT"):
+    prechargement.demarrer()
 
 # Configuration de la page
 st.set_page_config(page_title="Simulateur d'Investissement", layout="wide")
@@ -101,1446 +122,1145 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Paramètres de l'utilisateur
+# Ajouter un symbole proposé par la recherche à la liste saisie (avant la réexécution de la page)
+def ajouter_symbole(symbole):
+    saisis = pipeline.lire_symboles(st.session_state.get("symboles_actifs", ""))
+    if symbole not in saisis:
+        st.session_state["symboles_actifs"] = ", ".join(saisis + [symbole])
+
+# Paramètres d'un lien partagé : lus une seule fois par session dans l'URL, ils servent de
+# valeurs initiales aux widgets ; une valeur absente, illisible ou hors des bornes du widget
+# (`minimum`, comme son min_value) garde la valeur par défaut
+if "parametres_url" not in st.session_state:
+    st.session_state["parametres_url"] = st.query_params.to_dict()
+
+def depuis_url(nom, defaut, conversion=str, options=None, minimum=None):
+    texte = st.session_state["parametres_url"].get(nom)
+    if texte is None:
+        return defaut
+    try:
+        valeur = conversion(texte)
+    except ValueError:
+        return defaut
+    if minimum is not None and not minimum <= valeur < float("inf"):
+        return defaut
+    return valeur if options is None or valeur in options else defaut
+
+def lire_liste(texte):
+    return [element for element in texte.split("|") if element]
+
+def index_option(options, nom, defaut):
+    return options.index(depuis_url(nom, defaut, options=options))
+
 def sidebar_parameters():
     st.sidebar.header("Paramètres de l'investissement")
 
-    actif = st.sidebar.text_input("Symbole de l'actif principal (ex: AAPL)", value="AAPL")
-    autre_actif = st.sidebar.text_input("Symbole d'un autre actif (optionnel, ex: MSFT)", value="")
-    date_debut = st.sidebar.date_input("Date de début", value=pd.to_datetime("2020-01-01"))
-    date_fin = st.sidebar.date_input("Date de fin", value=pd.to_datetime("2024-10-25"))
-    
+    # Valeur initiale fixée une seule fois par l'état de session (modifiable ensuite par ajouter_symbole)
+    if "symboles_actifs" not in st.session_state:
+        st.session_state["symboles_actifs"] = depuis_url("symboles", "AAPL")
+    symboles_actifs = st.sidebar.text_input("Symboles des actifs à comparer (séparés par des virgules, ex: AAPL, MSFT)", key="symboles_actifs")
+    # Recherche dans le référentiel local des symboles (sans accès réseau)
+    recherche = st.sidebar.text_input("Rechercher un actif (symbole ou nom)", value="")
+    if recherche:
+        suggestions = referentiel.rechercher(recherche)
+        if suggestions:
+            choix = st.sidebar.selectbox(
+                "Suggestions",
+                options=suggestions,
+                format_func=lambda f: f"{f.symbole} — {f.nom} ({f.place}, {f.devise}, depuis {f.premiere_date:%Y})"
+            )
+            st.sidebar.button("Ajouter à la comparaison", on_click=ajouter_symbole, args=(choix.symbole,))
+        else:
+            st.sidebar.caption("Aucun actif correspondant dans le référentiel local.")
+    date_debut = st.sidebar.date_input("Date de début", value=depuis_url("debut", pd.to_datetime("2020-01-01"), pd.to_datetime))
+    date_fin = st.sidebar.date_input("Date de fin", value=depuis_url("fin", pd.to_datetime("2024-10-25"), pd.to_datetime))
+
     if date_debut >= date_fin:
         st.sidebar.error("La date de début doit précéder la date de fin.")
 
-    taux_sans_risque = st.sidebar.number_input("Taux sans risque annuel (%)", min_value=0.0, value=2.0, step=0.1) / 100
-    montant_initial = st.sidebar.number_input("Montant initial (€)", min_value=0, value=10000, step=1000)
+    options_intervalles = ["1d", "1h", "30m", "15m", "5m", "2m", "1m"]
+    intervalle_donnees = st.sidebar.selectbox(
+        "Intervalle des données",
+        options=options_intervalles,
+        index=index_option(options_intervalles, "intervalle", "1d")
+    )
+    taille_barres = "1D"
+    if intraday.est_intraday(intervalle_donnees):
+        duree_source = intraday.duree_barre(intervalle_donnees)
+        tailles = [t for t in intraday.TAILLES_BARRES if pd.Timedelta(t) >= duree_source]
+        taille_barres = st.sidebar.selectbox("Taille des barres", options=tailles, index=index_option(tailles, "barres", tailles[0]))
+        st.sidebar.caption("Historique intrajournalier limité par Yahoo Finance (30 jours en 1m, 60 jours jusqu'à 30m, 730 jours en 1h).")
+    devise_investisseur = st.sidebar.selectbox(
+        "Devise de l'investisseur",
+        options=list(devises.SYMBOLES_DEVISES),
+        index=index_option(list(devises.SYMBOLES_DEVISES), "devise", "EUR")
+    )
+    symbole_devise = devises.SYMBOLES_DEVISES[devise_investisseur]
+    taux_sans_risque = st.sidebar.number_input("Taux sans risque annuel (%)", min_value=0.0, value=depuis_url("taux", 2.0, float, minimum=0.0), step=0.1) / 100
+    montant_initial = st.sidebar.number_input(f"Montant initial ({symbole_devise})", min_value=0, value=depuis_url("initial", 10000, int, minimum=0), step=1000)
     montant_contribution = st.sidebar.number_input(
-        "Montant des contributions fréquentes (€)", min_value=0, value=500, step=100
+        f"Montant des contributions fréquentes ({symbole_devise})", min_value=0, value=depuis_url("contribution", 500, int, minimum=0), step=100
     )
+    options_frequences = ["Mensuelle", "Trimestrielle", "Semestrielle", "Annuelle"]
     frequence_contributions = st.sidebar.selectbox(
         "Fréquence des contributions",
-        options=["Mensuelle", "Trimestrielle", "Semestrielle", "Annuelle"],
-        index=0
+        options=options_frequences,
+        index=index_option(options_frequences, "frequence", "Mensuelle")
     )
-    frais_gestion = st.sidebar.number_input("Frais de gestion annuels (%)", min_value=0.0, value=0.50, step=0.05)
-
-    return actif, autre_actif, date_debut, date_fin, taux_sans_risque, montant_initial, montant_contribution, frequence_contributions, frais_gestion
-
-# Appel des paramètres
-actif, autre_actif, date_debut, date_fin, taux_sans_risque, montant_initial, montant_contribution, frequence_contributions, frais_gestion = sidebar_parameters()
-# Fonction pour vérifier la validité du symbole
-def verifier_symbole(actif):
-    try:
-        donnees_brutes = yf.download(actif, start=str(date_debut), end=str(date_fin))
-        if donnees_brutes.empty:
-            raise ValueError("Données vides, symbole peut-être invalide.")
-        return donnees_brutes
-    except Exception as e:
-        st.error(f"Erreur : Impossible de trouver l'actif '{actif}'. Veuillez vérifier le symbole.")
-        return None
-
-# Vérifier si les symboles sont valides
-donnees_brutes = verifier_symbole(actif)
-donnees_autre_actif = None
-
-# Si un second actif est saisi, vérifier également
-if autre_actif:
-    donnees_autre_actif = verifier_symbole(autre_actif)
-
-# Vérifier que le premier actif est valide, sinon afficher uniquement le message d'erreur
-if donnees_brutes is None:
-    st.stop()  # Arrête l'exécution du script après avoir affiché l'erreur pour le premier actif
-
-# Traitement pour le premier actif
-if 'Adj Close' in donnees_brutes.columns:
-    donnees = donnees_brutes[['Adj Close']].copy()
-    donnees.columns = ['Prix Ajusté']
-    donnees['Rendement Quotidien'] = donnees['Prix Ajusté'].pct_change()
-    donnees['Rendement Cumulé'] = (1 + donnees['Rendement Quotidien']).cumprod()
-
-volatilite_portefeuille = donnees['Rendement Quotidien'].std() * np.sqrt(252)
-rendement_portefeuille = donnees['Rendement Quotidien'].mean() * 252
-ratio_sharpe = (rendement_portefeuille - taux_sans_risque) / volatilite_portefeuille
-valeur_initiale = donnees['Prix Ajusté'].iloc[0]
-valeur_finale = donnees['Prix Ajusté'].iloc[-1]
-rendement_total = ((valeur_finale - valeur_initiale) / valeur_initiale) * 100
-nombre_annees = (donnees.index[-1] - donnees.index[0]).days / 365.25
-cagr = ((valeur_finale / valeur_initiale) ** (1 / nombre_annees) - 1) * 100
-
-
-st.markdown("""
-    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 20px; width: 400px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-        <h3 style="color: #333333; font-weight: bold; margin: 0;">Analyse des performances</h3>
-    </div>
-""", unsafe_allow_html=True)
-
-# Vérification si le second actif est présent
-if donnees_autre_actif is not None and not donnees_autre_actif.empty:
-    donnees_autre = donnees_autre_actif[['Adj Close']].copy()
-    donnees_autre.columns = ['Prix Ajusté']
-    donnees_autre['Rendement Quotidien'] = donnees_autre['Prix Ajusté'].pct_change()
-    donnees_autre['Rendement Cumulé'] = (1 + donnees_autre['Rendement Quotidien']).cumprod()
-
-    # Calcul des métriques pour le second actif
-    volatilite_autre = donnees_autre['Rendement Quotidien'].std() * np.sqrt(252)
-    rendement_autre = donnees_autre['Rendement Quotidien'].mean() * 252
-    ratio_sharpe_autre = (rendement_autre - taux_sans_risque) / volatilite_autre
-    valeur_initiale_autre = donnees_autre['Prix Ajusté'].iloc[0]
-    valeur_finale_autre = donnees_autre['Prix Ajusté'].iloc[-1]
-    rendement_total_autre = ((valeur_finale_autre - valeur_initiale_autre) / valeur_initiale_autre) * 100
-    cagr_autre = ((valeur_finale_autre / valeur_initiale_autre) ** (1 / nombre_annees) - 1) * 100
-else:
-    donnees_autre = None  # Garantir que cette variable est définie
-
-if donnees_autre is not None:
-    st.markdown(f"""
-    <table style="width:100%; border-collapse: collapse; text-align: center;">
-        <tr>
-            <th style="background-color:#0073E6; color:white;">Métriques</th>
-            <th style="background-color:#0073E6; color:white;">{actif.upper()}</th>
-            <th style="background-color:#0073E6; color:white;">{autre_actif.upper()}</th>
-        </tr>
-        <tr><td>Volatilité annualisée</td>
-            <td style="color:#0073E6; font-weight:bold;">{volatilite_portefeuille:.2%}</td>
-            <td style="color:#0073E6; font-weight:bold;">{volatilite_autre:.2%}</td></tr>
-        <tr><td>Ratio de Sharpe</td>
-            <td style="color:#0073E6; font-weight:bold;">{ratio_sharpe:.2f}</td>
-            <td style="color:#0073E6; font-weight:bold;">{ratio_sharpe_autre:.2f}</td></tr>
-        <tr><td>Rendement total</td>
-            <td style="color:#0073E6; font-weight:bold;">{rendement_total:.2f}%</td>
-            <td style="color:#0073E6; font-weight:bold;">{rendement_total_autre:.2f}%</td></tr>
-        <tr><td>CAGR</td>
-            <td style="color:#0073E6; font-weight:bold;">{cagr:.2f}%</td>
-            <td style="color:#0073E6; font-weight:bold;">{cagr_autre:.2f}%</td></tr>
-    </table>
-    """, unsafe_allow_html=True)
-else:
-    st.markdown(f"""
-    <table style="width:50%; border-collapse: collapse; text-align: center; margin: auto;">
-        <tr>
-            <th style="background-color:#0073E6; color:white;">Métriques</th>
-            <th style="background-color:#0073E6; color:white;">{actif.upper()}</th>
-        </tr>
-        <tr><td>Volatilité annualisée</td>
-            <td style="color:#0073E6; font-weight:bold;">{volatilite_portefeuille:.2%}</td></tr>
-        <tr><td>Ratio de Sharpe</td>
-            <td style="color:#0073E6; font-weight:bold;">{ratio_sharpe:.2f}</td></tr>
-        <tr><td>Rendement total</td>
-            <td style="color:#0073E6; font-weight:bold;">{rendement_total:.2f}%</td></tr>
-        <tr><td>CAGR</td>
-            <td style="color:#0073E6; font-weight:bold;">{cagr:.2f}%</td></tr>
-    </table>
-    """, unsafe_allow_html=True)
-
-# Traitement pour le premier actif
-if 'Adj Close' in donnees_brutes.columns:
-    donnees = donnees_brutes[['Adj Close']].copy()
-else:
-    donnees = donnees_brutes[['Close']].copy()
-
-# Vérifier s'il y a des valeurs manquantes et les traiter
-donnees = donnees.fillna(method='ffill')
-donnees.columns = ['Prix Ajusté']
-donnees['Rendement Quotidien'] = donnees['Prix Ajusté'].pct_change()
-donnees['Rendement Cumulé'] = (1 + donnees['Rendement Quotidien']).cumprod()
-
-# Télécharger les données pour l'autre actif si fourni
-donnees_autre = None
-if donnees_autre_actif is not None:
-    donnees_autre = donnees_autre_actif[['Adj Close']].copy()
-    donnees_autre.columns = ['Prix Ajusté']
-    donnees_autre['Rendement Quotidien'] = donnees_autre['Prix Ajusté'].pct_change()
-    donnees_autre['Rendement Cumulé'] = (1 + donnees_autre['Rendement Quotidien']).cumprod()
-
-# Déterminer dynamiquement le titre en fonction du nombre d'actifs
-if donnees_autre is not None:
-    petit_titre = "Comparaison des rendements cumulés"
-else:
-    petit_titre = "Rendement cumulé"
-
-# Graphique interactif avec Plotly
-trace1 = go.Scatter(
-    x=donnees.index, 
-    y=donnees['Rendement Cumulé'], 
-    mode='lines',  # Affichage des lignes
-    name=f"Premier Actif : {actif.upper()}", 
-    line=dict(color='blue', width=1),  # Lignes bleues, largeur réduite
-    hovertext=donnees['Rendement Cumulé'].round(2),  # Afficher les valeurs au survol
-    hoverinfo='text'
-)
-
-if donnees_autre is not None:
-    st.markdown("""
-    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; width: 600px; margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Comparaison des rendements cumulés</h3>
-    </div>
-""", unsafe_allow_html=True)
-
-    trace2 = go.Scatter(
-        x=donnees_autre.index, 
-        y=donnees_autre['Rendement Cumulé'], 
-        mode='lines',  # Affichage des lignes
-        name=f"Second Actif : {autre_actif.upper()}", 
-        line=dict(color='green', width=1),  # Lignes vertes, largeur réduite
-        hovertext=donnees_autre['Rendement Cumulé'].round(2),  # Afficher les valeurs au survol
-        hoverinfo='text'
+    frais_gestion = st.sidebar.number_input("Frais de gestion annuels (%)", min_value=0.0, value=depuis_url("frais", 0.50, float, minimum=0.0), step=0.05)
+    options_indices = [nom for nom in indices.INDICES if nom != "Personnalisé"] + ["Personnalisé"]
+    indices_reference = st.sidebar.multiselect(
+        "Indices de référence",
+        options=options_indices,
+        default=[nom for nom in depuis_url("indices", ["ACWI"], lire_liste) if nom in options_indices]
     )
-    data = [trace1, trace2]
-else:
-    st.markdown("""
-    <br><br><br> <!-- Trois lignes vides avant le titre -->
-    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; width: 600px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Rendement cumulé</h3>
-    </div>
-""", unsafe_allow_html=True)
+    indice_personnalise = ""
+    if "Personnalisé" in indices_reference:
+        indice_personnalise = st.sidebar.text_input("Composition de l'indice personnalisé (ex: ACWI:0.6, AGG:0.4)", value=depuis_url("composition", "ACWI:0.6, AGG:0.4"))
 
+    return pipeline.lire_symboles(symboles_actifs), date_debut, date_fin, taux_sans_risque, montant_initial, montant_contribution, frequence_contributions, frais_gestion, indices_reference, indice_personnalise, devise_investisseur, intervalle_donnees, taille_barres
 
-    data = [trace1]
-
-# Définir le titre du graphique en fonction du nombre d'actifs
-layout = go.Layout(
-    title=petit_titre,  # Dynamique : titre qui change en fonction du nombre d'actifs
-    xaxis=dict(title='Date'),
-    yaxis=dict(title='Rendement Cumulé'),
-    plot_bgcolor='white',  # Fond du graphique en blanc pour un look épuré
-    hovermode='x unified',  # Affichage des informations au survol de manière unifiée pour tous les éléments
-    title_x=0.5,  # Centrer le titre horizontalement
-    title_y=0.01,  # Placer le titre juste au-dessus de l'axe X (proche du bas)
-    title_xanchor="center",  # Centrer le titre horizontalement
-    title_yanchor="bottom",  # Positionner le titre juste au-dessus de l'axe X
-)
-fig = go.Figure(data=data, layout=layout)
-st.plotly_chart(fig)
-
- # Calcul des rendements mensuels
-donnees['Mois'] = donnees.index.to_period('M')  # Regrouper par mois
-donnees_mensuelles = donnees.groupby('Mois').last()  # Prendre les dernières valeurs par mois
-donnees_mensuelles['Rendement Mensuel'] = donnees_mensuelles['Prix Ajusté'].pct_change()
-
-# Recalculer les prix en fonction de la fréquence choisie
-frequences = {
-    'Mensuelle': 'M',
-    'Trimestrielle': '3M',
-    'Semestrielle': '6M',
-    'Annuelle': '12M'
+# Appel des paramètres
+symboles, date_debut, date_fin, taux_sans_risque, montant_initial, montant_contribution, frequence_contributions, frais_gestion, indices_reference, indice_personnalise, devise_investisseur, intervalle_donnees, taille_barres = sidebar_parameters()
+symbole_devise = devises.SYMBOLES_DEVISES[devise_investisseur]
+
+# Paramètres recopiés dans l'URL : un lien partagé restitue la même vue (et les mêmes résultats en cache)
+parametres_url = {
+    "symboles": ", ".join(symboles),
+    "debut": str(date_debut),
+    "fin": str(date_fin),
+    "intervalle": intervalle_donnees,
+    "barres": taille_barres,
+    "devise": devise_investisseur,
+    "taux": f"{taux_sans_risque * 100:g}",
+    "initial": str(montant_initial),
+    "contribution": str(montant_contribution),
+    "frequence": frequence_contributions,
+    "frais": f"{frais_gestion:g}",
+    "indices": "|".join(indices_reference),
 }
+if indice_personnalise:
+    parametres_url["composition"] = indice_personnalise
+for nom in ("section", "modele"):  # Section affichée et modèle de prévision, tenus à jour par le fragment
+    if st.query_params.get(nom):
+        parametres_url[nom] = st.query_params[nom]
+if st.query_params.to_dict() != parametres_url:
+    st.query_params.from_dict(parametres_url)
+
+# Période ramenée à l'historique disponible des actifs (référentiel local), avant tout téléchargement
+periode_demandee = (date_debut, date_fin)
+date_debut, date_fin = referentiel.borner_periode(symboles, date_debut, date_fin)
+if (date_debut, date_fin) != periode_demandee:
+    st.sidebar.info(f"Période ramenée à l'historique disponible : du {date_debut:%d/%m/%Y} au {date_fin:%d/%m/%Y}.")
+if (date_fin - date_debut).days < pipeline.DUREE_MINIMALE_JOURS:
+    st.warning(f"La période analysée doit couvrir au moins {pipeline.DUREE_MINIMALE_JOURS} jours.")
+    st.stop()
+inconnus = [s for s in symboles if referentiel.fiche(s) is None]
+if inconnus:
+    st.sidebar.caption(f"Absents du référentiel local (vérifiés au téléchargement) : {', '.join(inconnus)}")
+
+# Origine des trajectoires des scénarios de crise (l'indice sert de repli pour les actifs trop récents)
+source_scenarios = st.sidebar.selectbox(
+    "Trajectoires des scénarios de crise",
+    options=["Indice S&P 500", "Historique de chaque actif"],
+    index=0
+)
 
-if frequence_contributions in frequences:
-    prix_par_periode = donnees.resample(frequences[frequence_contributions]).last()['Prix Ajusté']
-else:
-    st.error("Fréquence invalide !")
-    prix_par_periode = pd.Series(dtype=float)
-
-# Calcul des rendements pour la fréquence choisie
-rendements_frequents = prix_par_periode.pct_change().dropna()
-
-
-# Comparaison des deux actifs
-if donnees_autre_actif is not None and not donnees_autre_actif.empty:
-   
-    # Traitement des données pour le second actif
-    donnees_autre = donnees_autre_actif[['Adj Close']].copy()
-    
-    donnees_autre.columns = ['Prix Ajusté']
-    donnees_autre['Rendement Quotidien'] = donnees_autre['Prix Ajusté'].pct_change()
-    donnees_autre['Rendement Cumulé'] = (1 + donnees_autre['Rendement Quotidien']).cumprod()
-
-# Histogramme(s) des rendements avec barres positives en vert et négatives en rouge
-if donnees_autre_actif is not None and not donnees_autre_actif.empty:
-
+# Paramètres de la décumulation (retraits périodiques à partir du montant initial)
+with st.sidebar.expander("Décumulation (retraits)"):
+    taux_retrait = st.number_input("Taux de retrait annuel (%)", min_value=0.0, value=4.0, step=0.25) / 100
+    inflation = st.number_input("Inflation annuelle (%)", min_value=0.0, value=2.0, step=0.1) / 100
+    horizon_retraits = st.number_input("Durée des retraits (années)", min_value=1, value=30, step=1)
+    probabilite_cible = st.number_input("Probabilité de succès visée (%)", min_value=50.0, max_value=99.9, value=95.0, step=1.0) / 100
+    nombre_chemins = st.number_input("Nombre de chemins bootstrap", min_value=100, value=2000, step=500)
+
+# Objectif de capital : contribution, montant initial ou horizon nécessaires pour l'atteindre
+with st.sidebar.expander("Objectif de capital"):
+    capital_cible = st.number_input(f"Capital visé ({symbole_devise})", min_value=0, value=100000, step=10000)
+    horizon_objectif = st.number_input("Horizon de l'objectif (années)", min_value=1, value=10, step=1)
+    confiance_objectif = st.number_input("Niveau de confiance (%)", min_value=50.0, max_value=99.9, value=90.0, step=1.0) / 100
+
+# Panneau de débogage optionnel (temps passé dans chaque étape)
+afficher_profilage = st.sidebar.checkbox("Afficher le panneau de profilage", value=False)
+
+# Mode temps réel : ticks reçus d'un fichier de rejeu ou d'un serveur socket
+mode_temps_reel = st.sidebar.checkbox("Mode temps réel", value=False)
+if mode_temps_reel:
+    type_source = st.sidebar.radio("Source des prix", options=["Fichier de rejeu", "Socket"], index=0)
+    if type_source == "Fichier de rejeu":
+        chemin_rejeu = st.sidebar.text_input("Fichier de rejeu (symbole,horodatage,prix)", value="rejeu.csv")
+        vitesse_rejeu = st.sidebar.number_input("Vitesse de rejeu (ticks/s)", min_value=1, value=200, step=50)
+        parametres_flux = ("rejeu", chemin_rejeu, vitesse_rejeu)
+    else:
+        adresse_flux = st.sidebar.text_input("Adresse du serveur (hôte:port)", value="127.0.0.1:8765")
+        parametres_flux = ("socket", adresse_flux)
+
+if not symboles:
+    st.error("Veuillez saisir au moins un symbole d'actif.")
+    st.stop()
+
+# Couleur de chaque actif dans les graphiques (réutilisées au-delà de dix actifs)
+COULEURS_ACTIFS = ['blue', 'green', 'purple', 'orange', 'brown', 'magenta', 'olive', 'teal', 'navy', 'gray']
+
+# Nombre de baisses listées pour chaque stratégie dans la section des drawdowns
+NOMBRE_DRAWDOWNS = 5
+
+def couleur_actif(position):
+    return COULEURS_ACTIFS[position % len(COULEURS_ACTIFS)]
+
+# Grille dynamique : un graphique par actif, `par_ligne` colonnes par ligne (pleine largeur pour un seul actif)
+def grille(resultats, par_ligne=2):
+    if len(resultats) == 1:
+        yield st.container(), 0, resultats[0]
+        return
+    for debut in range(0, len(resultats), par_ligne):
+        colonnes = st.columns(par_ligne)
+        for decalage, (colonne, resultat) in enumerate(zip(colonnes, resultats[debut:debut + par_ligne])):
+            yield colonne, debut + decalage, resultat
+
+# Titre de section encadré
+def titre_section(titre, largeur=None):
+    style_largeur = f" width: {largeur};" if largeur else ""
     st.markdown(f"""
-    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Distribution des rendements </h3>
+    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px;{style_largeur} margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
+        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">{titre}</h3>
     </div>
 """, unsafe_allow_html=True)
 
-    col1, col2 = st.columns(2)
-
-    # Premier actif
-    with col1:
-        fig, ax = plt.subplots(figsize=(6, 4))
-        rendements = donnees['Rendement Quotidien'].dropna()
-
-        # Séparation des rendements positifs et négatifs
-        positif = rendements[rendements >= 0]
-        negatif = rendements[rendements < 0]
-
-        # Tracer les rendements positifs (vert) et négatifs (rouge)
-        ax.hist(positif, bins=20, alpha=0.7, label='Positifs', color='green', edgecolor='black')
-        ax.hist(negatif, bins=20, alpha=0.7, label='Négatifs', color='red', edgecolor='black')
-
-        # Ajouter le symbole en haut à gauche avec encadrement
-        ax.text(0.02, 0.98, f"{actif.upper()}",
-                transform=ax.transAxes, fontsize=10, fontweight='normal',
-                color='black', ha='left', va='top',
-                bbox=dict(facecolor='white', edgecolor='black', boxstyle='round,pad=0.3'))
-
-        ax.set_xlabel("Rendement")
-        ax.set_ylabel("Fréquence")
-        ax.legend()
-        st.pyplot(fig)
-
-        # Ajouter un titre dynamique sous le graphique avec taille réduite
-        st.markdown(f"<h6 style='text-align: center; color: black;'>Distribution des rendements ({frequence_contributions} - {actif.upper()})</h6>", unsafe_allow_html=True)
-
-    # Deuxième actif
-    with col2:
-        fig, ax = plt.subplots(figsize=(6, 4))
-        rendements_autre = donnees_autre['Rendement Quotidien'].dropna()
-
-        # Séparation des rendements positifs et négatifs
-        positif_autre = rendements_autre[rendements_autre >= 0]
-        negatif_autre = rendements_autre[rendements_autre < 0]
+profilage.etape("pipeline_actifs")
+# Téléchargement, normalisation, métriques, stratégies et régression de chaque actif, en parallèle
+parametres = pipeline.Parametres(date_debut, date_fin, taux_sans_risque, montant_initial, montant_contribution,
+                                 frequence_contributions, devise_investisseur, intervalle_donnees, taille_barres)
+resultats = []
+for resultat in pipeline.analyser_actifs(symboles, parametres):
+    if resultat.erreur is not None:
+        st.error(resultat.erreur)
+    else:
+        resultats.append(resultat)
 
-        # Tracer les rendements positifs (vert) et négatifs (rouge)
-        ax.hist(positif_autre, bins=20, alpha=0.7, label='Positifs', color='green', edgecolor='black')
-        ax.hist(negatif_autre, bins=20, alpha=0.7, label='Négatifs', color='red', edgecolor='black')
+# Aucun actif exploitable : seuls les messages d'erreur sont affichés
+if not resultats:
+    st.stop()
 
-        # Ajouter le symbole en haut à gauche avec encadrement
-        ax.text(0.02, 0.98, f"{autre_actif.upper()}",
-                transform=ax.transAxes, fontsize=10, fontweight='normal',
-                color='black', ha='left', va='top',
-                bbox=dict(facecolor='white', edgecolor='black', boxstyle='round,pad=0.3'))
+plusieurs_actifs = len(resultats) > 1
 
-        ax.set_xlabel("Rendement")
-        ax.set_ylabel("Fréquence")
-        ax.legend()
-        st.pyplot(fig)
+# Matrice des rendements quotidiens (dates × actifs) partagée par les analyses transversales ;
+# les barres intrajournalières sont ramenées à des clôtures quotidiennes, comme les indices
+def rendements_journaliers(donnees_actif):
+    if not intraday.est_intraday(intervalle_donnees):
+        return donnees_actif['Rendement Quotidien']
+    return donnees_actif['Prix Ajusté'].resample('D').last().dropna().pct_change()
 
-        # Ajouter un titre dynamique sous le graphique avec taille réduite
-        st.markdown(f"<h6 style='text-align: center; color: black;'>Distribution des rendements ({frequence_contributions} - {autre_actif.upper()})</h6>", unsafe_allow_html=True)
+rendements_actifs = pd.DataFrame({r.symbole: rendements_journaliers(r.donnees) for r in resultats})
 
-else:
-    # Histogramme pour un seul actif
-    st.markdown(f"""
-    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Distribution des rendements </h3>
+st.markdown("""
+    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 20px; width: 400px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
+        <h3 style="color: #333333; font-weight: bold; margin: 0;">Analyse des performances</h3>
     </div>
 """, unsafe_allow_html=True)
 
-    fig, ax = plt.subplots(figsize=(10, 5))
-    rendements = donnees['Rendement Quotidien'].dropna()
-
-    # Séparation des rendements positifs et négatifs
-    positif = rendements[rendements >= 0]
-    negatif = rendements[rendements < 0]
+# Tableau des métriques (HTML) : une colonne par actif, d'après {symbole: métriques}
+def tableau_metriques(metriques_actifs):
+    entetes = "".join(f'<th style="background-color:#0073E6; color:white;">{symbole}</th>' for symbole in metriques_actifs)
+    corps = "".join(
+        f"<tr><td>{libelle}</td>" + "".join(
+            f'<td style="color:#0073E6; font-weight:bold;">{format_valeur.format(metriques[cle])}</td>' for metriques in metriques_actifs.values()
+        ) + "</tr>"
+        for libelle, cle, format_valeur in rapport.LIGNES_METRIQUES
+    )
+    style_tableau = "width:100%; border-collapse: collapse; text-align: center;" if plusieurs_actifs else "width:50%; border-collapse: collapse; text-align: center; margin: auto;"
+    return f"""
+    <table style="{style_tableau}">
+        <tr>
+            <th style="background-color:#0073E6; color:white;">Métriques</th>
+            {entetes}
+        </tr>
+        {corps}
+    </table>
+    """
 
-    # Tracer les rendements positifs (vert) et négatifs (rouge)
-    ax.hist(positif, bins=20, alpha=0.7, label='Positifs', color='green', edgecolor='black')
-    ax.hist(negatif, bins=20, alpha=0.7, label='Négatifs', color='red', edgecolor='black')
 
-    # Ajouter le symbole en haut à gauche avec encadrement
-    ax.text(0.02, 0.98, f"{actif.upper()}",
-            transform=ax.transAxes, fontsize=10, fontweight='normal',
-            color='black', ha='left', va='top',
-            bbox=dict(facecolor='white', edgecolor='black', boxstyle='round,pad=0.3'))
+POINTS_TEMPS_REEL = 5000  # Points en temps réel conservés pour redessiner le graphique lors d'une réexécution complète
+DELAI_ABANDON_FLUX = 30  # Secondes sans lecture après lesquelles le flux d'une session fermée s'arrête
 
-    ax.set_xlabel("Rendement")
-    ax.set_ylabel("Fréquence")
-    ax.legend()
-    st.pyplot(fig)
 
-    # Ajouter un titre dynamique sous le graphique avec taille réduite
-    st.markdown(f"<h6 style='text-align: center; color: black;'>Distribution des rendements ({frequence_contributions} - {actif.upper()})</h6>", unsafe_allow_html=True)
+# Arrêter et oublier le flux de la session (mode temps réel désactivé ou source modifiée)
+def arreter_flux():
+    if st.session_state.get("flux") is not None:
+        st.session_state["flux"].arreter()
+    for cle in ("flux", "parametres_flux", "points_temps_reel", "derniers_rendements", "sommets_temps_reel", "flux_termine"):
+        st.session_state.pop(cle, None)
 
-# Visualisation de la volatilité avec boîte à moustaches
-st.markdown(f"""
-    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Volatilité des rendements </h3>
-    </div>
-""", unsafe_allow_html=True)
 
-if donnees_autre_actif is not None and not donnees_autre_actif.empty:
-    # Deux boîtes à moustaches côte à côte
-    col1, col2 = st.columns(2)
-
-    # Boîte à moustaches pour le premier actif
-    with col1:
-        fig, ax = plt.subplots(figsize=(6, 4))
-        ax.boxplot(rendements_frequents, vert=False, patch_artist=True,
-                   boxprops=dict(facecolor='blue', color='black'),
-                   whiskerprops=dict(color='black'),
-                   capprops=dict(color='black'),
-                   medianprops=dict(color='red'))
-
-        # Ajouter le texte encadré à l'intérieur en haut à gauche
-        ax.text(0.02, 0.98, f"({actif.upper()})", transform=ax.transAxes,
-                fontsize=10, ha='left', va='top',
-                bbox=dict(facecolor='white', edgecolor='black', boxstyle='round,pad=0.3'))
-
-        ax.set_xlabel("Rendement")
-        st.pyplot(fig)
-
-        # Ajouter un petit titre sous le graphique pour le premier actif avec une taille de police réduite
-        st.markdown(f"<h6 style='text-align: center; color: black;'>Volatilité des rendements - {frequence_contributions} - {actif.upper()}</h6>", unsafe_allow_html=True)
-
-    # Boîte à moustaches pour le deuxième actif
-    with col2:
-        # Calculer les rendements pour le deuxième actif
-        prix_par_periode_autre = donnees_autre.resample(frequences[frequence_contributions]).last()['Prix Ajusté']
-        rendements_frequents_autre = prix_par_periode_autre.pct_change().dropna()
-
-        fig, ax = plt.subplots(figsize=(6, 4))
-        ax.boxplot(rendements_frequents_autre, vert=False, patch_artist=True,
-                   boxprops=dict(facecolor='green', color='black'),
-                   whiskerprops=dict(color='black'),
-                   capprops=dict(color='black'),
-                   medianprops=dict(color='red'))
-
-        # Ajouter le texte encadré à l'intérieur en haut à gauche
-        ax.text(0.02, 0.98, f"({autre_actif.upper()})", transform=ax.transAxes,
-                fontsize=10, ha='left', va='top',
-                bbox=dict(facecolor='white', edgecolor='black', boxstyle='round,pad=0.3'))
-
-        ax.set_xlabel("Rendement")
-        st.pyplot(fig)
-
-        # Ajouter un petit titre sous le graphique pour le deuxième actif avec une taille de police réduite
-        st.markdown(f"<h6 style='text-align: center; color: black;'>Volatilité des rendements - {frequence_contributions} - {autre_actif.upper()}</h6>", unsafe_allow_html=True)
-
-else:
-    # Une seule boîte à moustaches si aucun deuxième actif
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.boxplot(rendements_frequents, vert=False, patch_artist=True,
-               boxprops=dict(facecolor='blue', color='black'),
-               whiskerprops=dict(color='black'),
-               capprops=dict(color='black'),
-               medianprops=dict(color='red'))
-
-    # Ajouter le texte encadré à l'intérieur en haut à gauche
-    ax.text(0.02, 0.98, f"({actif.upper()})", transform=ax.transAxes,
-            fontsize=10, ha='left', va='top',
-            bbox=dict(facecolor='white', edgecolor='black', boxstyle='round,pad=0.3'))
-
-    ax.set_xlabel("Rendement")
-    st.pyplot(fig)
-
-    # Ajouter un petit titre sous le graphique pour un seul actif avec une taille de police réduite
-    st.markdown(f"<h6 style='text-align: center; color: black;'>Volatilité des rendements - {frequence_contributions} - {actif.upper()}</h6>", unsafe_allow_html=True)
-
-
-# Téléchargement des données de l'indice ACWI IMI via yfinance
-try:
-    symbole_acwi = "ACWI"  # Symbole pour l'indice ACWI IMI
-    donnees_acwi_brutes = yf.download(symbole_acwi, start=str(date_debut), end=str(date_fin))
-    if not donnees_acwi_brutes.empty:
-        donnees_acwi = donnees_acwi_brutes[['Adj Close']].copy()
-        donnees_acwi.columns = ['Prix Ajusté']
-        donnees_acwi['Rendement Quotidien'] = donnees_acwi['Prix Ajusté'].pct_change()
-        donnees_acwi['Rendement Cumulé'] = (1 + donnees_acwi['Rendement Quotidien']).cumprod()
+# Démarrer le flux de la session, ou le redémarrer si la source ou les actifs suivis ont changé
+# (ou s'il s'est arrêté faute de lecture pendant une longue exécution)
+def demarrer_flux(parametres_flux, symboles):
+    cle = parametres_flux + (tuple(symboles),)
+    flux_session = st.session_state.get("flux")
+    if st.session_state.get("parametres_flux") == cle and not flux_session.abandonne:
+        return
+    arreter_flux()
+    if parametres_flux[0] == "rejeu":
+        source = flux.SourceRejeu(parametres_flux[1], vitesse=parametres_flux[2])
     else:
-        st.warning("Les données pour l'indice ACWI IMI sont vides.")
-        donnees_acwi = None
-except Exception as e:
-    st.error(f"Erreur lors du téléchargement des données de l'indice ACWI IMI : {e}")
-    donnees_acwi = None
-
-# Comparaison avec l'indice ACWI IMI
-if donnees_acwi is not None:
-    st.markdown("""
-    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Comparaison avec l'indice ACWI IMI</h3>
-    </div>
-""", unsafe_allow_html=True)
-
-
-    # Si un deuxième actif est saisi, afficher deux graphiques côte à côte
-    if donnees_autre_actif is not None and not donnees_autre_actif.empty:
-        col1, col2 = st.columns(2)
-
-        # Premier graphique : Comparaison du premier actif avec ACWI IMI
-        with col1:
-            trace1 = go.Scatter(
-                x=donnees.index, 
-                y=donnees['Rendement Cumulé'], 
-                mode='lines',  
-                name=f'Portefeuille ({actif.upper()})', 
-                line=dict(color='blue', width=1),  
-                hovertext=donnees['Rendement Cumulé'].round(2),  
-                hoverinfo='text'
-            )
-
-            trace2 = go.Scatter(
-                x=donnees_acwi.index, 
-                y=donnees_acwi['Rendement Cumulé'], 
-                mode='lines',  
-                name='Indice ACWI IMI', 
-                line=dict(color='orange', width=1), 
-                hovertext=donnees_acwi['Rendement Cumulé'].round(2),
-                hoverinfo='text'
-            )
-
-            layout = go.Layout(
-                xaxis=dict(title='Date'),
-                yaxis=dict(title='Rendement Cumulatif'),
-                hovermode='x unified',  
-                margin=dict(b=100),  # Ajouter de l'espace en bas du graphique pour le titre
-                annotations=[{
-                    'x': 0.5,
-                    'y': -0.25,  # Placer le titre sous l'axe des dates, plus bas
-                    'xref': 'paper',
-                    'yref': 'paper',
-                    'text': f"Comparaison de {actif.upper()} avec l'indice ACWI IMI",
-                    'showarrow': False,
-                    'font': {'size': 12, 'weight': 'bold', 'color': 'black'},  # Titre en gras et noir
-                    'align': 'center',
-                }]
-            )
-
-            fig = go.Figure(data=[trace1, trace2], layout=layout)
-            st.plotly_chart(fig)
-
-        # Deuxième graphique : Comparaison du second actif avec ACWI IMI
-        with col2:
-            trace1 = go.Scatter(
-                x=donnees_autre.index, 
-                y=donnees_autre['Rendement Cumulé'], 
-                mode='lines',  
-                name=f'Portefeuille ({autre_actif.upper()})', 
-                line=dict(color='green', width=1), 
-                hovertext=donnees_autre['Rendement Cumulé'].round(2),  
-                hoverinfo='text'
-            )
+        hote, _, port = parametres_flux[1].rpartition(":")
+        source = flux.SourceSocket(hote or "127.0.0.1", int(port))
+    st.session_state["flux"] = flux.Flux(source, symboles, delai_abandon=DELAI_ABANDON_FLUX).demarrer()
+    st.session_state["parametres_flux"] = cle
+    st.session_state["points_temps_reel"] = None
+    st.session_state["derniers_rendements"] = {}
+    st.session_state["sommets_temps_reel"] = {}
+    st.session_state["flux_termine"] = False
+
+
+# Métriques de l'analyse prolongées par les ticks reçus : le rendement total et le drawdown
+# maximal suivent le dernier rendement cumulé et son plus haut depuis le début de la période
+def metriques_temps_reel():
+    metriques_actifs = {}
+    for r in resultats:
+        metriques = dict(r.metriques)
+        dernier = st.session_state["derniers_rendements"].get(r.symbole)
+        if dernier is not None:
+            metriques['rendement_total'] = (dernier - 1) * 100
+            metriques['drawdown_maximal'] = min(metriques['drawdown_maximal'],
+                                                dernier / st.session_state["sommets_temps_reel"][r.symbole] - 1)
+        metriques_actifs[r.symbole] = metriques
+    return metriques_actifs
+
+
+# Rendements cumulés historiques (dates × actifs), axe des dates commun avec les ticks reçus
+def rendements_cumules_historiques():
+    historique = pd.DataFrame({r.symbole: r.donnees['Rendement Cumulé'] for r in resultats})
+    if historique.index.tz is not None:
+        historique.index = historique.index.tz_convert(None)
+    historique.index.name = "Date"
+    return historique
+
+
+if mode_temps_reel:
+    demarrer_flux(parametres_flux, [r.symbole for r in resultats])
+    emplacement_metriques = st.empty()
+    emplacement_metriques.markdown(tableau_metriques(metriques_temps_reel()), unsafe_allow_html=True)
+else:
+    arreter_flux()
+    st.markdown(tableau_metriques({r.symbole: r.metriques for r in resultats}), unsafe_allow_html=True)
 
-            trace2 = go.Scatter(
-                x=donnees_acwi.index, 
-                y=donnees_acwi['Rendement Cumulé'], 
-                mode='lines',  
-                name='Indice ACWI IMI', 
-                line=dict(color='orange', width=1), 
-                hovertext=donnees_acwi['Rendement Cumulé'].round(2),
-                hoverinfo='text'
-            )
+profilage.etape("graphique_rendements_cumules")
+# Déterminer dynamiquement le titre en fonction du nombre d'actifs
+petit_titre = "Comparaison des rendements cumulés" if plusieurs_actifs else "Rendement cumulé"
+if not plusieurs_actifs:
+    st.markdown("<br><br><br>", unsafe_allow_html=True)  # Trois lignes vides avant le titre
+titre_section(petit_titre, largeur="600px")
+
+if mode_temps_reel:
+    # En temps réel, l'historique est suivi des ticks déjà reçus ; le fragment de suivi y ajoute
+    # ensuite chaque nouveau lot (add_rows) sans renvoyer les points existants
+    historique = rendements_cumules_historiques()
+    if st.session_state["points_temps_reel"] is not None:
+        historique = pd.concat([historique, st.session_state["points_temps_reel"]])
+    graphique_temps_reel = st.line_chart(historique, y_label="Rendement Cumulé")
+else:
+    # Graphique interactif avec Plotly : une courbe par actif
+    data = [
+        go.Scatter(
+            x=r.donnees.index,
+            y=r.donnees['Rendement Cumulé'],
+            mode='lines',  # Affichage des lignes
+            name=r.symbole,
+            line=dict(color=couleur_actif(position), width=1),  # Largeur réduite
+            hovertext=r.donnees['Rendement Cumulé'].round(2),  # Afficher les valeurs au survol
+            hoverinfo='text'
+        )
+        for position, r in enumerate(resultats)
+    ]
 
-            layout = go.Layout(
-                xaxis=dict(title='Date'),
-                yaxis=dict(title='Rendement Cumulatif'),
-                hovermode='x unified',  
-                margin=dict(b=100),  # Ajouter de l'espace en bas du graphique pour le titre
+    # Définir le titre du graphique en fonction du nombre d'actifs
+    layout = go.Layout(
+        title=petit_titre,  # Dynamique : titre qui change en fonction du nombre d'actifs
+        xaxis=dict(title='Date'),
+        yaxis=dict(title='Rendement Cumulé'),
+        plot_bgcolor='white',  # Fond du graphique en blanc pour un look épuré
+        hovermode='x unified',  # Affichage des informations au survol de manière unifiée pour tous les éléments
+        title_x=0.5,  # Centrer le titre horizontalement
+        title_y=0.01,  # Placer le titre juste au-dessus de l'axe X (proche du bas)
+        title_xanchor="center",  # Centrer le titre horizontalement
+        title_yanchor="bottom",  # Positionner le titre juste au-dessus de l'axe X
+    )
+    fig = go.Figure(data=data, layout=layout)
+    st.plotly_chart(fig)
+
+# Section « Distribution » : histogrammes, boîtes à moustaches et calendrier des rendements
+def section_distribution():
+    profilage.etape("histogrammes")
+    # Histogrammes des rendements avec barres positives en vert et négatives en rouge
+    titre_section("Distribution des rendements ")
+    for cellule, position, r in grille(resultats):
+        with cellule:
+            fig, ax = plt.subplots(figsize=(6, 4) if plusieurs_actifs else (10, 5))
+            rendements = r.donnees['Rendement Quotidien'].dropna()
+
+            # Séparation des rendements positifs et négatifs
+            positif = rendements[rendements >= 0]
+            negatif = rendements[rendements < 0]
+
+            # Tracer les rendements positifs (vert) et négatifs (rouge)
+            ax.hist(positif, bins=20, alpha=0.7, label='Positifs', color='green', edgecolor='black')
+            ax.hist(negatif, bins=20, alpha=0.7, label='Négatifs', color='red', edgecolor='black')
+
+            # Ajouter le symbole en haut à gauche avec encadrement
+            ax.text(0.02, 0.98, f"{r.symbole}",
+                    transform=ax.transAxes, fontsize=10, fontweight='normal',
+                    color='black', ha='left', va='top',
+                    bbox=dict(facecolor='white', edgecolor='black', boxstyle='round,pad=0.3'))
+
+            ax.set_xlabel("Rendement")
+            ax.set_ylabel("Fréquence")
+            ax.legend()
+            st.pyplot(fig)
+            plt.close(fig)
+
+            # Ajouter un titre dynamique sous le graphique avec taille réduite
+            st.markdown(f"<h6 style='text-align: center; color: black;'>Distribution des rendements ({frequence_contributions} - {r.symbole})</h6>", unsafe_allow_html=True)
+
+    profilage.etape("boites_moustaches")
+    # Visualisation de la volatilité avec boîte à moustaches
+    titre_section("Volatilité des rendements ")
+    for cellule, position, r in grille(resultats):
+        with cellule:
+            fig, ax = plt.subplots(figsize=(6, 4) if plusieurs_actifs else (8, 6))
+            ax.boxplot(r.rendements_frequents, vert=False, patch_artist=True,
+                       boxprops=dict(facecolor=couleur_actif(position), color='black'),
+                       whiskerprops=dict(color='black'),
+                       capprops=dict(color='black'),
+                       medianprops=dict(color='red'))
+
+            # Ajouter le texte encadré à l'intérieur en haut à gauche
+            ax.text(0.02, 0.98, f"({r.symbole})", transform=ax.transAxes,
+                    fontsize=10, ha='left', va='top',
+                    bbox=dict(facecolor='white', edgecolor='black', boxstyle='round,pad=0.3'))
+
+            ax.set_xlabel("Rendement")
+            st.pyplot(fig)
+            plt.close(fig)
+
+            # Ajouter un petit titre sous le graphique avec une taille de police réduite
+            st.markdown(f"<h6 style='text-align: center; color: black;'>Volatilité des rendements - {frequence_contributions} - {r.symbole}</h6>", unsafe_allow_html=True)
+
+
+    profilage.etape("calendrier_rendements")
+    # Calendrier des rendements mensuels (années × mois) et rendement de chaque année civile
+    titre_section("Calendrier des rendements mensuels")
+    statistiques_mensuelles = {}
+    for cellule, position, r in grille(resultats):
+        calendrier = periodes.calendrier(r.donnees['Prix Ajusté'], pipeline.cle_actif(r.symbole, parametres))
+        statistiques_mensuelles[r.symbole] = periodes.statistiques_calendrier(calendrier)
+        annees = [str(annee) for annee in calendrier.index]
+        with cellule:
+            fig = go.Figure(data=[
+                go.Heatmap(
+                    z=calendrier[periodes.MOIS].to_numpy(),
+                    x=periodes.MOIS,
+                    y=annees,
+                    zmid=0,
+                    colorscale='RdYlGn',
+                    text=calendrier[periodes.MOIS].map("{:.1%}".format).where(calendrier[periodes.MOIS].notna(), "").to_numpy(),
+                    texttemplate="%{text}",
+                    hovertemplate="%{x} %{y} : %{z:.2%}<extra></extra>",
+                    colorbar=dict(tickformat='.0%', x=1.12)
+                ),
+                go.Heatmap(
+                    z=calendrier[['Année']].to_numpy(),
+                    x=['Année'],
+                    y=annees,
+                    xaxis='x2',
+                    zmid=0,
+                    colorscale='RdYlGn',
+                    showscale=False,
+                    text=calendrier[['Année']].map("{:.1%}".format).where(calendrier[['Année']].notna(), "").to_numpy(),
+                    texttemplate="%{text}",
+                    hovertemplate="%{y} : %{z:.2%}<extra></extra>"
+                ),
+            ])
+            fig.update_layout(
+                xaxis=dict(domain=[0, 0.88], side='top'),
+                xaxis2=dict(domain=[0.9, 1], side='top'),
+                yaxis=dict(autorange='reversed', type='category'),
+                height=max(300, 28 * len(annees) + 150),
+                margin=dict(b=60),
                 annotations=[{
                     'x': 0.5,
-                    'y': -0.25,  # Placer le titre sous l'axe des dates, plus bas
+                    'y': -0.05,
                     'xref': 'paper',
                     'yref': 'paper',
-                    'text': f"Comparaison de {autre_actif.upper()} avec l'indice ACWI IMI",
+                    'yanchor': 'top',
+                    'text': f"Rendements mensuels et annuels ({r.symbole})",
                     'showarrow': False,
-                    'font': {'size': 12, 'weight': 'bold', 'color': 'black'},  # Titre en gras et noir
+                    'font': {'size': 12, 'weight': 'bold', 'color': 'black'},
                     'align': 'center',
                 }]
             )
+            st.plotly_chart(fig, key=f"calendrier_{r.symbole}")
 
-            fig = go.Figure(data=[trace1, trace2], layout=layout)
-            st.plotly_chart(fig)
+    st.dataframe(pd.DataFrame(statistiques_mensuelles).T.style.format({
+        'Rendement du meilleur mois': "{:.2%}",
+        'Rendement du pire mois': "{:.2%}",
+        'Mois en hausse': "{:.0%}",
+        'Rendement mensuel moyen': "{:.2%}",
+        'Écart type mensuel': "{:.2%}"
+    }))
 
-    else:
-        # Un seul graphique si aucun autre actif n'est saisi
-        trace1 = go.Scatter(
-            x=donnees.index, 
-            y=donnees['Rendement Cumulé'], 
-            mode='lines',  
-            name=f'Portefeuille ({actif.upper()})', 
-            line=dict(color='blue', width=1),  
-            hovertext=donnees['Rendement Cumulé'].round(2),  
-            hoverinfo='text'
-        )
 
-        trace2 = go.Scatter(
-            x=donnees_acwi.index, 
-            y=donnees_acwi['Rendement Cumulé'], 
-            mode='lines',  
-            name='Indice ACWI IMI', 
-            line=dict(color='orange', width=1), 
-            hovertext=donnees_acwi['Rendement Cumulé'].round(2),
+# Section « Indices et corrélations » : comparaison aux indices de référence et corrélations entre actifs
+def section_indices():
+    profilage.etape("comparaison_indices")
+    # Indices de rendement des indices de référence choisis (mis en cache pour tout le processus)
+    try:
+        selection_indices = indices.selection_indices(indices_reference, indices.lire_composition(indice_personnalise))
+        rendements_indices = indices.indices_rendement(selection_indices, date_debut, date_fin, devise_investisseur)
+    except Exception as e:
+        st.error(f"Erreur lors du téléchargement des données des indices de référence : {e}")
+        rendements_indices = pd.DataFrame()
+
+    # Graphique comparant un actif aux indices de référence alignés sur son calendrier
+    def graphique_indices(donnees_actif, symbole, couleur):
+        indices_alignes = indices.aligner(rendements_indices, donnees_actif.index)  # Alignement vectorisé unique
+        traces = [go.Scatter(
+            x=donnees_actif.index,
+            y=donnees_actif['Rendement Cumulé'],
+            mode='lines',
+            name=f'Portefeuille ({symbole.upper()})',
+            line=dict(color=couleur, width=1),
+            hovertext=donnees_actif['Rendement Cumulé'].round(2),
             hoverinfo='text'
-        )
+        )]
+        for nom, couleur_indice in zip(indices_alignes.columns, indices.COULEURS_INDICES):
+            traces.append(go.Scatter(
+                x=indices_alignes.index,
+                y=indices_alignes[nom],
+                mode='lines',
+                name=f'Indice {nom}',
+                line=dict(color=couleur_indice, width=1),
+                hovertext=indices_alignes[nom].round(2),
+                hoverinfo='text'
+            ))
 
         layout = go.Layout(
             xaxis=dict(title='Date'),
             yaxis=dict(title='Rendement Cumulatif'),
-            hovermode='x unified',  
+            hovermode='x unified',
             margin=dict(b=100),  # Ajouter de l'espace en bas du graphique pour le titre
             annotations=[{
                 'x': 0.5,
                 'y': -0.25,  # Placer le titre sous l'axe des dates, plus bas
                 'xref': 'paper',
                 'yref': 'paper',
-                'text': f"Comparaison de {actif.upper()} avec l'indice ACWI IMI",
+                'text': f"Comparaison de {symbole.upper()} avec {', '.join(indices_alignes.columns)}",
                 'showarrow': False,
                 'font': {'size': 12, 'weight': 'bold', 'color': 'black'},  # Titre en gras et noir
                 'align': 'center',
             }]
         )
+        return go.Figure(data=traces, layout=layout)
 
-        fig = go.Figure(data=[trace1, trace2], layout=layout)
-        st.plotly_chart(fig)
+    # Comparaison avec les indices de référence
+    if not rendements_indices.empty:
+        titre_section("Comparaison avec les indices de référence")
 
-else:
-    st.warning("Les données de l'indice ACWI IMI ne sont pas disponibles pour effectuer la comparaison.")
+        # Un graphique par actif, disposés en grille
+        for cellule, position, r in grille(resultats):
+            with cellule:
+                st.plotly_chart(graphique_indices(r.donnees, r.symbole, couleur_actif(position)), key=f"indices_{r.symbole}")
 
+        # Performance relative : bêta, alpha, tracking error, ratio d'information, captures et corrélation
+        titre_section("Performance relative par rapport aux indices de référence")
 
-# Simulation Lump Sum
-donnees['Valeur Lump Sum'] = montant_initial * donnees['Rendement Cumulé']
+        # Rendements des indices sur le calendrier de la matrice des rendements des actifs
+        rendements_indices_alignes = indices.aligner(rendements_indices, rendements_actifs.index).pct_change(fill_method=None)
 
-# Simulation DCA
-contributions_dca = {
-    'Mensuelle': montant_contribution,
-    'Trimestrielle': montant_contribution * 3,
-    'Semestrielle': montant_contribution * 6,
-    'Annuelle': montant_contribution * 12
-}
+        for nom_indice in rendements_indices_alignes.columns:
+            statistiques_relatives = analyses.statistiques_relatives(
+                rendements_actifs, rendements_indices_alignes[nom_indice], taux_sans_risque
+            )
+            st.markdown(f"<h6 style='color: black;'>Par rapport à l'indice {nom_indice}</h6>", unsafe_allow_html=True)
+            st.dataframe(statistiques_relatives.style.format({
+                'Bêta': "{:.2f}",
+                'Alpha de Jensen': "{:.2%}",
+                'Tracking error': "{:.2%}",
+                "Ratio d'information": "{:.2f}",
+                'Capture haussière': "{:.0%}",
+                'Capture baissière': "{:.0%}",
+                'Corrélation': "{:.2f}"
+            }))
 
-def calcul_dca(prix_par_periode, contribution):
-    valeur_actuelle = 0
-    valeurs = []
-    for prix in prix_par_periode:
-        valeur_actuelle += contribution / prix
-        valeurs.append(valeur_actuelle * prix)
-    return valeurs
+    else:
+        st.warning("Les données des indices de référence ne sont pas disponibles pour effectuer la comparaison.")
 
-portefeuille_dca = calcul_dca(prix_par_periode, contributions_dca[frequence_contributions])
-dca_df = pd.DataFrame({'Prix': prix_par_periode, 'Valeur Portefeuille DCA': portefeuille_dca}, index=prix_par_periode.index)
 
-# Comparaison des stratégies Lump Sum et DCA pour le premier actif
-st.markdown("""
-    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Comparaison des stratégies d'investissement : Lump Sum vs DCA</h3>
-    </div>
-""", unsafe_allow_html=True)
+    profilage.etape("correlations")
+    # Corrélations entre actifs : matrice classée par classification hiérarchique et corrélations glissantes
+    if plusieurs_actifs:
+        titre_section("Corrélations entre actifs")
+        contexte_correlations = (str(date_debut), str(date_fin), devise_investisseur, intervalle_donnees, taille_barres)
+        # Rendements toujours quotidiens (barres intrajournalières ramenées à la journée) : annualisation en séances
+        covariance_actifs, correlation_actifs = correlations.matrices(
+            rendements_actifs, contexte_correlations, intraday.JOURS_PAR_AN
+        )
+        ordre = correlations.ordre_classification(correlation_actifs)
+        correlation_ordonnee = correlation_actifs.loc[ordre, ordre]
 
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = go.Figure(data=go.Heatmap(
+                z=correlation_ordonnee.to_numpy(),
+                x=ordre,
+                y=ordre,
+                zmin=-1,
+                zmax=1,
+                colorscale='RdBu_r',
+                text=correlation_ordonnee.round(2).to_numpy(),
+                texttemplate="%{text}",
+                hovertemplate="%{y} / %{x} : %{z:.2f}<extra></extra>"
+            ))
+            fig.update_layout(
+                yaxis=dict(autorange='reversed'),
+                margin=dict(b=100),
+                annotations=[{
+                    'x': 0.5,
+                    'y': -0.25,
+                    'xref': 'paper',
+                    'yref': 'paper',
+                    'text': "Corrélation des rendements quotidiens (actifs regroupés par similarité)",
+                    'showarrow': False,
+                    'font': {'size': 12, 'weight': 'bold', 'color': 'black'},
+                    'align': 'center',
+                }]
+            )
+            st.plotly_chart(fig, key="correlations_matrice")
+        with col2:
+            correlations_mobiles = correlations.correlations_glissantes(rendements_actifs, contexte_correlations)
+            fig = go.Figure(data=[
+                go.Scatter(x=correlations_mobiles.index, y=correlations_mobiles[paire], mode='lines', name=paire, line=dict(width=1))
+                for paire in correlations_mobiles.columns
+            ])
+            fig.update_layout(
+                xaxis=dict(title='Date'),
+                yaxis=dict(title='Corrélation', range=[-1, 1]),
+                hovermode='x unified',
+                margin=dict(b=100),
+                annotations=[{
+                    'x': 0.5,
+                    'y': -0.25,
+                    'xref': 'paper',
+                    'yref': 'paper',
+                    'text': f"Corrélations glissantes sur {correlations.FENETRE_GLISSANTE} séances",
+                    'showarrow': False,
+                    'font': {'size': 12, 'weight': 'bold', 'color': 'black'},
+                    'align': 'center',
+                }]
+            )
+            st.plotly_chart(fig, key="correlations_glissantes")
 
-if donnees_autre_actif is not None and not donnees_autre_actif.empty:
-    # Calcul des prix par période pour le deuxième actif
-    prix_par_periode_autre = donnees_autre.resample(frequences[frequence_contributions]).last()['Prix Ajusté']
-    portefeuille_dca_autre = calcul_dca(prix_par_periode_autre, contributions_dca[frequence_contributions])
-    dca_df_autre = pd.DataFrame({'Prix': prix_par_periode_autre, 
-                                 'Valeur Portefeuille DCA': portefeuille_dca_autre}, 
-                                 index=prix_par_periode_autre.index)
+        st.markdown("<h6 style='color: black;'>Matrice de covariance annualisée</h6>", unsafe_allow_html=True)
+        st.dataframe(covariance_actifs.loc[ordre, ordre].style.format("{:.4f}"))
 
-    # Création de deux colonnes pour les graphiques
-    col1, col2 = st.columns(2)
 
-    # Premier actif : Lump Sum vs DCA
-    with col1:
+# Section « Stratégies » : Lump Sum vs DCA, drawdowns et tableaux comparatifs
+def section_strategies():
+    profilage.etape("strategies_lump_sum_dca")
+    # Graphique Lump Sum vs DCA d'un actif (valeurs calculées par la chaîne de traitement)
+    def graphique_strategies(r):
         trace1 = go.Scatter(
-            x=donnees.index, 
-            y=donnees['Valeur Lump Sum'], 
-            mode='lines',  
-            name='Lump Sum', 
-            line=dict(color='blue', width=1),  
-            hovertext=donnees['Valeur Lump Sum'].round(2),  # Affichage des montants au survol
+            x=r.donnees.index,
+            y=r.valeur_lump_sum,
+            mode='lines',
+            name='Lump Sum',
+            line=dict(color='blue', width=1),
+            hovertext=r.valeur_lump_sum.round(2),  # Affichage des montants au survol
             hoverinfo='text'
         )
 
         trace2 = go.Scatter(
-            x=dca_df.index, 
-            y=dca_df['Valeur Portefeuille DCA'], 
-            mode='lines',  
-            name=f'DCA {frequence_contributions}', 
-            line=dict(color='green', width=1), 
-            hovertext=dca_df['Valeur Portefeuille DCA'].round(2),  # Affichage des montants au survol
+            x=r.dca.index,
+            y=r.dca['Valeur Portefeuille DCA'],
+            mode='lines',
+            name=f'DCA {frequence_contributions}',
+            line=dict(color='green', width=1),
+            hovertext=r.dca['Valeur Portefeuille DCA'].round(2),  # Affichage des montants au survol
             hoverinfo='text'
         )
 
         layout = go.Layout(
             xaxis=dict(title='Date'),
-            yaxis=dict(title="Valeur du Portefeuille (€)"),
-            hovermode='x unified',  
+            yaxis=dict(title=f"Valeur du Portefeuille ({symbole_devise})"),
+            hovermode='x unified',
             margin=dict(b=100),  # Ajouter de l'espace en bas du graphique pour le titre
             annotations=[{
                 'x': 0.5,
                 'y': -0.25,  # Placer le titre sous l'axe des dates, plus bas
                 'xref': 'paper',
                 'yref': 'paper',
-                'text': f"Lump Sum vs DCA (Premier Actif)",
+                'text': f"Lump Sum vs DCA ({r.symbole})",
                 'showarrow': False,
                 'font': {'size': 12, 'weight': 'bold', 'color': 'black'},  # Titre en gras et noir
                 'align': 'center',
             }]
         )
-
-        fig = go.Figure(data=[trace1, trace2], layout=layout)
-        st.plotly_chart(fig, key="graph_actif_unique")
-
-    # Deuxième actif : Lump Sum vs DCA
-    with col2:
-        trace1 = go.Scatter(
-            x=donnees_autre.index, 
-            y=montant_initial * donnees_autre['Rendement Cumulé'], 
-            mode='lines',  
-            name='Lump Sum', 
-            line=dict(color='blue', width=1),  
-            hovertext=(montant_initial * donnees_autre['Rendement Cumulé']).round(2),  # Affichage des montants au survol
-            hoverinfo='text'
+        return go.Figure(data=[trace1, trace2], layout=layout)
+
+    # Comparaison des stratégies Lump Sum et DCA pour chaque actif
+    titre_section("Comparaison des stratégies d'investissement : Lump Sum vs DCA")
+    for cellule, position, r in grille(resultats):
+        with cellule:
+            st.plotly_chart(graphique_strategies(r), key=f"strategies_{r.symbole}")
+
+    profilage.etape("drawdowns")
+    # Drawdowns : courbe sous l'eau et principales baisses de chaque stratégie, calculées sur la
+    # matrice de toutes les séries de valeurs (la courbe Lump Sum suit exactement le prix de l'actif)
+    series_drawdowns = {}
+    for r in resultats:
+        series_drawdowns[(r.symbole, "Lump Sum")] = r.valeur_lump_sum
+        series_drawdowns[(r.symbole, f"DCA ({frequence_contributions})")] = r.dca['Valeur Portefeuille DCA']
+    matrice_drawdowns = analyses.drawdowns(pd.DataFrame(series_drawdowns))
+
+    titre_section("Drawdowns : baisses depuis le plus haut et temps de reprise")
+    for cellule, position, r in grille(resultats):
+        with cellule:
+            fig = go.Figure(data=[
+                go.Scatter(
+                    x=matrice_drawdowns.index,
+                    y=matrice_drawdowns[(r.symbole, serie)],
+                    mode='lines',
+                    name=serie,
+                    fill='tozeroy',
+                    connectgaps=True,
+                    line=dict(color=couleur, width=1),
+                )
+                for serie, couleur in (("Lump Sum", 'blue'), (f"DCA ({frequence_contributions})", 'green'))
+            ])
+            fig.update_layout(
+                xaxis=dict(title='Date'),
+                yaxis=dict(title='Drawdown', tickformat='.0%'),
+                hovermode='x unified',
+                margin=dict(b=100),
+                annotations=[{
+                    'x': 0.5,
+                    'y': -0.25,
+                    'xref': 'paper',
+                    'yref': 'paper',
+                    'text': f"Courbe sous l'eau ({r.symbole})",
+                    'showarrow': False,
+                    'font': {'size': 12, 'weight': 'bold', 'color': 'black'},
+                    'align': 'center',
+                }]
+            )
+            st.plotly_chart(fig, key=f"drawdowns_{r.symbole}")
+
+    tableau_baisses = analyses.tableau_drawdowns(matrice_drawdowns, NOMBRE_DRAWDOWNS)
+    if not tableau_baisses.empty:
+        st.markdown(f"<h6 style='color: black;'>Les {NOMBRE_DRAWDOWNS} plus fortes baisses de chaque stratégie</h6>", unsafe_allow_html=True)
+        st.dataframe(tableau_baisses.style.format({
+            'Profondeur': "{:.1%}",
+            'Début': lambda d: d.strftime('%d/%m/%Y'),
+            'Creux': lambda d: d.strftime('%d/%m/%Y'),
+            'Reprise': lambda d: d.strftime('%d/%m/%Y') if pd.notna(d) else "Non atteinte",
+        }))
+        st.caption("Début : plus haut précédant la baisse. Durée : jours calendaires entre ce plus haut et la reprise "
+                   "(ou la dernière date disponible si la reprise n'est pas atteinte). "
+                   "La valeur DCA inclut les contributions versées, qui atténuent les baisses.")
+
+
+    profilage.etape("tableau_resultats")
+    # Style personnalisé pour l'en-tête bleu
+    def header_style():
+        return [
+            {'selector': 'thead th', 'props': [('background-color', '#0073E6'),
+                                               ('color', 'white'),
+                                               ('font-weight', 'bold'),
+                                               ('text-align', 'center')]},
+        ]
+
+    # Fonction pour appliquer la couleur aux gains/pertes
+    def highlight_table(valeur):
+        if isinstance(valeur, str):  # Garder les colonnes textuelles neutres
+            return ''
+        elif valeur < 0:  # Couleur rouge pour les pertes
+            return 'color: red; font-weight: bold;'
+        else:  # Couleur verte pour les gains
+            return 'color: green; font-weight: bold;'
+
+    # Fonction pour préparer le tableau à afficher
+    def prepare_table(tableau):
+        tableau_transpose = tableau.T
+        tableau_transpose.columns = tableau_transpose.iloc[0]  # Prendre la première ligne comme en-têtes
+        tableau_transpose = tableau_transpose[1:]  # Supprimer l'ancienne ligne des en-têtes
+        styled_table = (
+            tableau_transpose.style
+            .applymap(highlight_table)  # Mise en forme des gains/pertes
+            .set_table_styles(header_style())  # Style de l'en-tête en bleu
+            .format({
+                f"Montant Initial ({symbole_devise})": "{:.2f}",
+                f"Montant Final ({symbole_devise})": "{:.2f}",
+                f"Gains Réalisés ({symbole_devise})": "{:.2f}",
+                "Rendement Annuel Moyen (%)": "{:.2f} %",
+                f"Moyenne Contributions ({symbole_devise})": "{:.2f}"
+            })
         )
-
-        trace2 = go.Scatter(
-            x=dca_df_autre.index, 
-            y=dca_df_autre['Valeur Portefeuille DCA'], 
-            mode='lines',  
-            name=f'DCA {frequence_contributions}', 
-            line=dict(color='green', width=1), 
-            hovertext=dca_df_autre['Valeur Portefeuille DCA'].round(2),  # Affichage des montants au survol
-            hoverinfo='text'
+        return styled_table
+
+    # Tableau comparatif des résultats pour chaque actif
+    for r in resultats:
+        titre_section(f"Tableau comparatif des résultats pour l'actif : {r.symbole}")
+        st.table(prepare_table(r.tableau_resultats))
+
+
+# Section « Scénarios et objectifs » : scénarios de crise, décumulation et objectif de capital
+def section_risques():
+    profilage.etape("scenarios_crise")
+    # Scénarios de crise : trajectoires historiques rejouées sur la valeur actuelle de chaque stratégie,
+    # en poursuivant le plan de contributions pour le DCA
+    positions_stress = []
+    for r in resultats:
+        source = r.symbole if source_scenarios == "Historique de chaque actif" else scenarios.SOURCE_DEFAUT
+        positions_stress.append(scenarios.Position(r.symbole, "Lump Sum", r.strategies['montant_final_lump_sum'], 0, 0, source))
+        positions_stress.append(scenarios.Position(
+            r.symbole, f"DCA ({frequence_contributions})", r.strategies['montant_final_dca'],
+            montant_contribution * pipeline.MOIS_PAR_PERIODE[frequence_contributions],
+            scenarios.JOURS_PAR_MOIS * pipeline.MOIS_PAR_PERIODE[frequence_contributions], source
+        ))
+    try:
+        tableau_stress = scenarios.stress_tests(positions_stress, devise_investisseur)
+    except Exception as e:
+        st.error(f"Erreur lors du calcul des scénarios de crise : {e}")
+        tableau_stress = pd.DataFrame()
+
+    titre_section("Scénarios de crise historiques")
+    if not tableau_stress.empty:
+        st.dataframe(tableau_stress.style.format({
+            'Valeur actuelle': "{:,.2f} " + symbole_devise,
+            'Contributions versées': "{:,.2f} " + symbole_devise,
+            'Valeur au creux': "{:,.2f} " + symbole_devise,
+            'Valeur finale': "{:,.2f} " + symbole_devise,
+            'Perte maximale': "{:.1%}",
+            'Variation finale': "{:.1%}"
+        }))
+        st.caption("Perte maximale : plus forte baisse de la valeur par rapport au capital investi (valeur actuelle et contributions versées) pendant le scénario. "
+                   "Variation finale : écart entre la valeur en fin de scénario et ce capital.")
+    else:
+        st.warning("Les trajectoires historiques ne sont pas disponibles pour évaluer les scénarios de crise.")
+
+
+    profilage.etape("decumulation")
+    # Décumulation : retraits mensuels indexés sur l'inflation, frais de gestion déduits chaque mois
+    titre_section("Décumulation : retraits périodiques et taux de retrait soutenable")
+    lignes_decumulation = []
+    simulations_decumulation = []
+    for r in resultats:
+        simulation = decumulation.simuler(
+            r.pyramide['Mensuelle'], montant_initial, taux_retrait, inflation, horizon_retraits,
+            probabilite_cible, nombre_chemins, frais_gestion / 100
         )
-
-        layout = go.Layout(
-            xaxis=dict(title='Date'),
-            yaxis=dict(title="Valeur du Portefeuille (€)"),
-            hovermode='x unified',  
-            margin=dict(b=100),  # Ajouter de l'espace en bas du graphique pour le titre
-            annotations=[{
-                'x': 0.5,
-                'y': -0.25,  # Placer le titre sous l'axe des dates, plus bas
-                'xref': 'paper',
-                'yref': 'paper',
-                'text': f"Lump Sum vs DCA (Deuxième Actif)",
-                'showarrow': False,
-                'font': {'size': 12, 'weight': 'bold', 'color': 'black'},  # Titre en gras et noir
-                'align': 'center',
-            }]
+        if simulation is None:
+            st.warning(f"Historique trop court pour simuler des retraits sur {r.symbole} (au moins 12 mois de données).")
+            continue
+        simulations_decumulation.append((r, simulation))
+        for methode, resultat in simulation.items():
+            lignes_decumulation.append({
+                'Actif': r.symbole,
+                'Méthode': methode,
+                'Chemins': resultat['chemins'],
+                f"Taux soutenable ({probabilite_cible:.0%})": resultat['taux_soutenable'],
+                f"Retrait annuel soutenable ({symbole_devise})": resultat['taux_soutenable'] * montant_initial,
+                f"Succès à {taux_retrait:.2%}": resultat['probabilite_succes'],
+            })
+
+    if lignes_decumulation:
+        st.dataframe(pd.DataFrame(lignes_decumulation).set_index(['Actif', 'Méthode']).style.format({
+            f"Taux soutenable ({probabilite_cible:.0%})": "{:.2%}",
+            f"Retrait annuel soutenable ({symbole_devise})": "{:,.2f} " + symbole_devise,
+            f"Succès à {taux_retrait:.2%}": "{:.1%}"
+        }))
+        st.caption("Fenêtres historiques : une trajectoire par mois de départ, l'historique étant parcouru de façon circulaire s'il est plus court que la durée des retraits. "
+                   "Bootstrap : trajectoires construites à partir de blocs de 12 mois tirés au hasard.")
+
+        # Évolution du capital au taux choisi : médiane et intervalle 5 % - 95 % des chemins bootstrap
+        for cellule, position, (r, simulation) in grille(simulations_decumulation):
+            with cellule:
+                centiles = simulation['Bootstrap']['centiles']
+                annees = np.arange(1, centiles.shape[1] + 1) / decumulation.PERIODES_PAR_AN
+                fig = go.Figure(data=[
+                    go.Scatter(x=annees, y=centiles[2], mode='lines', name='95e centile', line=dict(color='lightgray', width=1)),
+                    go.Scatter(x=annees, y=centiles[0], mode='lines', name='5e centile', line=dict(color='lightgray', width=1),
+                               fill='tonexty', fillcolor='rgba(0, 115, 230, 0.15)'),
+                    go.Scatter(x=annees, y=centiles[1], mode='lines', name='Médiane', line=dict(color=couleur_actif(position), width=2)),
+                ])
+                fig.update_layout(
+                    xaxis=dict(title='Années de retraits'),
+                    yaxis=dict(title=f"Capital restant ({symbole_devise})"),
+                    hovermode='x unified',
+                    margin=dict(b=100),
+                    annotations=[{
+                        'x': 0.5,
+                        'y': -0.25,
+                        'xref': 'paper',
+                        'yref': 'paper',
+                        'text': f"Capital restant avec un retrait de {taux_retrait:.2%} par an ({r.symbole})",
+                        'showarrow': False,
+                        'font': {'size': 12, 'weight': 'bold', 'color': 'black'},
+                        'align': 'center',
+                    }]
+                )
+                st.plotly_chart(fig, key=f"decumulation_{r.symbole}")
+
+
+    profilage.etape("objectif")
+    # Objectif de capital, résolu sur des chemins bootstrap avec le plan de contributions choisi
+    titre_section(f"Objectif de capital : {capital_cible:,.0f} {symbole_devise} en {horizon_objectif} ans")
+    lignes_objectif = []
+    for r in resultats:
+        solution = objectif.resoudre(
+            r.pyramide['Mensuelle'], capital_cible, horizon_objectif, confiance_objectif, montant_initial,
+            montant_contribution, pipeline.MOIS_PAR_PERIODE[frequence_contributions], nombre_chemins, frais_gestion / 100
         )
-
-        fig = go.Figure(data=[trace1, trace2], layout=layout)
-        st.plotly_chart(fig, key="graph_actif_secondaire")
-
-else:
-    # Si aucun deuxième actif n'est saisi, afficher uniquement le premier graphique
-    trace1 = go.Scatter(
-        x=donnees.index, 
-        y=donnees['Valeur Lump Sum'], 
-        mode='lines',  
-        name='Lump Sum', 
-        line=dict(color='blue', width=1),  
-        hovertext=donnees['Valeur Lump Sum'].round(2),  # Affichage des montants au survol
-        hoverinfo='text'
-    )
-
-    trace2 = go.Scatter(
-        x=dca_df.index, 
-        y=dca_df['Valeur Portefeuille DCA'], 
-        mode='lines',  
-        name=f'DCA {frequence_contributions}', 
-        line=dict(color='green', width=1), 
-        hovertext=dca_df['Valeur Portefeuille DCA'].round(2),  # Affichage des montants au survol
-        hoverinfo='text'
-    )
-
-    layout = go.Layout(
-        xaxis=dict(title='Date'),
-        yaxis=dict(title="Valeur du Portefeuille (€)"),
-        hovermode='x unified',  
-        margin=dict(b=100),  # Ajouter de l'espace en bas du graphique pour le titre
-        annotations=[{
-            'x': 0.5,
-            'y': -0.25,  # Placer le titre sous l'axe des dates, plus bas
-            'xref': 'paper',
-            'yref': 'paper',
-            'text': f"Lump Sum vs DCA (Premier Actif)",
-            'showarrow': False,
-            'font': {'size': 12, 'weight': 'bold', 'color': 'black'},  # Titre en gras et noir
-            'align': 'center',
-        }]
-    )
-
-    fig = go.Figure(data=[trace1, trace2], layout=layout)
-    st.plotly_chart(fig, key="graph_actif_unique")
-
-# Calcul des résultats pour le premier actif
-montant_final_lump_sum = donnees['Valeur Lump Sum'].iloc[-1]
-montant_final_dca = dca_df['Valeur Portefeuille DCA'].iloc[-1]
-gain_realise_lump_sum = montant_final_lump_sum - montant_initial
-gain_realise_dca = montant_final_dca - montant_initial
-
-# Calcul du rendement et des autres métriques pour le premier actif
-duree_investissement = (donnees.index[-1] - donnees.index[0]).days / 365
-
-# Calcul du rendement annuel moyen (CAGR)
-cagr_lump_sum = ((montant_final_lump_sum / montant_initial) ** (1 / duree_investissement) - 1) * 100
-cagr_dca = ((montant_final_dca / montant_initial) ** (1 / duree_investissement) - 1) * 100
-
-# Moyenne des Contributions pour DCA
-moyenne_contributions_dca = montant_contribution * (12 if frequence_contributions == "Mensuelle" else 1)
-
-# Tableau comparatif pour le premier actif
-tableau_resultats = pd.DataFrame({
-    "Métrique/Stratégie": ["Lump Sum", f"DCA ({frequence_contributions})"],
-    "Montant Initial (€)": [montant_initial, montant_initial],
-    "Montant Final (€)": [montant_final_lump_sum, montant_final_dca],
-    "Gains Réalisés (€)": [gain_realise_lump_sum, gain_realise_dca],
-    "Rendement Annuel Moyen (%)": [cagr_lump_sum, cagr_dca],
-    "Moyenne Contributions (€)": ["N/A", moyenne_contributions_dca]
-})
-
-# Style personnalisé pour l'en-tête bleu
-def header_style():
-    return [
-        {'selector': 'thead th', 'props': [('background-color', '#0073E6'),
-                                           ('color', 'white'),
-                                           ('font-weight', 'bold'),
-                                           ('text-align', 'center')]},
-    ]
-
-# Fonction pour appliquer la couleur aux gains/pertes
-def highlight_table(valeur):
-    if isinstance(valeur, str):  # Garder les colonnes textuelles neutres
-        return ''
-    elif valeur < 0:  # Couleur rouge pour les pertes
-        return 'color: red; font-weight: bold;'
-    else:  # Couleur verte pour les gains
-        return 'color: green; font-weight: bold;'
-
-# Fonction pour préparer le tableau à afficher
-def prepare_table(tableau):
-    tableau_transpose = tableau.T
-    tableau_transpose.columns = tableau_transpose.iloc[0]  # Prendre la première ligne comme en-têtes
-    tableau_transpose = tableau_transpose[1:]  # Supprimer l'ancienne ligne des en-têtes
-    styled_table = (
-        tableau_transpose.style
-        .applymap(highlight_table)  # Mise en forme des gains/pertes
-        .set_table_styles(header_style())  # Style de l'en-tête en bleu
-        .format({
-            "Montant Initial (€)": "{:.2f}",
-            "Montant Final (€)": "{:.2f}",
-            "Gains Réalisés (€)": "{:.2f}",
-            "Rendement Annuel Moyen (%)": "{:.2f} %",
-            "Moyenne Contributions (€)": "{:.2f}"
+        if solution is None:
+            st.warning(f"Historique trop court pour résoudre l'objectif sur {r.symbole} (au moins 12 mois de données).")
+            continue
+        lignes_objectif.append({
+            'Actif': r.symbole,
+            'Probabilité avec les paramètres actuels': solution['probabilite'],
+            f"Contribution mensuelle requise ({symbole_devise})": solution['contribution'],
+            f"Montant initial requis ({symbole_devise})": solution['montant_initial'],
+            'Horizon requis (années)': solution['horizon_annees'],
         })
-    )
-    return styled_table
 
-actif = actif.upper()
-# Affichage du tableau pour le premier actif
-styled_table = prepare_table(tableau_resultats)
-st.markdown(f"""
-    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Tableau comparatif des résultats pour le premier actif : {actif}</h3>
-    </div>
-""", unsafe_allow_html=True)
-st.table(styled_table)
-
-
-def calcul_dca(donnees, montant_contribution, frequence_contributions):
-    # Déterminer l'intervalle en jours en fonction de la fréquence des contributions
-    intervalle_contributions = {
-        "Mensuelle": 30,
-        "Trimestrielle": 90,
-        "Semestrielle": 180,
-        "Annuelle": 365
-    }.get(frequence_contributions, 30)
-
-    portefeuille = 0
-    valeurs_portefeuille = []
-
-    # Calculer la valeur du portefeuille en fonction de la fréquence des contributions
-    for i, prix in enumerate(donnees['Adj Close'].values):  # On utilise `.values` pour travailler avec des nombres
-        if i % intervalle_contributions == 0:
-            portefeuille += montant_contribution / prix  # Achat d'actifs à chaque contribution
-        valeurs_portefeuille.append(portefeuille * prix)  # Calcul de la valeur du portefeuille à cette date
-
-    donnees['Valeur Portefeuille DCA'] = valeurs_portefeuille
-    return donnees
-
-
-# Si 'autre_actif' est défini
-if autre_actif:
-    if actif.lower() == autre_actif.lower():
-        # Si les deux symboles sont identiques, utiliser une copie des données du premier actif
-        donnees_2 = donnees.copy()
-
-        # Préparer et afficher directement le tableau pour le premier actif (pas de recalcul pour le deuxième actif)
-        tableau_resultats_2 = tableau_resultats  # Supposons qu'on a déjà calculé 'tableau_resultats' pour le premier actif
-
-        actif = actif.upper()
-        # Préparer et afficher le tableau stylisé pour le premier actif
-        styled_table_2 = prepare_table(tableau_resultats_2)
-        st.markdown(f"""
-            <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-                <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Tableau comparatif des résultats pour le premier actif : {actif}</h3>
-            </div>
-        """, unsafe_allow_html=True)
-        
-        st.table(styled_table_2)
+    if lignes_objectif:
+        st.dataframe(pd.DataFrame(lignes_objectif).set_index('Actif').style.format({
+            'Probabilité avec les paramètres actuels': "{:.1%}",
+            f"Contribution mensuelle requise ({symbole_devise})": "{:,.2f} " + symbole_devise,
+            f"Montant initial requis ({symbole_devise})": "{:,.2f} " + symbole_devise,
+            'Horizon requis (années)': "{:.1f}"
+        }, na_rep=f"> {objectif.HORIZON_MAX_ANNEES}"))
+        st.caption(f"Chaque valeur est calculée en gardant les autres paramètres de la barre latérale, pour atteindre le capital visé dans {confiance_objectif:.0%} des chemins.")
+
+
+# Section « Prévision » : modèle de prévision au choix pour chaque actif
+def section_prevision():
+    profilage.etape("regression")
+    # Ajustements gardés en cache par (modèle, actif, données) : changer de modèle ne refait que les ajustements manquants
+    titre_section("Modèles de prévision des prix futurs")
+    modele = st.radio("Modèle de prévision", options=list(prevision.MODELES),
+                      index=index_option(list(prevision.MODELES), "modele", prevision.MODELE_DEFAUT),
+                      horizontal=True, key="modele_prevision")
+    if st.query_params.get("modele") != modele:
+        st.query_params["modele"] = modele
+    for cellule, position, r in grille(resultats):
+        with cellule:
+            # Prix réel, prix prédit et limites d'incertitude calculées au moment du tracé
+            ajustement = prevision.ajuster(modele, r.symbole, r.donnees['Prix Ajusté'])
+            fig = go.Figure(data=prevision.traces_prevision(r.donnees['Prix Ajusté'], ajustement))
+
+            # Titre sous le graphique
+            fig.update_layout(
+                xaxis=dict(title='Date'),
+                yaxis=dict(title="Prix Ajusté"),
+                hovermode='x unified',
+                margin=dict(b=150),  # Plus d'espace en bas
+                annotations=[{
+                    'x': 0.5,
+                    'y': -0.35,  # Placer le titre un peu plus bas sous l'axe des dates
+                    'xref': 'paper',
+                    'yref': 'paper',
+                    'text': f"Prévision {modele.lower()} ({r.symbole})",
+                    'showarrow': False,
+                    'font': {'size': 14, 'weight': 'bold', 'color': 'black'},  # Titre en gras et noir
+                    'align': 'center',
+                }]
+            )
 
-    else:
-        # Charger les données pour le deuxième actif uniquement si différent
-        donnees_2 = yf.download(autre_actif, start=date_debut, end=date_fin)
-        
-        # Vérifier que la colonne 'Adj Close' existe
-        if 'Adj Close' not in donnees_2.columns:
-            raise ValueError(f"La colonne 'Adj Close' est absente des données pour l'actif : {autre_actif}")
-
-        # Calculer 'Rendement Cumulé' et 'Valeur Lump Sum' pour le deuxième actif
-        donnees_2['Rendement Cumulé'] = (1 + donnees_2['Adj Close'].pct_change()).cumprod()
-        donnees_2['Valeur Lump Sum'] = montant_initial * donnees_2['Rendement Cumulé']
-        
-        # Calculer le portefeuille DCA pour le deuxième actif
-        donnees_2 = calcul_dca(donnees_2, montant_contribution, frequence_contributions)
-
-        # Calcul des résultats pour le deuxième actif
-        montant_final_lump_sum_2 = donnees_2['Valeur Lump Sum'].iloc[-1]
-        
-        # Correction de la dernière valeur du portefeuille DCA pour éviter les listes
-        montant_final_dca_2 = donnees_2['Valeur Portefeuille DCA'].iloc[-1] if isinstance(donnees_2['Valeur Portefeuille DCA'].iloc[-1], (int, float)) else donnees_2['Valeur Portefeuille DCA'].iloc[-1][0]
-
-        gain_realise_lump_sum_2 = montant_final_lump_sum_2 - montant_initial
-        gain_realise_dca_2 = montant_final_dca_2 - montant_initial
-
-        # Calcul du rendement annuel moyen (CAGR) pour le deuxième actif
-        duree_investissement_2 = (donnees_2.index[-1] - donnees_2.index[0]).days / 365
-        cagr_lump_sum_2 = ((montant_final_lump_sum_2 / montant_initial) ** (1 / duree_investissement_2) - 1) * 100
-        cagr_dca_2 = ((montant_final_dca_2 / montant_initial) ** (1 / duree_investissement_2) - 1) * 100
-
-        # Moyenne des Contributions pour DCA du deuxième actif
-        moyenne_contributions_dca_2 = montant_contribution * (12 if frequence_contributions == "Mensuelle" else 1)
-
-        # Tableau comparatif pour le deuxième actif
-        tableau_resultats_2 = pd.DataFrame({
-            "Métrique/Stratégie": ["Lump Sum", f"DCA ({frequence_contributions})"],
-            "Montant Initial (€)": [montant_initial, montant_initial],
-            "Montant Final (€)": [montant_final_lump_sum_2, montant_final_dca_2],
-            "Gains Réalisés (€)": [gain_realise_lump_sum_2, gain_realise_dca_2],
-            "Rendement Annuel Moyen (%)": [cagr_lump_sum_2, cagr_dca_2],
-            "Moyenne Contributions (€)": ["N/A", moyenne_contributions_dca_2]
-        })
+            st.plotly_chart(fig, use_container_width=True, key=f"regression_{r.symbole}")
 
-        autre_actif = autre_actif.upper()
-        # Préparer et afficher le tableau stylisé pour le deuxième actif
-        styled_table_2 = prepare_table(tableau_resultats_2)
-        st.markdown(f"""
-            <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-                <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Tableau comparatif des résultats pour le deuxième actif : {autre_actif}</h3>
-            </div>
-        """, unsafe_allow_html=True)
-        
-        st.table(styled_table_2)
-
-
-# Régression linéaire pour le premier actif
-donnees['Jours'] = (donnees.index - donnees.index[0]).days
-X = donnees['Jours'].values.reshape(-1, 1)
-y = donnees['Prix Ajusté'].values.reshape(-1, 1)
-
-modele = LinearRegression()
-modele.fit(X, y)
-
-# Prédictions et bandes d'incertitude pour le premier actif
-donnees['Prix Prévu'] = modele.predict(X)
-donnees['Résidus'] = donnees['Prix Ajusté'] - donnees['Prix Prévu']
-ecart_type_residus = donnees['Résidus'].std()
-
-for i in range(1, 4):  # ±1, ±2, ±3 écarts types
-    donnees[f'Limite Supérieure (±{i})'] = donnees['Prix Prévu'] + i * ecart_type_residus
-    donnees[f'Limite Inférieure (±{i})'] = donnees['Prix Prévu'] - i * ecart_type_residus
-
-jours_futurs = np.arange(donnees['Jours'].max() + 1, donnees['Jours'].max() + 181).reshape(-1, 1)
-previsions_futures = modele.predict(jours_futurs)
-dates_futures = pd.date_range(start=donnees.index[-1] + pd.Timedelta(days=1), periods=180, freq='D')
-donnees_futures = pd.DataFrame({
-    'Prix Prévu': previsions_futures.flatten(),
-    **{f'Limite Supérieure (±{i})': previsions_futures.flatten() + i * ecart_type_residus for i in range(1, 4)},
-    **{f'Limite Inférieure (±{i})': previsions_futures.flatten() - i * ecart_type_residus for i in range(1, 4)}
-}, index=dates_futures)
-
-donnees_total = pd.concat([donnees, donnees_futures])
-
-# Régression linéaire pour le deuxième actif (si saisi)
-if donnees_autre_actif is not None and not donnees_autre_actif.empty:
-    donnees_autre['Jours'] = (donnees_autre.index - donnees_autre.index[0]).days
-    X_autre = donnees_autre['Jours'].values.reshape(-1, 1)
-    y_autre = donnees_autre['Prix Ajusté'].values.reshape(-1, 1)
-
-    modele_autre = LinearRegression()
-    modele_autre.fit(X_autre, y_autre)
-
-    donnees_autre['Prix Prévu'] = modele_autre.predict(X_autre)
-    donnees_autre['Résidus'] = donnees_autre['Prix Ajusté'] - donnees_autre['Prix Prévu']
-    ecart_type_residus_autre = donnees_autre['Résidus'].std()
-
-    for i in range(1, 4):  # ±1, ±2, ±3 écarts types
-        donnees_autre[f'Limite Supérieure (±{i})'] = donnees_autre['Prix Prévu'] + i * ecart_type_residus_autre
-        donnees_autre[f'Limite Inférieure (±{i})'] = donnees_autre['Prix Prévu'] - i * ecart_type_residus_autre
-
-    jours_futurs_autre = np.arange(donnees_autre['Jours'].max() + 1, donnees_autre['Jours'].max() + 181).reshape(-1, 1)
-    previsions_futures_autre = modele_autre.predict(jours_futurs_autre)
-    dates_futures_autre = pd.date_range(start=donnees_autre.index[-1] + pd.Timedelta(days=1), periods=180, freq='D')
-    donnees_futures_autre = pd.DataFrame({
-        'Prix Prévu': previsions_futures_autre.flatten(),
-        **{f'Limite Supérieure (±{i})': previsions_futures_autre.flatten() + i * ecart_type_residus_autre for i in range(1, 4)},
-        **{f'Limite Inférieure (±{i})': previsions_futures_autre.flatten() - i * ecart_type_residus_autre for i in range(1, 4)}
-    }, index=dates_futures_autre)
-
-    donnees_total_autre = pd.concat([donnees_autre, donnees_futures_autre])
-
-    # Affichage des graphiques de régression linéaire
-    st.markdown("""
-    <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Régression linéaire pour prédire les rendements futurs</h3>
-    </div>
-""", unsafe_allow_html=True)
 
+# Section « Export » : données en colonnes et rapport PDF
+def section_export():
+    profilage.etape("export_donnees")
+    # Export des séries calculées en colonnes (Parquet, Arrow IPC ou CSV), préparé en mémoire à la demande
+    titre_section("Export des données")
     col1, col2 = st.columns(2)
-
-    # Premier actif
-    with col1:
-        trace1 = go.Scatter(
-            x=donnees_total.index, 
-            y=donnees_total['Prix Ajusté'], 
-            mode='lines',  
-            name='Prix réel', 
-            line=dict(color='blue', width=1),  
-            hovertext=donnees_total['Prix Ajusté'].round(2),  # Affichage des montants au survol
-            hoverinfo='text'
-        )
-
-        trace2 = go.Scatter(
-            x=donnees_total.index, 
-            y=donnees_total['Prix Prévu'], 
-            mode='lines',  
-            name='Prix prédit', 
-            line=dict(color='green', width=1), 
-            hovertext=donnees_total['Prix Prévu'].round(2),  # Affichage des montants au survol
-            hoverinfo='text'
+    table_export = col1.selectbox("Données à exporter", options=list(export.TABLES), index=0)
+    format_export = col2.selectbox("Format", options=list(export.FORMATS), index=0)
+    if st.button("Exporter les données"):
+        contenu, nom_fichier, type_mime = export.exporter(resultats, table_export, format_export)
+        st.download_button(
+            label=f"Télécharger {nom_fichier}",
+            data=contenu,
+            file_name=nom_fichier,
+            mime=type_mime
         )
 
-        # Ajouter les limites d'incertitude
-        traces_limites = []
-        for i, color in zip(range(1, 4), ['green', 'orange', 'red']):
-            trace3 = go.Scatter(
-                x=donnees_total.index, 
-                y=donnees_total[f'Limite Supérieure (±{i})'],
-                mode='lines',
-                line=dict(color=color, dash='dash'),
-                name=f'Limite Supérieure (±{i})',
-                hovertext=donnees_total[f'Limite Supérieure (±{i})'].round(2),  # Affichage des montants au survol
-                hoverinfo='text'
-            )
-
-            trace4 = go.Scatter(
-                x=donnees_total.index, 
-                y=donnees_total[f'Limite Inférieure (±{i})'],
-                mode='lines',
-                line=dict(color=color, dash='dash'),
-                name=f'Limite Inférieure (±{i})',
-                hovertext=donnees_total[f'Limite Inférieure (±{i})'].round(2),  # Affichage des montants au survol
-                hoverinfo='text'
+    profilage.etape("export_pdf")
+    if st.button("Exporter en PDF"):
+        pdf_path = rapport.creer_pdf(resultats, frequence_contributions)
+        with open(pdf_path, "rb") as file:
+            st.download_button(
+                label="Télécharger le rapport PDF",
+                data=file,
+                file_name="rapport_analyse.pdf",
+                mime="application/pdf"
             )
 
-            traces_limites.extend([trace3, trace4])
-
-        fig = go.Figure(data=[trace1, trace2] + traces_limites)
-
-        # Ajuster les annotations pour le titre sous le graphique (quand il y a 2 actifs)
-        fig.update_layout(
-            xaxis=dict(title='Date'),
-            yaxis=dict(title="Prix Ajusté"),
-            hovermode='x unified',  
-            margin=dict(b=150),  # Plus d'espace en bas
-            annotations=[{
-                'x': 0.5,
-                'y': -0.35,  # Placer le titre un peu plus bas sous l'axe des dates
-                'xref': 'paper',
-                'yref': 'paper',
-                'text': f"Régression linéaire ({actif.upper()})",
-                'showarrow': False,
-                'font': {'size': 14, 'weight': 'bold', 'color': 'black'},  # Titre en gras et noir
-                'align': 'center',
-            }]
-        )
-
-        st.plotly_chart(fig, use_container_width=True, key="graph_actif_unique_1")
+# Section « Criblage » : classement de tout l'univers du stockage local sur la période choisie
+def section_criblage():
+    profilage.etape("criblage")
+    titre_section("Criblage de l'univers")
+    univers = criblage.univers()
+    if not univers:
+        st.info("Le stockage local ne contient encore aucun historique quotidien : lancez le préchargement "
+                "(variable SIMULATEUR_PRECHARGEMENT ou `python prechargement.py`) pour constituer l'univers.")
+        return
+    st.caption(f"{len(univers)} actifs dans le stockage local, évalués sur la période, la devise, les montants "
+               "et la fréquence de contribution de la barre latérale (données quotidiennes).")
+    if st.button("Lancer le criblage"):
+        st.session_state["criblage_demande"] = True
+    if not st.session_state.get("criblage_demande"):
+        return
+
+    tableau = criblage.cribler(parametres._replace(intervalle="1d", taille_barres="1D"), univers)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    texte = col1.text_input("Symbole ou nom contient", value="")
+    cagr_minimal = col2.number_input("CAGR minimal (%)", value=-100.0, step=1.0)
+    sharpe_minimal = col3.number_input("Sharpe minimal", value=-5.0, step=0.1)
+    drawdown_maximal = col4.number_input("Drawdown maximal toléré (%)", min_value=0.0, max_value=100.0, value=100.0, step=5.0)
+    volatilite_maximale = col5.number_input("Volatilité maximale (%)", min_value=0.0, value=200.0, step=5.0)
+
+    filtre = ((tableau['CAGR (%)'] >= cagr_minimal) & (tableau['Ratio de Sharpe'] >= sharpe_minimal)
+              & (tableau['Drawdown maximal (%)'] >= -drawdown_maximal) & (tableau['Volatilité (%)'] <= volatilite_maximale))
+    if texte.strip():
+        motif = texte.strip().upper()
+        filtre &= tableau.index.str.contains(motif, regex=False) | tableau['Nom'].str.upper().str.contains(motif, regex=False)
+    selection = tableau[filtre]
+    st.write(f"{len(selection)} actifs sur {len(tableau)} (cliquer sur un en-tête de colonne pour trier).")
+    format_nombre = st.column_config.NumberColumn(format="%.2f")
+    st.dataframe(
+        selection,
+        use_container_width=True,
+        column_config={colonne: format_nombre for colonne in criblage.COLONNES[2:]}
+                      | {"Première date": st.column_config.DateColumn(format="DD/MM/YYYY")}
+    )
 
-    # Deuxième actif
-    with col2:
-        trace1 = go.Scatter(
-            x=donnees_total_autre.index, 
-            y=donnees_total_autre['Prix Ajusté'], 
-            mode='lines',  
-            name='Prix réel', 
-            line=dict(color='blue', width=1),  
-            hovertext=donnees_total_autre['Prix Ajusté'].round(2),  # Affichage des montants au survol
-            hoverinfo='text'
-        )
+# Sections détaillées : seule la section choisie est calculée et affichée. Elles tournent dans un
+# fragment : changer de section ou utiliser un widget d'une section ne réexécute que ce fragment.
+SECTIONS = {
+    "Distribution": section_distribution,
+    "Indices et corrélations": section_indices,
+    "Stratégies": section_strategies,
+    "Scénarios et objectifs": section_risques,
+    "Prévision": section_prevision,
+    "Export": section_export,
+    "Criblage": section_criblage,
+}
 
-        trace2 = go.Scatter(
-            x=donnees_total_autre.index, 
-            y=donnees_total_autre['Prix Prévu'], 
-            mode='lines',  
-            name='Prix prédit', 
-            line=dict(color='green', width=1), 
-            hovertext=donnees_total_autre['Prix Prévu'].round(2),  # Affichage des montants au survol
-            hoverinfo='text'
+@st.fragment
+def afficher_sections():
+    # Réexécution du fragment seul : elle est profilée comme une exécution à part entière
+    execution_fragment = not st.session_state.pop("execution_complete", False)
+    if execution_fragment:
+        profilage.debut_execution()
+    profilage.etape("sections")
+    choix = st.radio("Section", options=list(SECTIONS), index=index_option(list(SECTIONS), "section", "Distribution"),
+                     horizontal=True, key="section")
+    if st.query_params.get("section") != choix:
+        st.query_params["section"] = choix
+    SECTIONS[choix]()
+    if execution_fragment:
+        profilage.fin_execution()
+
+st.session_state["execution_complete"] = True
+afficher_sections()
+
+profilage.fin_execution()
+
+# Affichage du panneau de profilage dans la barre latérale
+if afficher_profilage:
+    with st.sidebar.expander("Profilage des étapes", expanded=True):
+        for titre, statistiques in (("Dernière exécution", profilage.statistiques_execution()),
+                                    ("Cumul depuis le démarrage", profilage.statistiques_cumulees())):
+            st.markdown(f"**{titre}**")
+            tableau_profilage = pd.DataFrame.from_dict(statistiques, orient='index')
+            if not tableau_profilage.empty:
+                tableau_profilage['duree_moyenne'] = tableau_profilage['duree_totale'] / tableau_profilage['appels'].where(tableau_profilage['appels'] > 0)
+                tableau_profilage = tableau_profilage.sort_values('duree_totale', ascending=False)
+            st.dataframe(tableau_profilage)
+        st.download_button(
+            label="Exporter le profilage (JSON)",
+            data=profilage.vers_json(),
+            file_name="profilage.json",
+            mime="application/json"
         )
-
-        # Ajouter les limites d'incertitude pour le deuxième actif
-        traces_limites = []
-        for i, color in zip(range(1, 4), ['green', 'orange', 'red']):
-            trace3 = go.Scatter(
-                x=donnees_total_autre.index, 
-                y=donnees_total_autre[f'Limite Supérieure (±{i})'],
-                mode='lines',
-                line=dict(color=color, dash='dash'),
-                name=f'Limite Supérieure (±{i})',
-                hovertext=donnees_total_autre[f'Limite Supérieure (±{i})'].round(2),  # Affichage des montants au survol
-                hoverinfo='text'
-            )
-
-            trace4 = go.Scatter(
-                x=donnees_total_autre.index, 
-                y=donnees_total_autre[f'Limite Inférieure (±{i})'],
-                mode='lines',
-                line=dict(color=color, dash='dash'),
-                name=f'Limite Inférieure (±{i})',
-                hovertext=donnees_total_autre[f'Limite Inférieure (±{i})'].round(2),  # Affichage des montants au survol
-                hoverinfo='text'
-            )
-
-            traces_limites.extend([trace3, trace4])
-
-        fig = go.Figure(data=[trace1, trace2] + traces_limites)
-
-        # Ajuster les annotations pour le titre sous le graphique
-        fig.update_layout(
-            xaxis=dict(title='Date'),
-            yaxis=dict(title="Prix Ajusté"),
-            hovermode='x unified',  
-            margin=dict(b=150),  # Plus d'espace en bas
-            annotations=[{
-                'x': 0.5,
-                'y': -0.35,  # Ajuster la position sous le graphique
-                'xref': 'paper',
-                'yref': 'paper',
-                'text': f"Régression linéaire ({autre_actif.upper()})",
-                'showarrow': False,
-                'font': {'size': 14, 'weight': 'bold', 'color': 'black'},  # Titre en gras et noir
-                'align': 'center',
-            }]
+        st.download_button(
+            label="Exporter le profilage (Prometheus)",
+            data=profilage.format_prometheus(),
+            file_name="metrics.prom",
+            mime="text/plain"
         )
 
-        st.plotly_chart(fig, use_container_width=True, key="graph_actif_unique_2")
 
-else:
-
-    # Si aucun deuxième actif n'est saisi, afficher uniquement le premier graphique
+# Tableau des ticks reçus par actif et erreur éventuelle de la source
+def afficher_suivi(flux_session):
     st.markdown("""
     <div style="border: 2px solid #A3A3A3; border-radius: 10px; padding: 10px 40px; margin-top: 30px; margin-bottom: 20px; background-color: #DCDCDC; display: inline-block;">
-        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Régression linéaire pour prédire les rendements futurs</h3>
+        <h3 style="color: #333333; font-weight: bold; margin: 0; text-align: center;">Suivi en temps réel</h3>
     </div>
 """, unsafe_allow_html=True)
-    
-    # Création des traces pour le premier actif
-    trace1 = go.Scatter(
-        x=donnees_total.index, 
-        y=donnees_total['Prix Ajusté'], 
-        mode='lines',  
-        name='Prix réel', 
-        line=dict(color='blue', width=1),  
-        hovertext=donnees_total['Prix Ajusté'].round(2),  # Affichage des montants au survol
-        hoverinfo='text'
-    )
-
-    trace2 = go.Scatter(
-        x=donnees_total.index, 
-        y=donnees_total['Prix Prévu'], 
-        mode='lines',  
-        name='Prix prédit', 
-        line=dict(color='green', width=1), 
-        hovertext=donnees_total['Prix Prévu'].round(2),  # Affichage des montants au survol
-        hoverinfo='text'
-    )
-
-    # Ajouter les limites d'incertitude
-    traces_limites = []
-    for i, color in zip(range(1, 4), ['green', 'orange', 'red']):
-        trace3 = go.Scatter(
-            x=donnees_total.index, 
-            y=donnees_total[f'Limite Supérieure (±{i})'],
-            mode='lines',
-            line=dict(color=color, dash='dash'),
-            name=f'Limite Supérieure (±{i})',
-            hovertext=donnees_total[f'Limite Supérieure (±{i})'].round(2),  # Affichage des montants au survol
-            hoverinfo='text'
-        )
-
-        trace4 = go.Scatter(
-            x=donnees_total.index, 
-            y=donnees_total[f'Limite Inférieure (±{i})'],
-            mode='lines',
-            line=dict(color=color, dash='dash'),
-            name=f'Limite Inférieure (±{i})',
-            hovertext=donnees_total[f'Limite Inférieure (±{i})'].round(2),  # Affichage des montants au survol
-            hoverinfo='text'
-        )
-
-        traces_limites.extend([trace3, trace4])
-
-    # Créer le graphique avec toutes les traces
-    fig = go.Figure(data=[trace1, trace2] + traces_limites)
-
-    fig.update_layout(
-        xaxis=dict(title='Date'),
-        yaxis=dict(title="Prix Ajusté"),
-        hovermode='x unified',  
-        margin=dict(b=150),  # Plus d'espace en bas
-        annotations=[{
-            'x': 0.5,
-            'y': -0.35,  # Placer le titre un peu plus bas sous l'axe des dates
-            'xref': 'paper',
-            'yref': 'paper',
-            'text': f"Régression linéaire ({actif.upper()})",
-            'showarrow': False,
-            'font': {'size': 14, 'weight': 'bold', 'color': 'black'},  # Titre en gras et noir
-            'align': 'center',
-        }]
-    )
-
-    # Afficher le graphique
-    st.plotly_chart(fig, use_container_width=True, key="graph_actif_unique_1")
-
-
-# Fonction pour définir le chemin de la police selon le système
-def get_font_path():
-    system = platform.system()
-    if system == 'Windows':
-        return r'C:\Windows\Fonts\arial.ttf'  # Windows
-    elif system == 'Darwin':  # macOS
-        return '/System/Library/Fonts/Supplemental/Arial.ttf'  # Utiliser Arial sur macOS
-    else:  # Linux
-        return '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'
-
-
-# Fonction pour créer un PDF
-def creer_pdf():
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-
-    # Déterminer le chemin de la police
-    font_path = get_font_path()  # Obtenir la police correcte pour chaque système
-
-    # Utiliser une police Unicode
-    pdf.add_font('Arial', '', font_path, uni=True)
-    pdf.set_font("Arial", size=12)
-
-    # Titre
-    pdf.cell(200, 10, txt="Rapport d'Analyse d'Investissement", ln=True, align='C')
-
-    # Ajouter un espace
-    pdf.ln(10)
-
-    # Vérification si le second actif est présent
-    if donnees_autre_actif is not None and not donnees_autre_actif.empty:
-        donnees_autre = donnees_autre_actif[['Adj Close']].copy()
-        donnees_autre.columns = ['Prix Ajusté']
-        donnees_autre['Rendement Quotidien'] = donnees_autre['Prix Ajusté'].pct_change()
-        donnees_autre['Rendement Cumulé'] = (1 + donnees_autre['Rendement Quotidien']).cumprod()
-
-        # Calcul des métriques pour le second actif
-        volatilite_autre = donnees_autre['Rendement Quotidien'].std() * np.sqrt(252)
-        rendement_autre = donnees_autre['Rendement Quotidien'].mean() * 252
-        ratio_sharpe_autre = (rendement_autre - taux_sans_risque) / volatilite_autre
-        valeur_initiale_autre = donnees_autre['Prix Ajusté'].iloc[0]
-        valeur_finale_autre = donnees_autre['Prix Ajusté'].iloc[-1]
-        rendement_total_autre = ((valeur_finale_autre - valeur_initiale_autre) / valeur_initiale_autre) * 100
-        cagr_autre = ((valeur_finale_autre / valeur_initiale_autre) ** (1 / nombre_annees) - 1) * 100
-    else:
-        donnees_autre = None  # Garantir que cette variable est définie
-        volatilite_autre = None  # Garantir que cette variable est définie
-
-    # Configuration du tableau
-    pdf.set_font("Arial", size=10)
-    pdf.set_fill_color(220, 220, 220)  # Couleur de fond pour l'en-tête
-    pdf.cell(50, 10, "Métriques", border=1, fill=True, align='C')
-    pdf.cell(50, 10, actif.upper(), border=1, fill=True, align='C')
-    if donnees_autre is not None and not donnees_autre.empty:
-        pdf.cell(50, 10, autre_actif.upper(), border=1, fill=True, align='C')
-    pdf.ln()
-
-    # Ajout des données dans le tableau
-    def add_row(label, value1, value2=None):
-        pdf.cell(50, 10, label, border=1, align='C')
-        pdf.cell(50, 10, f"{value1}", border=1, align='C')
-        if value2 is not None:
-            pdf.cell(50, 10, f"{value2}", border=1, align='C')
-        pdf.ln()
-
-    # Remplir le tableau avec les métriques
-    add_row("Volatilité des rendements", f"{volatilite_portefeuille:.2%}", f"{volatilite_autre:.2%}" if volatilite_autre else "-")
-    add_row("Ratio de Sharpe", f"{ratio_sharpe:.2f}", f"{ratio_sharpe_autre:.2f}" if ratio_sharpe_autre else "-")
-    add_row("Rendement total", f"{rendement_total:.2f}%", f"{rendement_total_autre:.2f}%" if rendement_total_autre else "-")
-    add_row("CAGR", f"{cagr:.2f}%", f"{cagr_autre:.2f}%" if cagr_autre else "-")
-
-    pdf.ln(10)
-
-    # Générer les graphiques pour les rendements
-    def create_histogram(data, title, file_name, color_positive="green", color_negative="red"):
-        rendements = data.dropna()
-        positif = rendements[rendements >= 0]
-        negatif = rendements[rendements < 0]
-
-        fig, ax = plt.subplots(figsize=(6, 4))
-        ax.hist(positif, bins=20, alpha=0.7, label='Positifs', color=color_positive, edgecolor='black')
-        ax.hist(negatif, bins=20, alpha=0.7, label='Négatifs', color=color_negative, edgecolor='black')
-        ax.set_title(title)
-        ax.set_xlabel("Rendement")
-        ax.set_ylabel("Fréquence")
-        ax.legend()
-
-        # Sauvegarder le graphique
-        file_path = os.path.join("graphs", file_name)
-        os.makedirs("graphs", exist_ok=True)
-        fig.savefig(file_path)
-        plt.close(fig)
-
-        return file_path
-
-    # Graphique pour le premier actif
-    actif_histogram = create_histogram(
-        donnees['Rendement Quotidien'],
-        f"Distribution des rendements ({actif.upper()})",
-        "actif_histogram.png"
-    )
-
-    # Ajouter l'image au PDF
-    pdf.image(actif_histogram, x=10, y=None, w=180)
-
-    if donnees_autre is not None and not donnees_autre.empty:
-        # Graphique pour le deuxième actif
-        autre_actif_histogram = create_histogram(
-            donnees_autre['Rendement Quotidien'],
-            f"Distribution des rendements ({autre_actif.upper()})",
-            "autre_actif_histogram.png"
-        )
-
-        # Ajouter l'image au PDF
-        pdf.image(autre_actif_histogram, x=10, y=None, w=180)
-
-    # Ajout du deuxième graphique
-    # Graphique de régression linéaire pour le premier actif
-    if donnees is not None:
-        fig2 = go.Figure()
-        fig2.add_trace(go.Scatter(
-            x=donnees_total.index, 
-            y=donnees_total['Prix Ajusté'], 
-            mode='lines', 
-            name='Prix réel', 
-            line=dict(color='blue', width=1)
-        ))
-        fig2.add_trace(go.Scatter(
-            x=donnees_total.index, 
-            y=donnees_total['Prix Prévu'], 
-            mode='lines', 
-            name='Prix prédit', 
-            line=dict(color='green', width=1)
+    if st.session_state["points_temps_reel"] is not None:
+        st.dataframe(pd.DataFrame.from_dict(
+            flux_session.instantane(), orient="index",
+            columns=["Ticks", "Dernier prix", "Rendement Cumulé", "Écart type par tick"]
         ))
-        for i, color in zip(range(1, 4), ['green', 'orange', 'red']):
-            fig2.add_trace(go.Scatter(
-                x=donnees_total.index, 
-                y=donnees_total[f'Limite Supérieure (±{i})'],
-                mode='lines',
-                line=dict(color=color, dash='dash'),
-                name=f'Limite Supérieure (±{i})'
-            ))
-            fig2.add_trace(go.Scatter(
-                x=donnees_total.index, 
-                y=donnees_total[f'Limite Inférieure (±{i})'],
-                mode='lines',
-                line=dict(color=color, dash='dash'),
-                name=f'Limite Inférieure (±{i})'
-            ))
-        fig2.update_layout(
-            title=f"Régression linéaire pour {actif.upper()}",
-            title_x=0.5
-        )
-        fig2_image_path = "regression_actif_1.png"
-        pio.write_image(fig2, fig2_image_path)
-        pdf.add_page()
-        pdf.image(fig2_image_path, x=10, y=30, w=180)
-
-    # Graphique de régression linéaire pour le deuxième actif (si présent)
-    if donnees_autre_actif is not None and not donnees_autre_actif.empty:
-        fig3 = go.Figure()
-        fig3.add_trace(go.Scatter(
-            x=donnees_total_autre.index, 
-            y=donnees_total_autre['Prix Ajusté'], 
-            mode='lines', 
-            name='Prix réel', 
-            line=dict(color='blue', width=1)
-        ))
-        fig3.add_trace(go.Scatter(
-            x=donnees_total_autre.index, 
-            y=donnees_total_autre['Prix Prévu'], 
-            mode='lines', 
-            name='Prix prédit', 
-            line=dict(color='green', width=1)
-        ))
-        for i, color in zip(range(1, 4), ['green', 'orange', 'red']):
-            fig3.add_trace(go.Scatter(
-                x=donnees_total_autre.index, 
-                y=donnees_total_autre[f'Limite Supérieure (±{i})'],
-                mode='lines',
-                line=dict(color=color, dash='dash'),
-                name=f'Limite Supérieure (±{i})'
-            ))
-            fig3.add_trace(go.Scatter(
-                x=donnees_total_autre.index, 
-                y=donnees_total_autre[f'Limite Inférieure (±{i})'],
-                mode='lines',
-                line=dict(color=color, dash='dash'),
-                name=f'Limite Inférieure (±{i})'
-            ))
-        fig3.update_layout(
-            title=f"Régression linéaire pour {autre_actif.upper()}",
-            title_x=0.5
-        )
-        fig3_image_path = "regression_actif_2.png"
-        pio.write_image(fig3, fig3_image_path)
-        pdf.add_page()
-        pdf.image(fig3_image_path, x=10, y=30, w=180)
-
-    # Tracé du graphique pour l'évolution des valeurs des stratégies Lump Sum et DCA
-    fig2.add_trace(go.Scatter(
-        x=donnees.index,
-        y=donnees['Valeur Lump Sum'],
-        mode='lines',
-        name='Lump Sum',
-        line=dict(color='blue', width=1)
-    ))
-
-    fig2.add_trace(go.Scatter(
-        x=dca_df.index,
-        y=dca_df['Valeur Portefeuille DCA'],
-        mode='lines',
-        name='DCA',
-        line=dict(color='green', width=1)
-    ))
-
-    # Ajouter un titre au graphique
-    fig2.update_layout(
-        title=f"Comparaison Lump Sum vs DCA",
-        title_x=0.5  # Centrer le titre
-    )
-
-    # Enregistrer le deuxième graphique comme image
-    fig2_image_path = "graphique_comparaison_lumpsum_dca.png"
-    pio.write_image(fig2, fig2_image_path)
-
-    # Ajouter le deuxième graphique au PDF
-    pdf.add_page()
-    pdf.image(fig2_image_path, x=10, y=30, w=180)
-
-    # Sauvegarde temporaire du PDF
-    pdf_path = "rapport_analyse.pdf"
-    pdf.output(pdf_path)
-    return pdf_path
-
-
-# Bouton Streamlit pour exporter en PDF
-if st.button("Exporter en PDF"):
-    pdf_path = creer_pdf()
-    with open(pdf_path, "rb") as file:
-        st.download_button(
-            label="Télécharger le rapport PDF",
-            data=file,
-            file_name="rapport_analyse.pdf",
-            mime="application/pdf"
-        )
+    if flux_session.erreur is not None:
+        st.error(f"Flux de prix interrompu : {flux_session.erreur}")
+
+
+# Suivi en temps réel : toutes les 250 ms, le fragment seul est réexécuté ; il ajoute le lot de
+# ticks reçu au graphique des rendements cumulés et réécrit le tableau des métriques, sans
+# réexécuter le script. Une fois la source épuisée, une dernière réexécution complète arrête
+# le rafraîchissement périodique.
+@st.fragment(run_every=0.25)
+def suivi_temps_reel(graphique, emplacement_metriques):
+    flux_session = st.session_state["flux"]
+    derniers_rendements = st.session_state["derniers_rendements"]
+    sommets = st.session_state["sommets_temps_reel"]
+    epuise = not flux_session.actif
+
+    nouveaux = flux_session.lire_nouveaux()
+    if nouveaux:
+        # Points du lot reçu, au plus un par horodatage, dans le prolongement de l'historique
+        # et complétés par la dernière valeur connue des autres symboles
+        lot = pd.DataFrame(nouveaux, columns=["horodatage", "symbole", "rendement"])
+        lot = lot.pivot_table(index="horodatage", columns="symbole", values="rendement", aggfunc="last")
+        lot = lot * pd.Series({r.symbole: r.donnees['Rendement Cumulé'].iloc[-1] for r in resultats})[lot.columns]
+        lot = lot.reindex(columns=sorted(set(lot.columns) | set(derniers_rendements)))
+        lot.iloc[0] = lot.iloc[0].fillna(pd.Series(derniers_rendements, dtype=float))
+        lot = lot.ffill()
+        derniers_rendements.update(lot.iloc[-1].dropna().to_dict())
+        for r in resultats:
+            if r.symbole in lot:
+                sommets[r.symbole] = max(sommets.get(r.symbole, r.donnees['Rendement Cumulé'].max()), lot[r.symbole].max())
+        lot.index = pd.to_datetime(lot.index, unit="s")
+        lot.index.name = "Date"
+        points = st.session_state["points_temps_reel"]
+        points = lot if points is None else pd.concat([points, lot])
+        st.session_state["points_temps_reel"] = points.iloc[-POINTS_TEMPS_REEL:]
+        graphique.add_rows(lot)
+        emplacement_metriques.markdown(tableau_metriques(metriques_temps_reel()), unsafe_allow_html=True)
+
+    afficher_suivi(flux_session)
+
+    if epuise and not nouveaux:
+        st.session_state["flux_termine"] = True
+        st.rerun()
+
+
+if mode_temps_reel:
+    if st.session_state["flux_termine"]:
+        afficher_suivi(st.session_state["flux"])
+    else:
+        suivi_temps_reel(graphique_temps_reel, emplacement_metriques)
@@ -0,0 +1,244 @@
+# Flux de prix en temps réel : sources de ticks interchangeables (fichier de rejeu, socket),
+# consommées par une tâche asyncio qui met à jour des statistiques incrémentales.
+#
+# Serveur de rejeu autonome (remplaçant d'un vrai flux de marché) :
+#     python flux.py serveur rejeu.csv --port 8765 --vitesse 500
+# Fichier de rejeu construit à partir du stockage local :
+#     python flux.py generer rejeu.csv AAPL MSFT --intervalle 1m
+import argparse
+import asyncio
+import csv
+import heapq
+import json
+import math
+import threading
+import time
+from collections import deque, namedtuple
+
+import stockage
+
+Tick = namedtuple('Tick', ['symbole', 'horodatage', 'prix'])
+
+
+def _lire_ligne(ligne):
+    ligne = ligne.strip()
+    if not ligne:
+        return None
+    if ligne.startswith('{'):
+        donnees = json.loads(ligne)
+        return Tick(donnees['symbole'].upper(), float(donnees['horodatage']), float(donnees['prix']))
+    symbole, horodatage, prix = ligne.split(',')[:3]
+    if symbole == 'symbole':  # En-tête CSV
+        return None
+    return Tick(symbole.upper(), float(horodatage), float(prix))
+
+
+# Source de rejeu : fichier CSV "symbole,horodatage,prix" diffusé à `vitesse` ticks par seconde
+class SourceRejeu:
+    def __init__(self, chemin, vitesse=200, boucler=False):
+        self.chemin = chemin
+        self.vitesse = vitesse
+        self.boucler = boucler
+
+    async def ticks(self):
+        while True:
+            debut = time.perf_counter()
+            emis = 0
+            with open(self.chemin, encoding='utf-8') as fichier:
+                for ligne in fichier:
+                    tick = _lire_ligne(ligne)
+                    if tick is None:
+                        continue
+                    yield tick
+                    emis += 1
+                    # Cadencement : on ne rend la main qu'une fois en avance sur le rythme visé
+                    avance = emis / self.vitesse - (time.perf_counter() - debut)
+                    if avance > 0.01:
+                        await asyncio.sleep(avance)
+            if not self.boucler:
+                return
+
+
+# Source socket : lignes CSV ou JSON reçues d'un serveur TCP (par exemple `python flux.py serveur`)
+class SourceSocket:
+    def __init__(self, hote='127.0.0.1', port=8765):
+        self.hote = hote
+        self.port = port
+
+    async def ticks(self):
+        lecteur, ecrivain = await asyncio.open_connection(self.hote, self.port)
+        try:
+            while True:
+                ligne = await lecteur.readline()
+                if not ligne:
+                    return
+                tick = _lire_ligne(ligne.decode('utf-8'))
+                if tick is not None:
+                    yield tick
+        finally:
+            ecrivain.close()
+
+
+# Statistiques mises à jour en O(1) à chaque tick (algorithme de Welford pour la variance)
+class StatistiquesIncrementales:
+    def __init__(self):
+        self.nombre_ticks = 0
+        self.premier_prix = None
+        self.dernier_prix = None
+        self.n_rendements = 0
+        self.moyenne = 0.0
+        self.m2 = 0.0
+
+    def ajouter(self, prix):
+        if self.dernier_prix is not None and self.dernier_prix > 0:
+            rendement = prix / self.dernier_prix - 1
+            self.n_rendements += 1
+            delta = rendement - self.moyenne
+            self.moyenne += delta / self.n_rendements
+            self.m2 += delta * (rendement - self.moyenne)
+        if self.premier_prix is None:
+            self.premier_prix = prix
+        self.dernier_prix = prix
+        self.nombre_ticks += 1
+
+    @property
+    def rendement_cumule(self):
+        return self.dernier_prix / self.premier_prix if self.premier_prix else float('nan')
+
+    @property
+    def ecart_type(self):
+        return math.sqrt(self.m2 / (self.n_rendements - 1)) if self.n_rendements > 1 else float('nan')
+
+
+# Consommation d'une source dans une boucle asyncio dédiée (thread d'arrière-plan) ;
+# l'interface relit périodiquement les nouveaux points sans relancer les calculs. Avec
+# `delai_abandon`, le flux s'arrête (et ferme sa source) s'il n'est plus lu pendant ce délai
+# en secondes, par exemple quand la session qui l'a démarré est fermée.
+class Flux:
+    def __init__(self, source, symboles=None, taille_tampon=100000, delai_abandon=None):
+        self.source = source
+        self.symboles = {s.upper() for s in symboles} if symboles else None
+        self.statistiques = {}
+        self.erreur = None
+        self.delai_abandon = delai_abandon
+        self.abandonne = False
+        self._derniere_lecture = time.monotonic()
+        self._verrou = threading.Lock()
+        # (horodatage, symbole, rendement cumulé) depuis la dernière lecture, borné si personne ne lit
+        self._nouveaux = deque(maxlen=taille_tampon)
+        self._boucle = None
+        self._tache = None
+        self._thread = None
+
+    def demarrer(self):
+        self._boucle = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._executer, daemon=True)
+        self._thread.start()
+        return self
+
+    def _executer(self):
+        asyncio.set_event_loop(self._boucle)
+        self._tache = self._boucle.create_task(self._consommer())
+        if self.delai_abandon is not None:
+            self._boucle.call_later(1, self._surveiller)
+        try:
+            self._boucle.run_until_complete(self._tache)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._boucle.close()
+
+    async def _consommer(self):
+        try:
+            async for tick in self.source.ticks():
+                if self.symboles is not None and tick.symbole not in self.symboles:
+                    continue
+                with self._verrou:
+                    statistiques = self.statistiques.get(tick.symbole)
+                    if statistiques is None:
+                        statistiques = self.statistiques[tick.symbole] = StatistiquesIncrementales()
+                    statistiques.ajouter(tick.prix)
+                    self._nouveaux.append((tick.horodatage, tick.symbole, statistiques.rendement_cumule))
+        except Exception as e:
+            self.erreur = e
+
+    # Vérification périodique du dernier accès : personne ne lit plus le flux, il est annulé
+    def _surveiller(self):
+        if time.monotonic() - self._derniere_lecture > self.delai_abandon:
+            self.abandonne = True
+            self._tache.cancel()
+        elif not self._tache.done():
+            self._boucle.call_later(1, self._surveiller)
+
+    def arreter(self):
+        if self._boucle is not None and self._tache is not None and not self._boucle.is_closed():
+            self._boucle.call_soon_threadsafe(self._tache.cancel)
+
+    @property
+    def actif(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # Points reçus depuis le dernier appel, vidés du tampon
+    def lire_nouveaux(self):
+        self._derniere_lecture = time.monotonic()
+        with self._verrou:
+            nouveaux = list(self._nouveaux)
+            self._nouveaux.clear()
+        return nouveaux
+
+    # Instantané des métriques : {symbole: (ticks, dernier prix, rendement cumulé, écart type par tick)}
+    def instantane(self):
+        with self._verrou:
+            return {s: (stat.nombre_ticks, stat.dernier_prix, stat.rendement_cumule, stat.ecart_type)
+                    for s, stat in self.statistiques.items()}
+
+
+# Serveur TCP qui diffuse un fichier de rejeu à chaque client connecté
+async def servir_rejeu(chemin, hote='127.0.0.1', port=8765, vitesse=200, boucler=True):
+    async def diffuser(lecteur, ecrivain):
+        try:
+            async for tick in SourceRejeu(chemin, vitesse, boucler).ticks():
+                ecrivain.write(f"{tick.symbole},{tick.horodatage},{tick.prix}\n".encode('utf-8'))
+                await ecrivain.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            ecrivain.close()
+
+    serveur = await asyncio.start_server(diffuser, hote, port)
+    async with serveur:
+        await serveur.serve_forever()
+
+
+# Fichier de rejeu fusionnant dans l'ordre chronologique les clôtures stockées de plusieurs symboles
+def generer_rejeu(chemin, symboles, intervalle='1m'):
+    def ticks(symbole):
+        for bloc in stockage.lire_par_blocs(symbole, intervalle, colonnes=['Close']):
+            for horodatage, prix in zip(bloc.index.asi8 / 1e9, bloc['Close'].to_numpy()):
+                yield horodatage, symbole, prix
+
+    with open(chemin, 'w', newline='', encoding='utf-8') as fichier:
+        ecrivain = csv.writer(fichier)
+        ecrivain.writerow(['symbole', 'horodatage', 'prix'])
+        for horodatage, symbole, prix in heapq.merge(*(ticks(s.upper()) for s in symboles)):
+            ecrivain.writerow([symbole, horodatage, prix])
+
+
+if __name__ == '__main__':
+    parseur = argparse.ArgumentParser(description="Outils de flux de prix en temps réel")
+    commandes = parseur.add_subparsers(dest='commande', required=True)
+    serveur = commandes.add_parser('serveur', help="Diffuser un fichier de rejeu sur un socket TCP")
+    serveur.add_argument('fichier')
+    serveur.add_argument('--hote', default='127.0.0.1')
+    serveur.add_argument('--port', type=int, default=8765)
+    serveur.add_argument('--vitesse', type=float, default=200, help="Ticks par seconde")
+    generer = commandes.add_parser('generer', help="Créer un fichier de rejeu depuis le stockage local")
+    generer.add_argument('fichier')
+    generer.add_argument('symboles', nargs='+')
+    generer.add_argument('--intervalle', default='1m')
+    arguments = parseur.parse_args()
+
+    if arguments.commande == 'serveur':
+        asyncio.run(servir_rejeu(arguments.fichier, arguments.hote, arguments.port, arguments.vitesse))
+    else:
+        generer_rejeu(arguments.fichier, arguments.symboles, arguments.intervalle)
@@ -0,0 +1,96 @@
+# Fournisseur de données hors ligne : remplaçant de yf.download qui produit des prix
+# synthétiques reproductibles et cohérents d'une requête à l'autre (un symbole a toujours le
+# même prix à la même date, quelle que soit la période demandée). Il sert aux tests de charge
+# et aux démonstrations sans réseau ; la sortie a la forme de celle de yfinance (colonnes
+# (Price, Ticker), heures de New York pour l'intrajournalier).
+#
+#     import hors_ligne
+#     hors_ligne.installer()  # yf.download est remplacé pour tout le processus
+import zlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import intraday
+
+ORIGINE = pd.Timestamp('1990-01-01')
+FIN = pd.Timestamp('2030-12-31')
+FUSEAU = 'America/New_York'
+
+
+def _graine(*elements):
+    return zlib.crc32('|'.join(map(str, elements)).encode('utf-8'))
+
+
+# Clôtures quotidiennes d'un symbole sur tout le calendrier ouvré : marche aléatoire
+# géométrique dont la dérive, la volatilité et le niveau dépendent du symbole
+@lru_cache(maxsize=4096)
+def clotures(symbole):
+    graine = _graine(symbole)
+    generateur = np.random.default_rng(graine)
+    calendrier = pd.bdate_range(ORIGINE, FIN)
+    if symbole.endswith('=X'):  # Paire de devises : niveau proche de 1, faible volatilité
+        niveau, derive, volatilite = 0.5 + (graine % 100) / 100, 0.0, 0.08
+    else:
+        niveau, derive, volatilite = 10 + graine % 300, 0.02 + (graine % 9) / 100, 0.15 + (graine % 30) / 100
+    rendements = generateur.normal(derive / intraday.JOURS_PAR_AN, volatilite / np.sqrt(intraday.JOURS_PAR_AN), len(calendrier))
+    return pd.Series(niveau * np.exp(np.cumsum(rendements)), index=calendrier)
+
+
+# Barres intrajournalières d'une séance : pont entre la clôture de la veille et celle du jour
+def _seance(symbole, jour, intervalle, ouverture, cloture):
+    pas = pd.Timedelta(intervalle.replace('m', 'min') if intervalle.endswith('m') else intervalle)
+    nombre = max(1, int(pd.Timedelta(minutes=intraday.MINUTES_PAR_SEANCE) / pas))
+    generateur = np.random.default_rng(_graine(symbole, jour.date(), intervalle))
+    marche = np.cumsum(generateur.normal(0.0, 0.001, nombre))
+    chemin = np.log(ouverture) + marche + (np.log(cloture / ouverture) - marche[-1]) * np.arange(1, nombre + 1) / nombre
+    index = jour + pd.Timedelta(hours=9, minutes=30) + pas * np.arange(nombre)
+    return pd.Series(np.exp(chemin), index=index)
+
+
+def _barres(symbole, debut, fin, intervalle):
+    if intervalle in ('1d', '1D'):
+        return clotures(symbole).loc[debut:fin - pd.Timedelta(days=1)]
+    quotidien = clotures(symbole)
+    positions = np.flatnonzero((quotidien.index >= debut.normalize()) & (quotidien.index < fin))
+    seances = [_seance(symbole, quotidien.index[i], intervalle, quotidien.iloc[max(i - 1, 0)], quotidien.iloc[i])
+               for i in positions]
+    if not seances:
+        return pd.Series(dtype='float64')
+    barres = pd.concat(seances)
+    barres = barres[(barres.index >= debut) & (barres.index < fin)]
+    return barres.tz_localize(FUSEAU)
+
+
+# Même signature utile que yf.download : symbole ou liste, début inclus, fin exclue
+def telecharger(symboles, start=None, end=None, interval='1d', auto_adjust=True, **options):
+    if isinstance(symboles, str):
+        symboles = symboles.replace(',', ' ').split()
+    debut = pd.Timestamp(start) if start is not None else ORIGINE
+    fin = pd.Timestamp(end) if end is not None else pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+    colonnes = {}
+    for symbole in symboles:
+        prix = _barres(symbole.upper(), debut, fin, interval)
+        if prix.empty:
+            continue
+        ecart = prix.to_numpy() * 0.005
+        valeurs = {'Close': prix.to_numpy(), 'High': prix.to_numpy() + ecart, 'Low': prix.to_numpy() - ecart,
+                   'Open': prix.to_numpy(), 'Volume': np.full(len(prix), 1e6)}
+        if not auto_adjust:
+            valeurs['Adj Close'] = prix.to_numpy()
+        for nom, colonne in valeurs.items():
+            colonnes[(nom, symbole)] = pd.Series(colonne, index=prix.index)
+    if not colonnes:
+        return pd.DataFrame()
+    donnees = pd.DataFrame(colonnes)
+    donnees.columns = pd.MultiIndex.from_tuples(donnees.columns, names=['Price', 'Ticker'])
+    return donnees
+
+
+# Remplacer yf.download pour tout le processus ; renvoie la fonction d'origine
+def installer():
+    origine = yf.download
+    yf.download = telecharger
+    return origine
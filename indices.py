@@ -0,0 +1,116 @@
+# Registre des indices de référence (benchmarks) et cache des indices de rendement
+# Les prix des composants proviennent du magasin de prix partagé (un téléchargement par
+# processus et par période), puis chaque indice est aligné sur le calendrier de l'actif
+# en une seule opération.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import devises
+import magasin
+import profilage
+
+# Nom affiché -> composition {symbole: poids}
+INDICES = {
+    'ACWI': {'ACWI': 1.0},
+    'S&P 500': {'SPY': 1.0},
+    'MSCI World': {'URTH': 1.0},
+}
+
+COULEURS_INDICES = ['orange', 'purple', 'brown', 'gray', 'olive', 'cyan']
+
+_verrou = threading.Lock()
+_cache_rendements = OrderedDict()  # (composition, devise, début, fin) -> pd.Series de l'indice de rendement
+
+
+# Normaliser une composition pour que la somme des poids vaille 1
+def normaliser_composition(nom, composition):
+    total = sum(composition.values())
+    if not composition or total <= 0:
+        raise ValueError(f"La composition de l'indice '{nom}' doit avoir des poids positifs.")
+    return {symbole.upper(): poids / total for symbole, poids in composition.items()}
+
+
+# Ajouter (ou remplacer) un indice dans le registre
+def enregistrer_indice(nom, composition):
+    INDICES[nom] = normaliser_composition(nom, composition)
+    return INDICES[nom]
+
+
+# Compositions des indices choisis ; un mélange personnalisé n'est pas ajouté au registre partagé
+def selection_indices(noms, composition_personnalisee=None, nom_personnalise='Personnalisé'):
+    selection = {nom: INDICES[nom] for nom in noms if nom in INDICES}
+    if nom_personnalise in noms and composition_personnalisee:
+        selection[nom_personnalise] = normaliser_composition(nom_personnalise, composition_personnalisee)
+    return selection
+
+
+# Lire une composition saisie sous la forme "ACWI:0.6, AGG:0.4"
+def lire_composition(texte):
+    composition = {}
+    for morceau in texte.split(','):
+        morceau = morceau.strip()
+        if not morceau:
+            continue
+        symbole, _, poids = morceau.partition(':')
+        composition[symbole.strip().upper()] = float(poids) if poids.strip() else 1.0
+    return composition
+
+
+def _cle_rendement(composition, devise, date_debut, date_fin):
+    return (tuple(sorted(composition.items())), devise, str(date_debut), str(date_fin))
+
+
+# Indice de rendement cumulé (base 1) d'une composition, exprimé dans la devise demandée
+# (None : devise de cotation des composants), calculé une fois par période
+def indice_rendement(nom, composition, date_debut, date_fin, devise=None):
+    cle = _cle_rendement(composition, devise, date_debut, date_fin)
+    with _verrou:
+        if cle in _cache_rendements:
+            profilage.enregistrer_cache('indices_rendement', True)
+            return _cache_rendements[cle]
+    profilage.enregistrer_cache('indices_rendement', False)
+
+    prix = pd.DataFrame(magasin.prix_ajustes(list(composition), date_debut, date_fin))
+    if prix.empty or prix.dropna(how='all').empty:
+        return None
+
+    # Mélange pondéré rééquilibré quotidiennement, sur le calendrier commun des composants
+    prix = prix.sort_index().ffill().dropna()
+    if devise is not None:
+        prix = devises.convertir_matrice(prix, {s: devises.devise_symbole(s) for s in prix.columns},
+                                         devise, date_debut, date_fin)
+    rendements = prix.pct_change().fillna(0.0).to_numpy()
+    poids = np.array([composition[s] for s in prix.columns])
+    serie = pd.Series(np.cumprod(1 + rendements @ poids), index=prix.index, name=nom)
+
+    with _verrou:
+        magasin.memoriser(_cache_rendements, cle, serie)
+    return serie
+
+
+# Indices de rendement de plusieurs indices {nom: composition} ;
+# tous les composants manquants sont téléchargés ensemble
+def indices_rendement(selection, date_debut, date_fin, devise=None):
+    with _verrou:
+        a_calculer = [c for c in selection.values()
+                      if _cle_rendement(c, devise, date_debut, date_fin) not in _cache_rendements]
+    symboles = sorted({s for composition in a_calculer for s in composition})
+    if symboles:
+        magasin.prix_ajustes(symboles, date_debut, date_fin)
+    series = {}
+    for nom, composition in selection.items():
+        serie = indice_rendement(nom, composition, date_debut, date_fin, devise)
+        if serie is not None:
+            series[nom] = serie
+    return pd.DataFrame(series)
+
+
+# Aligner les indices sur le calendrier d'un actif (dernière valeur connue) et les rebaser à 1
+def aligner(indices, calendrier):
+    if indices.empty:
+        return indices
+    alignes = indices.reindex(indices.index.union(calendrier)).ffill().reindex(calendrier)
+    return alignes / alignes.bfill().iloc[0]
@@ -0,0 +1,55 @@
+# Schéma canonique des données d'un actif
+# Toute sortie de fournisseur (yf.download quotidien ou intrajournalier, colonnes simples ou
+# (Price, Ticker), avec ou sans 'Adj Close') est ramenée une seule fois, à l'ingestion, à un
+# tableau compact : prix ajusté, rendement et rendement cumulé en float64 contigus, sur un index
+# de dates trié, sans fuseau ni doublon. Les étapes suivantes ne lisent que ces colonnes.
+import numpy as np
+import pandas as pd
+
+COLONNES = ['Prix Ajusté', 'Rendement Quotidien', 'Rendement Cumulé']
+
+
+# Colonne de prix à retenir : 'Adj Close' si le fournisseur la donne, sinon 'Close'
+# (les versions récentes de yfinance ajustent déjà 'Close' par défaut)
+def colonne_prix(colonnes):
+    niveau = colonnes.get_level_values(0) if isinstance(colonnes, pd.MultiIndex) else colonnes
+    for colonne in ('Adj Close', 'Close'):
+        if colonne in niveau:
+            return colonne
+    raise ValueError("Aucune colonne de prix ('Adj Close' ou 'Close') dans les données reçues.")
+
+
+# Index de dates trié, sans fuseau (heures locales de la place de cotation) et sans doublon
+def index_propre(donnees):
+    if not isinstance(donnees.index, pd.DatetimeIndex):
+        donnees = donnees.set_axis(pd.to_datetime(donnees.index), axis=0)
+    if donnees.index.tz is not None:
+        donnees = donnees.set_axis(donnees.index.tz_localize(None), axis=0)
+    donnees = donnees[~donnees.index.duplicated(keep='last')]
+    return donnees.sort_index()
+
+
+# Série des prix d'un symbole, quelle que soit la forme des colonnes reçues
+def serie_prix(donnees_brutes, symbole=None):
+    prix = donnees_brutes[colonne_prix(donnees_brutes.columns)]
+    if isinstance(prix, pd.DataFrame):
+        prix = prix[symbole] if symbole in prix.columns else prix.iloc[:, 0]
+    return index_propre(prix.astype('float64'))
+
+
+# Tableau canonique à partir d'une série de prix : les trous sont comblés par la dernière valeur
+# connue, les prix non positifs (erreurs du fournisseur) écartés
+def cadre_canonique(prix):
+    prix = prix.where(prix > 0).ffill().dropna()
+    if prix.empty:
+        raise ValueError("Données vides, symbole peut-être invalide.")
+    valeurs = np.ascontiguousarray(prix.to_numpy(dtype='float64'))
+    rendements = np.empty_like(valeurs)
+    rendements[0] = np.nan
+    np.divide(valeurs[1:], valeurs[:-1], out=rendements[1:])
+    rendements[1:] -= 1
+    return pd.DataFrame({
+        'Prix Ajusté': valeurs,
+        'Rendement Quotidien': rendements,
+        'Rendement Cumulé': valeurs / valeurs[0]
+    }, index=prix.index)
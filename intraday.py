@@ -0,0 +1,120 @@
+# Données intrajournalières : téléchargement par tranches, ajout au stockage local
+# et rééchantillonnage par blocs vers n'importe quelle taille de barre
+import pandas as pd
+import yfinance as yf
+
+import ingestion
+import profilage
+import stockage
+
+# Intervalle Yahoo Finance -> (durée maximale d'une requête, profondeur d'historique disponible)
+INTERVALLES = {
+    '1m': (pd.Timedelta(days=7), pd.Timedelta(days=30)),
+    '2m': (pd.Timedelta(days=15), pd.Timedelta(days=60)),
+    '5m': (pd.Timedelta(days=15), pd.Timedelta(days=60)),
+    '15m': (pd.Timedelta(days=30), pd.Timedelta(days=60)),
+    '30m': (pd.Timedelta(days=30), pd.Timedelta(days=60)),
+    '60m': (pd.Timedelta(days=90), pd.Timedelta(days=730)),
+    '1h': (pd.Timedelta(days=90), pd.Timedelta(days=730)),
+}
+
+# Tailles de barres proposées (règles pandas)
+TAILLES_BARRES = ['1min', '2min', '5min', '15min', '30min', '1h', '4h', '1D']
+
+# Agrégation des colonnes OHLCV lors du rééchantillonnage
+AGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+MINUTES_PAR_SEANCE = 390  # Séance américaine de 9h30 à 16h
+JOURS_PAR_AN = 252  # Séances par an, pour toutes les annualisations
+
+
+def est_intraday(intervalle):
+    return intervalle in INTERVALLES
+
+
+def duree_barre(intervalle):
+    return pd.Timedelta(intervalle.replace('m', 'min') if intervalle.endswith('m') else intervalle)
+
+
+# Nombre de périodes par an pour annualiser rendements et volatilités d'après la taille des barres
+def periodes_par_an(taille_barre, minutes_par_seance=MINUTES_PAR_SEANCE, jours_par_an=JOURS_PAR_AN):
+    duree = pd.Timedelta(taille_barre)
+    if duree >= pd.Timedelta(days=1):
+        return jours_par_an / (duree / pd.Timedelta(days=1))
+    return jours_par_an * max(1.0, minutes_par_seance / (duree / pd.Timedelta(minutes=1)))
+
+
+def _normaliser(donnees_brutes):
+    donnees = donnees_brutes
+    if isinstance(donnees.columns, pd.MultiIndex):
+        donnees = donnees.droplevel(1, axis=1)  # Colonnes (Price, Ticker) des versions récentes de yfinance
+    donnees = donnees[[c for c in AGREGATIONS if c in donnees.columns]].astype('float64')
+    # Heures locales de la place de cotation, sans fuseau, comme les données quotidiennes
+    return ingestion.index_propre(donnees)
+
+
+def _telecharger_tranche(symbole, intervalle, debut, fin):
+    with profilage.chronometre('yf.download'):
+        tranche = yf.download(symbole, start=debut, end=fin, interval=intervalle, progress=False, auto_adjust=False)
+    return None if tranche.empty else _normaliser(tranche)
+
+
+# Télécharger par tranches les parties manquantes de l'historique et les ajouter au stockage :
+# après la dernière barre stockée, et avant la première si la période commence plus tôt
+# (tranches prises à rebours, chacune passant en tête du stockage). Chaque tranche est écrite
+# dès sa réception, sans accumulation en mémoire.
+def ingerer(symbole, intervalle, date_debut, date_fin):
+    taille_tranche, profondeur = INTERVALLES[intervalle]
+    fin = min(pd.Timestamp(date_fin), pd.Timestamp.now().normalize() + pd.Timedelta(days=1))
+    debut = max(pd.Timestamp(date_debut), pd.Timestamp.now().normalize() - profondeur + pd.Timedelta(days=1))
+    premiere = stockage.premiere_date(symbole, intervalle)
+    derniere = stockage.derniere_date(symbole, intervalle)
+
+    lignes = 0
+    if premiere is not None:
+        # Historique antérieur manquant : au moins une séance ouvrée avant le premier jour stocké
+        anterieur = len(pd.bdate_range(debut, premiere.normalize() - pd.Timedelta(days=1))) > 0
+        profilage.enregistrer_cache('stockage_intraday', not anterieur and derniere >= fin - duree_barre(intervalle))
+        fin_tranche = min(premiere, fin)
+        while anterieur and debut < fin_tranche:
+            debut_tranche = max(fin_tranche - taille_tranche, debut)
+            lignes += stockage.ajouter_avant(symbole, intervalle,
+                                             _telecharger_tranche(symbole, intervalle, debut_tranche, fin_tranche))
+            fin_tranche = debut_tranche
+        debut = max(debut, derniere + duree_barre(intervalle))
+
+    while debut < fin:
+        fin_tranche = min(debut + taille_tranche, fin)
+        lignes += stockage.ajouter(symbole, intervalle, _telecharger_tranche(symbole, intervalle, debut, fin_tranche))
+        debut = fin_tranche
+    return lignes
+
+
+# Rééchantillonner des blocs successifs en conservant la barre incomplète d'un bloc à l'autre ;
+# l'origine des barres est fixe (epoch) pour que le découpage ne dépende pas des blocs
+def reechantillonner_par_blocs(blocs, taille_barre):
+    reste = None
+    for bloc in blocs:
+        if bloc.empty:
+            continue
+        if reste is not None:
+            bloc = pd.concat([reste, bloc])
+        barres = bloc.resample(taille_barre, origin='epoch').agg(AGREGATIONS).dropna(subset=['Close'])
+        if barres.empty:
+            reste = bloc
+            continue
+        reste = bloc[bloc.index >= barres.index[-1]]
+        if len(barres) > 1:
+            yield barres.iloc[:-1]
+    if reste is not None and not reste.empty:
+        yield reste.resample(taille_barre, origin='epoch').agg(AGREGATIONS).dropna(subset=['Close'])
+
+
+# Historique intrajournalier prêt à l'emploi : ingestion incrémentale puis lecture
+# rééchantillonnée par blocs (seules les barres de la taille demandée sont assemblées)
+@profilage.chronometrer('intraday')
+def charger(symbole, intervalle, date_debut, date_fin, taille_barre=None):
+    ingerer(symbole, intervalle, date_debut, date_fin)
+    blocs = stockage.lire_par_blocs(symbole, intervalle, date_debut, date_fin, colonnes=list(AGREGATIONS))
+    barres = list(reechantillonner_par_blocs(blocs, taille_barre or duree_barre(intervalle)))
+    return pd.concat(barres) if barres else pd.DataFrame(columns=list(AGREGATIONS))
@@ -0,0 +1,119 @@
+# Magasin de prix partagé par tout le processus
+# Les prix ajustés sont téléchargés une seule fois par symbole et par période : les symboles
+# manquants sont regroupés dans un seul appel à yf.download. Les symboles dont l'historique
+# quotidien complet est tenu à jour dans le stockage local (voir prechargement.py) y sont lus
+# sans téléchargement.
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import yfinance as yf
+
+import ingestion
+import profilage
+import stockage
+
+_TAILLE_MAX_CACHE = 512
+INTERVALLE_HISTORIQUE = '1d'
+# Origine de tout historique quotidien stocké : la première date stockée est celle de la
+# première cotation, ou cette origine pour les actifs plus anciens
+DEBUT_HISTORIQUE = pd.Timestamp(os.environ.get('SIMULATEUR_DEBUT_HISTORIQUE', '1990-01-01'))
+TOLERANCE_AJUSTEMENT = 1e-6
+_verrou = threading.Lock()
+_cache_prix = OrderedDict()  # (symbole, début, fin) -> pd.Series des prix ajustés
+
+
+def memoriser(cache, cle, valeur, taille_max=_TAILLE_MAX_CACHE):
+    cache[cle] = valeur
+    cache.move_to_end(cle)
+    while len(cache) > taille_max:
+        cache.popitem(last=False)
+
+
+def _extraire_prix(donnees_brutes, symboles):
+    prix = donnees_brutes[ingestion.colonne_prix(donnees_brutes.columns)]
+    if isinstance(prix, pd.Series):
+        prix = prix.to_frame(symboles[0])
+    return ingestion.index_propre(prix.astype('float64'))
+
+
+def _telecharger(symboles, debut, fin):
+    with profilage.chronometre('yf.download'):
+        donnees_brutes = yf.download(symboles, start=str(debut.date()), end=str(fin.date()), progress=False)
+    prix = _extraire_prix(donnees_brutes, symboles) if not donnees_brutes.empty else pd.DataFrame()
+    return {s: prix[s].dropna() if s in prix.columns else pd.Series(dtype='float64') for s in symboles}
+
+
+# Prix de la période [début, fin[ (fin exclue, comme pour yf.download) lus dans l'historique
+# stocké, s'il la couvre : sa dernière séance est la veille ouvrée de la fin, ou l'historique a
+# été vérifié à jour après la fin (jours fériés, actifs radiés)
+def _depuis_historique(symbole, debut, fin):
+    derniere = stockage.derniere_date(symbole, INTERVALLE_HISTORIQUE)
+    debut, fin = pd.Timestamp(debut), pd.Timestamp(fin)
+    if derniere is None or debut < DEBUT_HISTORIQUE:
+        return None
+    if derniere < fin - pd.offsets.BDay(1) and fin > stockage.date_mise_a_jour(symbole, INTERVALLE_HISTORIQUE).normalize():
+        return None
+    donnees = stockage.lire(symbole, INTERVALLE_HISTORIQUE, debut, fin - pd.Timedelta(days=1), colonnes=['Adj Close'])
+    return donnees['Adj Close'].dropna() if not donnees.empty else pd.Series(dtype='float64')
+
+
+# Prix ajustés des symboles demandés {symbole: pd.Series}
+def prix_ajustes(symboles, date_debut, date_fin):
+    debut, fin = str(date_debut), str(date_fin)
+    with _verrou:
+        series = {s: _cache_prix[(s, debut, fin)] for s in symboles if (s, debut, fin) in _cache_prix}
+    for symbole in symboles:
+        profilage.enregistrer_cache('magasin_prix', symbole in series)
+
+    for symbole in [s for s in symboles if s not in series]:
+        serie = _depuis_historique(symbole, debut, fin)
+        profilage.enregistrer_cache('historique_quotidien', serie is not None)
+        if serie is not None:
+            series[symbole] = serie
+
+    manquants = [s for s in symboles if s not in series]
+    if manquants:
+        series.update(_telecharger(manquants, pd.Timestamp(debut), pd.Timestamp(fin)))
+    with _verrou:
+        for symbole in symboles:
+            if (symbole, debut, fin) not in _cache_prix:
+                memoriser(_cache_prix, (symbole, debut, fin), series[symbole])
+    return series
+
+
+# Compléter l'historique quotidien stocké des symboles jusqu'à la veille de `date_fin` (par
+# défaut : jusqu'à aujourd'hui inclus). Seules les séances à partir de la dernière stockée sont
+# téléchargées, en un appel groupé par date de reprise ; la séance déjà stockée sert de contrôle :
+# si son prix ajusté a changé (dividende, division), l'historique du symbole est réécrit en
+# entier. Les prix de ces symboles gardés en mémoire sont oubliés. Renvoie {symbole: lignes écrites}.
+def completer_historique(symboles, date_fin=None):
+    fin = pd.Timestamp(date_fin) if date_fin is not None else pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+    groupes = {}
+    for symbole in symboles:
+        groupes.setdefault(stockage.derniere_date(symbole, INTERVALLE_HISTORIQUE), []).append(symbole)
+
+    lignes = {}
+    a_reecrire = []
+    for derniere, groupe in groupes.items():
+        for symbole, serie in _telecharger(groupe, derniere if derniere is not None else DEBUT_HISTORIQUE, fin).items():
+            if serie.empty:
+                continue  # Rien reçu (symbole invalide, fournisseur indisponible) : l'historique reste en l'état
+            if derniere is not None and serie.index[0] == derniere:
+                controle = stockage.lire(symbole, INTERVALLE_HISTORIQUE, derniere, derniere)['Adj Close'].iloc[-1]
+                if abs(serie.iloc[0] / controle - 1) > TOLERANCE_AJUSTEMENT:
+                    a_reecrire.append(symbole)
+                    continue
+            lignes[symbole] = stockage.ajouter(symbole, INTERVALLE_HISTORIQUE, serie.to_frame('Adj Close'))
+            stockage.marquer_a_jour(symbole, INTERVALLE_HISTORIQUE)
+    if a_reecrire:
+        for symbole, serie in _telecharger(a_reecrire, DEBUT_HISTORIQUE, fin).items():
+            if not serie.empty:
+                lignes[symbole] = stockage.remplacer(symbole, INTERVALLE_HISTORIQUE, serie.to_frame('Adj Close'))
+
+    with _verrou:
+        for cle in [c for c in _cache_prix if c[0] in lignes]:
+            del _cache_prix[cle]
+    return lignes
+
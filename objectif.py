@@ -0,0 +1,63 @@
+# Solveur d'objectif : contribution, montant initial ou horizon nécessaires pour atteindre un
+# capital cible avec un niveau de confiance donné.
+#
+# Sur chaque chemin de rendements mensuels, la valeur à la date t est linéaire dans le montant
+# initial V_0 et dans la contribution mensuelle c : V_t = a_t × V_0 + b_t × c. La contribution
+# (ou le montant initial) requise par chaque chemin s'en déduit directement, et la valeur
+# garantie avec une confiance q est un quantile sur les chemins. L'horizon est cherché sur
+# toutes les dates à la fois, à partir du quantile (1 − q) de V_t.
+import numpy as np
+
+import decumulation
+import profilage
+
+HORIZON_MAX_ANNEES = 50  # Au-delà, l'objectif est considéré comme hors d'atteinte
+
+
+# Coefficients a_t (valeur d'une unité investie au départ) et b_t (valeur d'une contribution
+# mensuelle unitaire versée tous les `mois_par_periode` mois, en début de période)
+def coefficients(chemins, mois_par_periode=1, frais=0.0):
+    croissance = np.cumprod(1 + chemins - frais / decumulation.PERIODES_PAR_AN, axis=1)
+    croissance_debut = np.hstack([np.ones((croissance.shape[0], 1)), croissance[:, :-1]])
+    versements = np.where(np.arange(chemins.shape[1]) % mois_par_periode == 0, mois_par_periode, 0)
+    return croissance, croissance * np.cumsum(versements / croissance_debut, axis=1)
+
+
+def contribution_requise(a, b, cible, montant_initial, confiance):
+    return max(float(np.quantile((cible - a * montant_initial) / b, confiance)), 0.0)
+
+
+def montant_initial_requis(a, b, cible, contribution, confiance):
+    return max(float(np.quantile((cible - b * contribution) / a, confiance)), 0.0)
+
+
+# Premier horizon (en mois) auquel la cible est atteinte avec la confiance demandée, None sinon
+def horizon_requis(a, b, cible, montant_initial, contribution, confiance):
+    garanti = np.quantile(a * montant_initial + b * contribution, 1 - confiance, axis=0)
+    atteint = np.flatnonzero(garanti >= cible)
+    return int(atteint[0]) + 1 if len(atteint) else None
+
+
+def probabilite_atteinte(a, b, cible, montant_initial, contribution):
+    return float((a * montant_initial + b * contribution >= cible).mean())
+
+
+# Résolution complète pour un actif, à partir de chemins bootstrap de ses rendements mensuels
+@profilage.chronometrer('objectif')
+def resoudre(prix_mensuels, cible, horizon_annees, confiance, montant_initial, contribution, mois_par_periode=1,
+             nombre_chemins=2000, frais=0.0, graine=0):
+    rendements = decumulation.rendements_mensuels(prix_mensuels)
+    if len(rendements) < decumulation.PERIODES_PAR_AN:
+        return None  # Historique trop court pour des chemins significatifs
+    nombre_periodes = int(round(max(horizon_annees, HORIZON_MAX_ANNEES) * decumulation.PERIODES_PAR_AN))
+    chemins = decumulation.chemins_bootstrap(rendements, nombre_periodes, nombre_chemins, graine=graine)
+    a, b = coefficients(chemins, mois_par_periode, frais)
+
+    fin = int(round(horizon_annees * decumulation.PERIODES_PAR_AN)) - 1
+    horizon = horizon_requis(a, b, cible, montant_initial, contribution, confiance)
+    return {
+        'contribution': contribution_requise(a[:, fin], b[:, fin], cible, montant_initial, confiance),
+        'montant_initial': montant_initial_requis(a[:, fin], b[:, fin], cible, contribution, confiance),
+        'horizon_annees': horizon / decumulation.PERIODES_PAR_AN if horizon is not None else None,
+        'probabilite': probabilite_atteinte(a[:, fin], b[:, fin], cible, montant_initial, contribution),
+    }
@@ -0,0 +1,110 @@
+# Pyramide des prix de fin de période d'un actif (hebdomadaire, mensuelle, trimestrielle,
+# semestrielle, annuelle), construite en un seul passage à partir des bornes de période :
+# chaque vue est la dernière observation de chaque période, lue par indexation directe.
+# La pyramide est gardée en cache pour tout le processus ; changer de fréquence de
+# contribution, afficher les boîtes à moustaches ou le calendrier n'est plus qu'une lecture.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import magasin
+import profilage
+
+# Nombre de mois par période des vues mensuelles et plus longues ; l'hebdomadaire est à part
+MOIS_PAR_PERIODE = {'Mensuelle': 1, 'Trimestrielle': 3, 'Semestrielle': 6, 'Annuelle': 12}
+FREQUENCES = ['Hebdomadaire'] + list(MOIS_PAR_PERIODE)
+
+_verrou = threading.Lock()
+_cache_pyramides = OrderedDict()  # (clé de l'actif, nombre de points, dernière date) -> {fréquence: pd.Series}
+
+
+# Positions de la dernière observation de chaque période (identifiants de période croissants)
+def _dernieres(identifiants):
+    return np.flatnonzero(np.append(np.diff(identifiants) != 0, True))
+
+
+# Vues de fin de période d'une série de prix. Les périodes de plusieurs mois suivent le
+# découpage de resample('3M', '6M', '12M') : la première ne couvre que le premier mois, les
+# suivantes partent de la fin de celui-ci ; chaque vue est datée de la fin de sa période.
+def construire(prix):
+    valeurs = prix.to_numpy(dtype='float64')
+    index = prix.index
+    jours = index.to_numpy(dtype='datetime64[D]').astype('int64')
+    mois = index.year.to_numpy() * 12 + index.month.to_numpy() - 1
+
+    pyramide = {}
+    semaines = (jours + 3) // 7  # Semaines du lundi au dimanche (le 1er janvier 1970 est un jeudi)
+    fins = _dernieres(semaines)
+    pyramide['Hebdomadaire'] = pd.Series(
+        valeurs[fins], index=pd.DatetimeIndex((semaines[fins] * 7 + 3).astype('datetime64[D]')).as_unit('ns'), name=prix.name
+    )
+    for frequence, pas in MOIS_PAR_PERIODE.items():
+        periodes = (mois - mois[0] + pas - 1) // pas
+        fins = _dernieres(periodes)
+        dernier_mois = mois[0] + periodes[fins] * pas
+        # Dernier jour du mois : veille du premier jour du mois suivant
+        dates = (dernier_mois - 1970 * 12 + 1).astype('datetime64[M]').astype('datetime64[D]') - 1
+        pyramide[frequence] = pd.Series(valeurs[fins], index=pd.DatetimeIndex(dates).as_unit('ns'), name=prix.name)
+    return pyramide
+
+
+# Pyramide d'un actif, en cache ; `cle` identifie l'actif et ses paramètres (période, devise,
+# intervalle), la taille et la dernière date de la série invalident le cache si les données changent
+def pyramide(prix, cle):
+    cle = (cle, len(prix), prix.index[-1] if len(prix) else None)
+    with _verrou:
+        vues = _cache_pyramides.get(cle)
+    profilage.enregistrer_cache('pyramide', vues is not None)
+    if vues is None:
+        vues = construire(prix)
+        with _verrou:
+            magasin.memoriser(_cache_pyramides, cle, vues)
+    return vues
+
+
+MOIS = ['Janv.', 'Févr.', 'Mars', 'Avr.', 'Mai', 'Juin', 'Juil.', 'Août', 'Sept.', 'Oct.', 'Nov.', 'Déc.']
+_cache_calendriers = OrderedDict()  # même clé que les pyramides -> pd.DataFrame années × mois
+
+# Rendements mensuels d'un actif rangés en matrice années × mois, avec le rendement de chaque
+# année civile (composé sur ses mois disponibles) ; le premier mois part de la première
+# observation. Remplissage par indexation directe de la matrice, sans boucle sur les cellules.
+def calendrier(prix, cle):
+    cle_cache = (cle, len(prix), prix.index[-1] if len(prix) else None)
+    with _verrou:
+        tableau = _cache_calendriers.get(cle_cache)
+    profilage.enregistrer_cache('calendrier', tableau is not None)
+    if tableau is not None:
+        return tableau
+
+    mensuels = pyramide(prix, cle)['Mensuelle']
+    valeurs = mensuels.to_numpy(dtype='float64')
+    rendements = valeurs / np.concatenate([[prix.iloc[0]], valeurs[:-1]]) - 1
+    annees = mensuels.index.year.to_numpy()
+    premiere = annees[0]
+    matrice = np.full((annees[-1] - premiere + 1, 12), np.nan)
+    matrice[annees - premiere, mensuels.index.month.to_numpy() - 1] = rendements
+    with np.errstate(invalid='ignore'):
+        annuels = np.where(np.isnan(matrice).all(axis=1), np.nan, np.nanprod(1 + matrice, axis=1) - 1)
+
+    tableau = pd.DataFrame(matrice, index=pd.Index(np.arange(premiere, annees[-1] + 1), name='Année'), columns=MOIS)
+    tableau['Année'] = annuels
+    with _verrou:
+        magasin.memoriser(_cache_calendriers, cle_cache, tableau)
+    return tableau
+
+
+# Statistiques d'un calendrier : meilleur et pire mois, part des mois en hausse, moyenne et écart type
+def statistiques_calendrier(tableau):
+    mois = tableau[MOIS].stack()  # Série indexée par (année, mois), sans les cellules vides
+    meilleur, pire = mois.idxmax(), mois.idxmin()
+    return {
+        'Meilleur mois': f"{meilleur[1]} {meilleur[0]}",
+        'Rendement du meilleur mois': mois.max(),
+        'Pire mois': f"{pire[1]} {pire[0]}",
+        'Rendement du pire mois': mois.min(),
+        'Mois en hausse': (mois > 0).mean(),
+        'Rendement mensuel moyen': mois.mean(),
+        'Écart type mensuel': mois.std(),
+    }
@@ -0,0 +1,92 @@
+# Cache persistant des résultats de la chaîne de traitement
+# Chaque résultat d'actif est rangé sous une empreinte canonique (SHA-256) de son symbole et
+# des paramètres qui le déterminent : en mémoire pour le processus, et sur disque pour survivre
+# aux redémarrages et être partagé entre sessions et avec l'API. Le dossier est limité en
+# taille : au-delà, les fichiers les moins récemment lus sont supprimés.
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import magasin
+import profilage
+
+DOSSIER = os.environ.get('SIMULATEUR_CACHE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache_resultats'))
+TAILLE_MAX_OCTETS = int(os.environ.get('SIMULATEUR_CACHE_OCTETS', 512 * 1024 * 1024))
+TAILLE_MAX_MEMOIRE = 256
+
+_verrou = threading.Lock()
+_cache_memoire = OrderedDict()  # empreinte -> résultat
+
+
+# Empreinte canonique : JSON trié et sans espaces des valeurs converties en texte, de sorte
+# que deux saisies équivalentes (dates) donnent la même clé ; les nombres sont à ramener à un
+# même type par l'appelant (10000 et 10000.0 ne s'écrivent pas pareil)
+def empreinte(*valeurs):
+    texte = json.dumps(valeurs, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(texte.encode('utf-8')).hexdigest()
+
+
+def _chemin(cle):
+    return os.path.join(DOSSIER, cle[:2], cle + '.pkl')
+
+
+def lire(cle):
+    with _verrou:
+        resultat = _cache_memoire.get(cle)
+        if resultat is not None:
+            _cache_memoire.move_to_end(cle)
+    if resultat is None:
+        chemin = _chemin(cle)
+        try:
+            with open(chemin, 'rb') as fichier:
+                resultat = pickle.load(fichier)
+            os.utime(chemin)  # Date de dernière lecture, pour l'éviction
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError):
+            resultat = None
+        if resultat is not None:
+            with _verrou:
+                magasin.memoriser(_cache_memoire, cle, resultat, TAILLE_MAX_MEMOIRE)
+    profilage.enregistrer_cache('cache_resultats', resultat is not None)
+    return resultat
+
+
+def ecrire(cle, resultat):
+    with _verrou:
+        magasin.memoriser(_cache_memoire, cle, resultat, TAILLE_MAX_MEMOIRE)
+    chemin = _chemin(cle)
+    try:
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        temporaire = f"{chemin}.{threading.get_ident()}.tmp"
+        with open(temporaire, 'wb') as fichier:
+            pickle.dump(resultat, fichier, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporaire, chemin)
+    except OSError:
+        return  # Disque indisponible : le cache mémoire suffit
+    evincer()
+
+
+# Supprimer les fichiers les moins récemment lus tant que le dossier dépasse la taille maximale
+def evincer(taille_max=None):
+    taille_max = TAILLE_MAX_OCTETS if taille_max is None else taille_max
+    fichiers = []
+    for racine, _, noms in os.walk(DOSSIER):
+        for nom in noms:
+            if nom.endswith('.pkl'):
+                chemin = os.path.join(racine, nom)
+                try:
+                    infos = os.stat(chemin)
+                except OSError:
+                    continue
+                fichiers.append((infos.st_mtime, infos.st_size, chemin))
+    total = sum(taille for _, taille, _ in fichiers)
+    for _, taille, chemin in sorted(fichiers):
+        if total <= taille_max:
+            break
+        try:
+            os.remove(chemin)
+        except OSError:
+            pass
+        total -= taille
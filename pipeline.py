@@ -0,0 +1,301 @@
+# Chaîne de traitement d'un actif (téléchargement, normalisation, métriques, stratégies,
+# régression) et exécution en parallèle pour une liste quelconque de symboles.
+# Aucun appel Streamlit ici : les erreurs sont renvoyées dans le résultat et affichées par l'interface.
+import contextvars
+import datetime
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import devises
+import ingestion
+import intraday
+import magasin
+import periodes
+import persistance
+import prevision
+import profilage
+import referentiel
+
+# Paramètres communs à tous les actifs (ceux de la barre latérale)
+Parametres = namedtuple('Parametres', [
+    'date_debut', 'date_fin', 'taux_sans_risque', 'montant_initial', 'montant_contribution',
+    'frequence_contributions', 'devise', 'intervalle', 'taille_barres'
+])
+
+# Résultat complet d'un actif ; si `erreur` est renseignée, les autres champs valent None
+ResultatActif = namedtuple('ResultatActif', [
+    'symbole', 'donnees', 'pyramide', 'metriques', 'prix_par_periode', 'rendements_frequents',
+    'valeur_lump_sum', 'dca', 'strategies', 'tableau_resultats', 'prevision', 'erreur'
+])
+
+# Fréquences de contribution et nombre de mois couverts par chacune (vues de la pyramide des périodes)
+MOIS_PAR_PERIODE = periodes.MOIS_PAR_PERIODE
+FREQUENCES = list(MOIS_PAR_PERIODE)
+
+# Période minimale analysée, en jours calendaires : en deçà, une ou deux séances ne permettent
+# ni rendement annualisé ni volatilité
+DUREE_MINIMALE_JOURS = 7
+
+# Valeurs par défaut des paramètres (ceux de la barre latérale), pour l'API et le préchargement
+PARAMETRES_DEFAUT = {
+    'debut': '2020-01-01',
+    'fin': '2024-10-25',
+    'devise': 'EUR',
+    'taux_sans_risque': 2.0,  # En pourcentage annuel, comme dans la page
+    'montant_initial': 10000,
+    'montant_contribution': 500,
+    'frequence': 'Mensuelle',
+    'intervalle': '1d',
+    'taille_barres': '1D',
+}
+
+# Des threads suffisent : les téléchargements sont des E/S et numpy/pandas libèrent le GIL
+TAILLE_POOL = int(os.environ.get('SIMULATEUR_TAILLE_POOL', 16))
+
+
+# Liste de symboles saisie librement ("AAPL, MSFT; nvda") : majuscules, sans doublons, ordre conservé
+def lire_symboles(texte):
+    symboles = []
+    for morceau in re.split(r'[,;\s]+', texte or ''):
+        symbole = morceau.strip().upper()
+        if symbole and symbole not in symboles:
+            symboles.append(symbole)
+    return symboles
+
+
+# Paramètres refusés par lire_parametres (réponse 400 de l'API)
+class ParametresInvalides(ValueError):
+    pass
+
+
+# Paramètres bruts (requête de l'API, valeurs par défaut complétées) -> (symboles, Parametres), avec validation
+def lire_parametres(brut):
+    symboles = lire_symboles(brut.get('symboles', ''))
+    if not symboles:
+        raise ParametresInvalides("Paramètre 'symboles' manquant (ex: symboles=AAPL,MSFT).")
+    valeurs = dict(PARAMETRES_DEFAUT)
+    valeurs.update({cle: v for cle, v in brut.items() if cle in PARAMETRES_DEFAUT})
+    try:
+        date_debut = datetime.date.fromisoformat(str(valeurs['debut']))
+        date_fin = datetime.date.fromisoformat(str(valeurs['fin']))
+        taux_sans_risque = float(valeurs['taux_sans_risque']) / 100
+        montant_initial = float(valeurs['montant_initial'])
+        montant_contribution = float(valeurs['montant_contribution'])
+    except (TypeError, ValueError) as e:
+        raise ParametresInvalides(f"Paramètre invalide : {e}")
+    if date_debut >= date_fin:
+        raise ParametresInvalides("La date de début doit précéder la date de fin.")
+    if (date_fin - date_debut).days < DUREE_MINIMALE_JOURS:
+        raise ParametresInvalides(f"La période doit couvrir au moins {DUREE_MINIMALE_JOURS} jours.")
+    if valeurs['frequence'] not in FREQUENCES:
+        raise ParametresInvalides(f"Fréquence invalide, valeurs possibles : {', '.join(FREQUENCES)}.")
+    if valeurs['devise'] not in devises.SYMBOLES_DEVISES:
+        raise ParametresInvalides(f"Devise invalide, valeurs possibles : {', '.join(devises.SYMBOLES_DEVISES)}.")
+    if valeurs['intervalle'] != '1d' and not intraday.est_intraday(valeurs['intervalle']):
+        raise ParametresInvalides(f"Intervalle invalide : {valeurs['intervalle']}.")
+    taille_barres = valeurs['taille_barres'] if intraday.est_intraday(valeurs['intervalle']) else '1D'
+    if taille_barres not in intraday.TAILLES_BARRES:
+        raise ParametresInvalides(f"Taille de barres invalide : {taille_barres}.")
+    return symboles, Parametres(date_debut, date_fin, taux_sans_risque, montant_initial, montant_contribution,
+                                valeurs['frequence'], valeurs['devise'], valeurs['intervalle'], taille_barres)
+
+
+def telecharger(symbole, parametres):
+    if intraday.est_intraday(parametres.intervalle):
+        # Barres intrajournalières : ingestion par tranches dans le stockage local puis rééchantillonnage
+        donnees_brutes = intraday.charger(symbole, parametres.intervalle, parametres.date_debut,
+                                          parametres.date_fin, parametres.taille_barres)
+    else:
+        # Prix quotidiens : magasin de prix partagé par la page, l'API et les indices
+        prix = magasin.prix_ajustes([symbole], parametres.date_debut, parametres.date_fin)[symbole]
+        donnees_brutes = pd.DataFrame({'Adj Close': prix})
+    if donnees_brutes.empty:
+        raise ValueError("Données vides, symbole peut-être invalide.")
+    return donnees_brutes
+
+
+# Tableau canonique de l'actif (voir ingestion.py), avec des prix convertis dans la devise de l'investisseur
+def preparer_donnees(donnees_brutes, symbole, parametres):
+    serie = ingestion.serie_prix(donnees_brutes, symbole)
+    serie = devises.convertir(serie, devises.devise_symbole(symbole), parametres.devise,
+                              parametres.date_debut, parametres.date_fin)
+    return ingestion.cadre_canonique(serie)
+
+
+# Volatilité, Sharpe, rendement total, CAGR (annualisés d'après la taille des barres) et drawdown maximal
+def calculer_metriques(donnees, parametres):
+    periodes_par_an = intraday.periodes_par_an(parametres.taille_barres)
+    volatilite = donnees['Rendement Quotidien'].std() * np.sqrt(periodes_par_an)
+    rendement = donnees['Rendement Quotidien'].mean() * periodes_par_an
+    valeur_initiale = donnees['Prix Ajusté'].iloc[0]
+    valeur_finale = donnees['Prix Ajusté'].iloc[-1]
+    nombre_annees = (donnees.index[-1] - donnees.index[0]).days / 365.25
+    prix = donnees['Prix Ajusté'].to_numpy()
+    return {
+        'volatilite': volatilite,
+        'ratio_sharpe': (rendement - parametres.taux_sans_risque) / volatilite,
+        'rendement_total': ((valeur_finale - valeur_initiale) / valeur_initiale) * 100,
+        'cagr': ((valeur_finale / valeur_initiale) ** (1 / nombre_annees) - 1) * 100,
+        'drawdown_maximal': float((prix / np.maximum.accumulate(prix) - 1).min()),
+    }
+
+
+# Valeur d'un portefeuille alimenté par une contribution fixe à chaque période
+# (parts cumulées achetées au prix de la période, valorisées au même prix)
+def calcul_dca(prix_par_periode, contribution):
+    prix = prix_par_periode.to_numpy(dtype='float64')
+    return np.cumsum(contribution / prix) * prix
+
+
+# Montants finaux, gains et rendements annuels moyens des stratégies Lump Sum et DCA
+def resultats_strategies(donnees, valeur_lump_sum, dca, parametres):
+    montant_initial = parametres.montant_initial
+    montant_final_lump_sum = valeur_lump_sum.iloc[-1]
+    montant_final_dca = dca['Valeur Portefeuille DCA'].iloc[-1]
+    duree_investissement = (donnees.index[-1] - donnees.index[0]).days / 365
+    return {
+        'montant_final_lump_sum': montant_final_lump_sum,
+        'montant_final_dca': montant_final_dca,
+        'gain_lump_sum': montant_final_lump_sum - montant_initial,
+        'gain_dca': montant_final_dca - montant_initial,
+        'cagr_lump_sum': ((montant_final_lump_sum / montant_initial) ** (1 / duree_investissement) - 1) * 100,
+        'cagr_dca': ((montant_final_dca / montant_initial) ** (1 / duree_investissement) - 1) * 100,
+        'moyenne_contributions_dca': parametres.montant_contribution * (12 if parametres.frequence_contributions == "Mensuelle" else 1),
+    }
+
+
+# Tableau comparatif Lump Sum / DCA d'un actif, tel qu'affiché dans la page
+def tableau_strategies(strategies, parametres):
+    symbole_devise = devises.SYMBOLES_DEVISES.get(parametres.devise, parametres.devise)
+    montant_initial = parametres.montant_initial
+    return pd.DataFrame({
+        "Métrique/Stratégie": ["Lump Sum", f"DCA ({parametres.frequence_contributions})"],
+        f"Montant Initial ({symbole_devise})": [montant_initial, montant_initial],
+        f"Montant Final ({symbole_devise})": [strategies['montant_final_lump_sum'], strategies['montant_final_dca']],
+        f"Gains Réalisés ({symbole_devise})": [strategies['gain_lump_sum'], strategies['gain_dca']],
+        "Rendement Annuel Moyen (%)": [strategies['cagr_lump_sum'], strategies['cagr_dca']],
+        f"Moyenne Contributions ({symbole_devise})": ["N/A", strategies['moyenne_contributions_dca']]
+    })
+
+
+# Clé des caches par actif : symbole et paramètres qui déterminent ses prix (hors montants et fréquence)
+def cle_actif(symbole, parametres):
+    return (symbole, str(parametres.date_debut), str(parametres.date_fin), parametres.devise,
+            parametres.intervalle, parametres.taille_barres)
+
+
+def _echec(symbole, message):
+    return ResultatActif(symbole, *([None] * (len(ResultatActif._fields) - 2)), message)
+
+
+# Chaîne complète pour un actif
+def analyser_actif(symbole, parametres):
+    if referentiel.hors_periode(symbole, parametres.date_debut, parametres.date_fin):
+        fiche = referentiel.fiche(symbole)
+        cotation = f"du {fiche.premiere_date:%d/%m/%Y} au {fiche.derniere_date:%d/%m/%Y}" if fiche.derniere_date else f"depuis le {fiche.premiere_date:%d/%m/%Y}"
+        return _echec(symbole, f"Erreur : l'actif '{symbole}' n'a pas d'historique sur la période choisie (coté {cotation}).")
+    try:
+        donnees_brutes = telecharger(symbole, parametres)
+    except Exception:
+        return _echec(symbole, f"Erreur : Impossible de trouver l'actif '{symbole}'. Veuillez vérifier le symbole.")
+
+    try:
+        with profilage.chronometre('actif_normalisation'):
+            donnees = preparer_donnees(donnees_brutes, symbole, parametres)
+    except ValueError as e:
+        return _echec(symbole, f"Erreur de conversion de devise ({symbole}) : {e}")
+    if (donnees.index[-1] - donnees.index[0]).days < 1:
+        return _echec(symbole, f"Erreur : historique trop court pour l'actif '{symbole}' sur la période choisie.")
+
+    with profilage.chronometre('actif_periodes'):
+        pyramide = periodes.pyramide(donnees['Prix Ajusté'], cle_actif(symbole, parametres))
+
+    with profilage.chronometre('actif_metriques'):
+        metriques = calculer_metriques(donnees, parametres)
+        prix_par_periode = pyramide[parametres.frequence_contributions]
+        rendements_frequents = prix_par_periode.pct_change().dropna()
+
+    with profilage.chronometre('actif_strategies'):
+        valeur_lump_sum = parametres.montant_initial * donnees['Rendement Cumulé']
+        contribution = parametres.montant_contribution * MOIS_PAR_PERIODE[parametres.frequence_contributions]
+        dca = pd.DataFrame({'Prix': prix_par_periode,
+                            'Valeur Portefeuille DCA': calcul_dca(prix_par_periode, contribution)},
+                           index=prix_par_periode.index)
+        strategies = resultats_strategies(donnees, valeur_lump_sum, dca, parametres)
+        tableau_resultats = tableau_strategies(strategies, parametres)
+
+    with profilage.chronometre('actif_regression'):
+        prevision_actif = prevision.ajuster(prevision.MODELE_DEFAUT, symbole, donnees['Prix Ajusté'])
+
+    return ResultatActif(symbole, donnees, pyramide, metriques, prix_par_periode, rendements_frequents,
+                         valeur_lump_sum, dca, strategies, tableau_resultats, prevision_actif, None)
+
+
+# Chaîne exécutée pour tous les symboles dans un pool de threads ; les résultats gardent l'ordre
+# de saisie. Le contexte de profilage est recopié dans chaque tâche pour que les durées
+# mesurées dans les threads s'ajoutent à l'exécution en cours.
+def _calculer(symboles, parametres, taille_pool):
+    # Préchargements groupés (prix quotidiens manquants, taux de change) : un seul appel chacun
+    try:
+        if not intraday.est_intraday(parametres.intervalle):
+            magasin.prix_ajustes(symboles, parametres.date_debut, parametres.date_fin)
+        devises.taux_de_change([devises.devise_symbole(s) for s in symboles], parametres.devise,
+                               parametres.date_debut, parametres.date_fin)
+    except Exception:
+        pass  # L'erreur sera signalée actif par actif
+
+    if len(symboles) <= 1 or taille_pool <= 1:
+        return [analyser_actif(symbole, parametres) for symbole in symboles]
+    with ThreadPoolExecutor(max_workers=min(taille_pool, len(symboles))) as pool:
+        taches = [pool.submit(contextvars.copy_context().run, analyser_actif, symbole, parametres)
+                  for symbole in symboles]
+        return [tache.result() for tache in taches]
+
+
+# Les résultats ne sont conservés d'une exécution à l'autre que si l'historique est figé :
+# période terminée et données quotidiennes (les barres intrajournalières sont complétées en continu)
+def _persistant(parametres):
+    return (not intraday.est_intraday(parametres.intervalle)
+            and pd.Timestamp(parametres.date_fin) < pd.Timestamp.now().normalize())
+
+
+# Empreinte du résultat d'un actif : symbole, paramètres, structure du résultat et prix de la
+# période, de sorte qu'un historique réécrit par magasin.completer_historique (dividende,
+# division) ne resserve pas un résultat périmé. Taux et montants sont ramenés en float, de
+# sorte que 10000 (page) et 10000.0 (API) partagent la clé.
+def cle_resultat(symbole, parametres, prix):
+    parametres = parametres._replace(taux_sans_risque=float(parametres.taux_sans_risque),
+                                     montant_initial=float(parametres.montant_initial),
+                                     montant_contribution=float(parametres.montant_contribution))
+    empreinte_prix = int(pd.util.hash_pandas_object(prix).sum())
+    return persistance.empreinte(ResultatActif._fields, symbole, parametres._asdict(), empreinte_prix)
+
+
+# Résultats de tous les symboles : lus dans le cache persistant lorsque c'est possible,
+# seuls les symboles manquants passent par la chaîne complète. Les prix de la période, lus dans
+# le magasin (mémoire ou historique stocké), servent à la clé puis au calcul des manquants.
+def analyser_actifs(symboles, parametres, taille_pool=TAILLE_POOL):
+    if not _persistant(parametres):
+        return _calculer(symboles, parametres, taille_pool)
+    try:
+        prix = magasin.prix_ajustes(symboles, parametres.date_debut, parametres.date_fin)
+    except Exception:
+        return _calculer(symboles, parametres, taille_pool)  # L'erreur sera signalée actif par actif
+    cles = {symbole: cle_resultat(symbole, parametres, prix[symbole]) for symbole in symboles}
+    trouves = {}
+    for symbole in symboles:
+        resultat = persistance.lire(cles[symbole])
+        if resultat is not None:
+            trouves[symbole] = resultat
+    manquants = [s for s in symboles if s not in trouves]
+    if manquants:
+        for resultat in _calculer(manquants, parametres, taille_pool):
+            trouves[resultat.symbole] = resultat
+            if resultat.erreur is None:
+                persistance.ecrire(cles[resultat.symbole], resultat)
+    return [trouves[s] for s in symboles]
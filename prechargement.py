@@ -0,0 +1,156 @@
+# Préchargement en arrière-plan du stockage local et des résultats
+# Au démarrage, la liste de surveillance (plus l'indice ACWI et les paires de change utiles)
+# est chargée dans l'historique quotidien stocké et ses résultats sont calculés pour les
+# paramètres par défaut. Chaque jour ouvré après la clôture, l'historique de tous les symboles
+# stockés (quotidien et intrajournalier) est complété de la nouvelle séance et les résultats
+# recalculés. Tout tourne dans un thread de fond, avec au plus CONCURRENCE téléchargements ou
+# calculs simultanés : les sessions interactives ne l'attendent jamais.
+#
+#     SIMULATEUR_PRECHARGEMENT="AAPL,MSFT,AIR.PA" streamlit run finance.py
+#     python prechargement.py AAPL MSFT              # une passe immédiate
+#     python prechargement.py AAPL MSFT --service    # passe au démarrage, puis chaque soir
+import argparse
+import datetime
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import devises
+import indices
+import intraday
+import magasin
+import pipeline
+import profilage
+import stockage
+
+LISTE_SURVEILLANCE = pipeline.lire_symboles(os.environ.get('SIMULATEUR_PRECHARGEMENT', ''))
+HEURE_RAFRAICHISSEMENT = os.environ.get('SIMULATEUR_RAFRAICHISSEMENT', '22:30')  # Heure locale, après la clôture de New York
+CONCURRENCE = int(os.environ.get('SIMULATEUR_PRECHARGEMENT_CONCURRENCE', 2))
+TAILLE_LOT = 20  # Symboles par téléchargement groupé
+
+_verrou = threading.Lock()
+_service = None
+
+
+# Symboles tenus à jour : liste de surveillance, composants de l'ACWI et paires de change vers la devise par défaut
+def symboles_surveilles(liste=None):
+    symboles = list(LISTE_SURVEILLANCE if liste is None else liste)
+    symboles += [s for s in indices.INDICES['ACWI'] if s not in symboles]
+    paires = devises.paires_de_change([devises.devise_symbole(s) for s in symboles], pipeline.PARAMETRES_DEFAUT['devise'])
+    return symboles + sorted({paire for paire, _ in paires.values()} - set(symboles))
+
+
+# Résultats précalculés pour les paramètres par défaut de la barre latérale, ainsi que l'indice
+# ACWI. Une période encore ouverte n'est pas précalculée : ses résultats ne sont pas conservés.
+def precalculer(symboles):
+    symboles_valides, parametres = pipeline.lire_parametres({'symboles': ','.join(symboles)})
+    pipeline.analyser_actifs(symboles_valides, parametres, taille_pool=CONCURRENCE)
+    indices.indices_rendement({'ACWI': indices.INDICES['ACWI']}, parametres.date_debut, parametres.date_fin,
+                              parametres.devise)
+
+
+# Une passe complète : historique quotidien complété par lots en parallèle, barres
+# intrajournalières déjà stockées complétées, puis résultats recalculés (hors paires de change).
+# Renvoie le nombre de lignes ajoutées au stockage ; une erreur de téléchargement est relevée
+# à la fin de la passe.
+@profilage.chronometrer('prechargement')
+def rafraichir(liste=None):
+    symboles = symboles_surveilles(liste)
+    symboles += [s for s in stockage.symboles_stockes(magasin.INTERVALLE_HISTORIQUE) if s not in symboles]
+    maintenant = pd.Timestamp.now()
+    with ThreadPoolExecutor(max_workers=CONCURRENCE) as pool:
+        lots = [pool.submit(magasin.completer_historique, symboles[i:i + TAILLE_LOT])
+                for i in range(0, len(symboles), TAILLE_LOT)]
+        barres = [pool.submit(intraday.ingerer, symbole, intervalle, maintenant - profondeur, maintenant + pd.Timedelta(days=1))
+                  for intervalle, (_, profondeur) in intraday.INTERVALLES.items()
+                  for symbole in stockage.symboles_stockes(intervalle)]
+        lignes, erreurs = 0, []
+        for tache in lots + barres:
+            try:
+                resultat = tache.result()
+            except Exception as e:
+                erreurs.append(e)  # Un lot en échec n'empêche pas les autres ni les calculs
+                continue
+            lignes += sum(resultat.values()) if isinstance(resultat, dict) else resultat
+    precalculer([s for s in symboles if not s.endswith('=X')])
+    if erreurs:
+        raise erreurs[0]
+    return lignes
+
+
+# Prochaine passe : l'heure de rafraîchissement du prochain jour ouvré
+def prochaine_passe(heure, maintenant=None):
+    maintenant = maintenant if maintenant is not None else pd.Timestamp.now()
+    passe = maintenant.normalize() + pd.Timedelta(hours=heure.hour, minutes=heure.minute)
+    if passe <= maintenant:
+        passe += pd.Timedelta(days=1)
+    while passe.weekday() >= 5:
+        passe += pd.Timedelta(days=1)
+    return passe
+
+
+# Service de fond : une passe au démarrage, puis une à chaque heure de rafraîchissement ;
+# l'attente se fait sur un événement, ce qui permet un arrêt immédiat
+class Service:
+    def __init__(self, liste=None, heure=HEURE_RAFRAICHISSEMENT):
+        self.liste = liste
+        self.heure = datetime.time.fromisoformat(heure)
+        self.derniere_passe = None
+        self.lignes = 0
+        self.erreur = None
+        self._arret = threading.Event()
+        self._thread = None
+
+    def demarrer(self):
+        self._thread = threading.Thread(target=self._executer, daemon=True, name='prechargement')
+        self._thread.start()
+        return self
+
+    def _executer(self):
+        while not self._arret.is_set():
+            try:
+                self.lignes = rafraichir(self.liste)
+                self.erreur = None
+            except Exception as e:
+                self.erreur = e  # Le fournisseur peut n'être indisponible qu'un moment : la passe suivante réessaie
+            self.derniere_passe = pd.Timestamp.now()
+            self._arret.wait((prochaine_passe(self.heure) - pd.Timestamp.now()).total_seconds())
+
+    def arreter(self):
+        self._arret.set()
+
+    def attendre(self):
+        while self.actif:
+            self._thread.join(timeout=1)
+
+    @property
+    def actif(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+# Service unique par processus : la page Streamlit réexécute son script à chaque interaction
+def demarrer(liste=None):
+    global _service
+    with _verrou:
+        if _service is None or not _service.actif:
+            _service = Service(liste).demarrer()
+    return _service
+
+
+if __name__ == '__main__':
+    parseur = argparse.ArgumentParser(description="Préchargement du stockage local et des résultats")
+    parseur.add_argument('symboles', nargs='*', help="Liste de surveillance (par défaut : SIMULATEUR_PRECHARGEMENT)")
+    parseur.add_argument('--service', action='store_true', help="Rester actif et rafraîchir chaque jour ouvré après la clôture")
+    arguments = parseur.parse_args()
+
+    liste = pipeline.lire_symboles(','.join(arguments.symboles)) if arguments.symboles else None
+    if arguments.service:
+        service = Service(liste).demarrer()
+        try:
+            service.attendre()
+        except KeyboardInterrupt:
+            service.arreter()
+    else:
+        print(f"{rafraichir(liste)} lignes ajoutées au stockage local")
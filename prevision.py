@@ -0,0 +1,226 @@
+# Prévision du prix : registre de modèles interchangeables (régression linéaire ou log-linéaire
+# sur le nombre de jours écoulés, dérive EWMA, bootstrap des rendements)
+# Chaque ajustement est résumé par un petit tuple (pente, ordonnée, écart type…) gardé en cache
+# par (modèle, symbole, empreinte des données, et horizon pour les modèles à trajectoires
+# simulées) : tant que les prix ne changent pas, changer de modèle ou réexécuter la page ne
+# refait aucun ajustement. Les prix prévus et les bandes
+# d'incertitude ne sont calculés qu'au moment du tracé.
+import hashlib
+import math
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+from sklearn.linear_model import LinearRegression
+
+import magasin
+import profilage
+
+HORIZON_JOURS = 180  # Nombre de jours prévus après la dernière date connue
+HORIZON_MAX_JOURS = 3 * 365  # Horizon maximal d'une prévision
+COULEURS_LIMITES = ['green', 'orange', 'red']  # Bandes ±1, ±2, ±3 écarts types
+DEMI_VIE_EWMA = 63  # Demi-vie des moyennes exponentielles, en observations (un trimestre de séances)
+NOMBRE_TRAJECTOIRES = 2000
+
+# Ajustement d'un modèle. Le sens de (pente, ordonnée, sigma) dépend du modèle : droite des prix
+# pour le modèle linéaire, droite des log-prix pour le log-linéaire, dérive et volatilité
+# quotidiennes des log-rendements pour les modèles de marche aléatoire (ordonnée : log du
+# dernier prix). `details` porte les données propres au modèle (quantiles simulés…).
+Prevision = namedtuple('Prevision', ['pente', 'ordonnee', 'sigma', 'origine', 'fin', 'modele', 'details'],
+                       defaults=['Linéaire', None])
+
+# Modèle du registre : ajuster(prix) -> Prevision ; bornes(prevision, dates, k) -> (bas, centre, haut)
+# de la bande ±k écarts types (k = 0 : prix prévu). Si `horizon` est vrai, l'ajustement dépend
+# de l'horizon en jours (trajectoires simulées), reçu par ajuster(prix, horizon=...).
+Modele = namedtuple('Modele', ['ajuster', 'bornes', 'horizon'], defaults=[False])
+
+_verrou = threading.Lock()
+_cache_ajustements = OrderedDict()  # (modèle, symbole, empreinte des prix) -> Prevision
+
+
+def _jours(dates, origine):
+    return (dates - origine).days.to_numpy(dtype='float64')
+
+
+# Régression linéaire des prix sur le nombre de jours écoulés
+def ajuster_prevision(prix):
+    jours = _jours(prix.index, prix.index[0])
+    valeurs = prix.to_numpy(dtype='float64')
+
+    modele = LinearRegression()
+    modele.fit(jours.reshape(-1, 1), valeurs)
+    pente = float(modele.coef_[0])
+    ordonnee = float(modele.intercept_)
+
+    residus = valeurs - (ordonnee + pente * jours)
+    sigma = float(residus.std(ddof=1))
+    return Prevision(pente, ordonnee, sigma, prix.index[0], prix.index[-1])
+
+
+def _bornes_lineaire(prevision, dates, k):
+    centre = prevision.ordonnee + prevision.pente * _jours(dates, prevision.origine)
+    return centre - k * prevision.sigma, centre, centre + k * prevision.sigma
+
+
+# Même régression sur le logarithme des prix : croissance exponentielle, bandes proportionnelles au prix
+def ajuster_log_lineaire(prix):
+    ajustement = ajuster_prevision(np.log(prix))
+    return ajustement._replace(modele='Log-linéaire')
+
+
+def _bornes_log_lineaire(prevision, dates, k):
+    return tuple(np.exp(b) for b in _bornes_lineaire(prevision, dates, k))
+
+
+# Log-rendements entre observations et nombre moyen d'observations par jour calendaire
+# (les dérives et volatilités sont ramenées au jour calendaire, unité de l'horizon)
+def _log_rendements(prix):
+    rendements = np.diff(np.log(prix.to_numpy(dtype='float64')))
+    observations_par_jour = len(rendements) / max((prix.index[-1] - prix.index[0]).days, 1)
+    return rendements, observations_par_jour
+
+
+# Marche aléatoire à dérive : dérive et volatilité des log-rendements en moyennes exponentielles
+# (les séances récentes pèsent le plus), projetées depuis le dernier prix ; la bande s'élargit
+# comme la racine de l'horizon
+def ajuster_derive_ewma(prix):
+    rendements, observations_par_jour = _log_rendements(prix)
+    poids = 0.5 ** (np.arange(len(rendements))[::-1] / DEMI_VIE_EWMA)
+    poids /= poids.sum()
+    derive = float(poids @ rendements)
+    variance = float(poids @ (rendements - derive) ** 2)
+    return Prevision(derive * observations_par_jour, float(np.log(prix.iloc[-1])),
+                     math.sqrt(variance * observations_par_jour), prix.index[0], prix.index[-1], 'Dérive EWMA')
+
+
+# Horizon en jours après la dernière date ; pas de prévision sur l'historique
+def _horizon(prevision, dates):
+    horizon = _jours(dates, prevision.fin)
+    return np.where(horizon > 0, horizon, np.nan)
+
+
+def _bornes_derive(prevision, dates, k):
+    horizon = _horizon(prevision, dates)
+    centre = prevision.ordonnee + prevision.pente * horizon
+    ecart = k * prevision.sigma * np.sqrt(horizon)
+    return np.exp(centre - ecart), np.exp(centre), np.exp(centre + ecart)
+
+
+# Quantiles de la loi normale correspondant aux bandes ±1, ±2, ±3 écarts types
+NIVEAUX_QUANTILES = [0.5 * (1 + math.erf(k / math.sqrt(2))) for k in (-3, -2, -1, 0, 1, 2, 3)]
+
+
+# Bootstrap : trajectoires simulées jusqu'à l'horizon demandé en tirant au hasard (avec remise)
+# des log-rendements historiques par séance, sans hypothèse de loi ; seuls les quantiles des
+# log-prix cumulés à chaque séance future sont conservés. Les barres intrajournalières sont
+# d'abord ramenées à une clôture par séance : un pas simulé est toujours une séance, et la
+# mémoire reste de l'ordre de NOMBRE_TRAJECTOIRES × séances de l'horizon. Avec moins de deux
+# séances, la bande est nulle. Tirages reproductibles (graine fixe).
+def ajuster_bootstrap(prix, horizon=HORIZON_JOURS):
+    clotures = prix.resample('D').last().dropna()
+    rendements, observations_par_jour = _log_rendements(clotures)
+    if len(rendements) == 0:
+        rendements = np.zeros(1)
+    seances = max(1, math.ceil(min(horizon, HORIZON_MAX_JOURS) * observations_par_jour))
+    generateur = np.random.default_rng(0)
+    trajectoires = generateur.choice(rendements, size=(NOMBRE_TRAJECTOIRES, seances))
+    np.cumsum(trajectoires, axis=1, out=trajectoires)
+    quantiles = np.quantile(trajectoires, NIVEAUX_QUANTILES, axis=0)
+    ecart_type = float(rendements.std(ddof=1)) if len(rendements) > 1 else 0.0
+    return Prevision(float(rendements.mean() * observations_par_jour), float(np.log(prix.iloc[-1])),
+                     ecart_type * math.sqrt(observations_par_jour), prix.index[0], prix.index[-1],
+                     'Bootstrap', (quantiles, observations_par_jour))
+
+
+def _bornes_bootstrap(prevision, dates, k):
+    quantiles, observations_par_jour = prevision.details
+    seances = np.round(_horizon(prevision, dates) * observations_par_jour)
+    valides = (seances >= 1) & (seances <= quantiles.shape[1])
+    positions = np.where(valides, seances - 1, 0).astype('int64')
+
+    def quantile(rang):
+        return np.where(valides, np.exp(prevision.ordonnee + quantiles[rang, positions]), np.nan)
+
+    milieu = len(NIVEAUX_QUANTILES) // 2
+    return quantile(milieu - k), quantile(milieu), quantile(milieu + k)
+
+
+# Registre des modèles (nom affiché -> Modele) ; le premier est celui de la chaîne de traitement
+MODELES = {
+    'Linéaire': Modele(ajuster_prevision, _bornes_lineaire),
+    'Log-linéaire': Modele(ajuster_log_lineaire, _bornes_log_lineaire),
+    'Dérive EWMA': Modele(ajuster_derive_ewma, _bornes_derive),
+    'Bootstrap': Modele(ajuster_bootstrap, _bornes_bootstrap, horizon=True),
+}
+MODELE_DEFAUT = 'Linéaire'
+
+
+# Ajouter (ou remplacer) un modèle dans le registre ; `ajuster` doit renseigner le nom du modèle
+def enregistrer_modele(nom, ajuster, bornes, horizon=False):
+    MODELES[nom] = Modele(ajuster, bornes, horizon)
+    return MODELES[nom]
+
+
+# Empreinte des données : dates et valeurs de la série de prix
+def empreinte(prix):
+    contenu = prix.index.asi8.tobytes() + prix.to_numpy(dtype='float64').tobytes()
+    return hashlib.blake2b(contenu, digest_size=16).hexdigest()
+
+
+# Ajustement d'un modèle du registre pour un actif, gardé en cache tant que ses prix sont inchangés ;
+# `horizon` (jours après la dernière date) ne compte que pour les modèles à trajectoires simulées
+def ajuster(modele, symbole, prix, horizon=HORIZON_JOURS):
+    selon_horizon = MODELES[modele].horizon
+    cle = (modele, symbole, empreinte(prix), horizon if selon_horizon else None)
+    with _verrou:
+        ajustement = _cache_ajustements.get(cle)
+    profilage.enregistrer_cache('prevision_ajustements', ajustement is not None)
+    if ajustement is None:
+        with profilage.chronometre(f'prevision_{modele}'):
+            if selon_horizon:
+                ajustement = MODELES[modele].ajuster(prix, horizon=horizon)
+            else:
+                ajustement = MODELES[modele].ajuster(prix)
+        with _verrou:
+            magasin.memoriser(_cache_ajustements, cle, ajustement)
+    return ajustement
+
+
+# Dates couvertes par le graphique : historique puis horizon de prévision quotidien
+def dates_prevision(prevision, dates_historiques, horizon=HORIZON_JOURS):
+    dates_futures = pd.date_range(start=prevision.fin + pd.Timedelta(days=1), periods=horizon, freq='D')
+    return dates_historiques.append(dates_futures)
+
+
+# Prix prévus pour des dates quelconques
+def prix_prevus(prevision, dates):
+    return MODELES[prevision.modele].bornes(prevision, dates, 0)[1]
+
+
+# Bande ±k écarts types (bas, haut) pour des dates quelconques
+def bornes(prevision, dates, k):
+    bas, _, haut = MODELES[prevision.modele].bornes(prevision, dates, k)
+    return bas, haut
+
+
+# Traces Plotly : prix réel, prix prédit et bandes ±1/±2/±3 écarts types calculées à la volée
+def traces_prevision(prix, prevision, survol=True, horizon=HORIZON_JOURS):
+    dates = dates_prevision(prevision, prix.index, horizon)
+    prevus = prix_prevus(prevision, dates)
+
+    def trace(x, y, **options):
+        if survol:
+            options.update(hovertext=np.round(y, 2), hoverinfo='text')  # Affichage des montants au survol
+        return go.Scatter(x=x, y=y, mode='lines', **options)
+
+    traces = [
+        trace(prix.index, prix.to_numpy(), name='Prix réel', line=dict(color='blue', width=1)),
+        trace(dates, prevus, name='Prix prédit', line=dict(color='green', width=1)),
+    ]
+    for i, couleur in zip(range(1, 4), COULEURS_LIMITES):
+        bas, haut = bornes(prevision, dates, i)
+        traces.append(trace(dates, haut, name=f'Limite Supérieure (±{i})', line=dict(color=couleur, dash='dash')))
+        traces.append(trace(dates, bas, name=f'Limite Inférieure (±{i})', line=dict(color=couleur, dash='dash')))
+    return traces
@@ -0,0 +1,199 @@
+# Instrumentation légère des étapes du simulateur (durées, nombre d'appels, cache)
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Statistiques cumulées sur toute la durée de vie du processus (toutes sessions confondues)
+_verrou = threading.Lock()
+_verrou_journal = threading.Lock()
+_cumul = {}
+
+# État de l'exécution en cours : chaque session Streamlit tourne dans son propre thread, et le
+# contexte est recopié dans les threads de calcul (pipeline) qui alimentent la même exécution
+_execution = contextvars.ContextVar('profilage_execution', default=None)
+
+_serveur_prometheus = None
+
+
+def _nouvelle_statistique():
+    return {'appels': 0, 'duree_totale': 0.0, 'duree_max': 0.0, 'cache_hits': 0, 'cache_miss': 0}
+
+
+def _etat():
+    etat = _execution.get()
+    if etat is None:
+        etat = {'statistiques': {}, 'etape_courante': None, 'debut_etape': None, 'debut_execution': None}
+        _execution.set(etat)
+    return etat
+
+
+def _ajouter(etape, duree=None, hit=None):
+    execution = _etat()['statistiques']
+    with _verrou:
+        for statistiques in (execution, _cumul):
+            stat = statistiques.setdefault(etape, _nouvelle_statistique())
+            if duree is not None:
+                stat['appels'] += 1
+                stat['duree_totale'] += duree
+                stat['duree_max'] = max(stat['duree_max'], duree)
+            if hit is True:
+                stat['cache_hits'] += 1
+            elif hit is False:
+                stat['cache_miss'] += 1
+
+
+# Chronométrer un bloc de code : `with chronometre("regression"): ...`
+@contextmanager
+def chronometre(etape):
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        _ajouter(etape, duree=time.perf_counter() - debut)
+
+
+# Décorateur équivalent pour les fonctions
+def chronometrer(etape):
+    def decorateur(fonction):
+        @wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            with chronometre(etape):
+                return fonction(*args, **kwargs)
+        return enveloppe
+    return decorateur
+
+
+# Comptabiliser un accès à un cache (hit=True si la valeur était déjà disponible)
+def enregistrer_cache(etape, hit):
+    _ajouter(etape, hit=hit)
+
+
+# Découpage du script en étapes successives : chaque appel clôt l'étape précédente
+def debut_execution():
+    _execution.set(None)
+    _etat()['debut_execution'] = time.perf_counter()
+
+
+def etape(nom):
+    _clore_etape()
+    etat = _etat()
+    etat['etape_courante'] = nom
+    etat['debut_etape'] = time.perf_counter()
+
+
+def _clore_etape():
+    etat = _etat()
+    if etat['etape_courante'] is not None:
+        _ajouter(etat['etape_courante'], duree=time.perf_counter() - etat['debut_etape'])
+    etat['etape_courante'] = None
+
+
+def fin_execution():
+    _clore_etape()
+    etat = _etat()
+    if etat['debut_execution'] is not None:
+        _ajouter('execution_totale', duree=time.perf_counter() - etat['debut_execution'])
+        etat['debut_execution'] = None
+
+    # Journal structuré optionnel (une ligne JSON par exécution)
+    chemin = os.environ.get('SIMULATEUR_PROFILAGE_JSON')
+    if chemin:
+        ecrire_journal_json(chemin)
+
+
+# Instantanés des statistiques
+def statistiques_execution():
+    execution = _etat()['statistiques']
+    with _verrou:
+        return {nom: dict(stat) for nom, stat in execution.items()}
+
+
+def statistiques_cumulees():
+    with _verrou:
+        return {nom: dict(stat) for nom, stat in _cumul.items()}
+
+
+def reinitialiser():
+    with _verrou:
+        _cumul.clear()
+    _etat()['statistiques'] = {}
+
+
+# Export JSON
+def vers_json():
+    return json.dumps({
+        'horodatage': time.time(),
+        'execution': statistiques_execution(),
+        'cumul': statistiques_cumulees(),
+    }, ensure_ascii=False)
+
+
+def ecrire_journal_json(chemin):
+    ligne = vers_json() + '\n'
+    with _verrou_journal:
+        with open(chemin, 'a', encoding='utf-8') as fichier:
+            fichier.write(ligne)
+
+
+# Export au format texte Prometheus
+def format_prometheus():
+    lignes = [
+        '# HELP simulateur_etape_secondes_total Temps cumulé passé dans chaque étape.',
+        '# TYPE simulateur_etape_secondes_total counter',
+    ]
+    statistiques = statistiques_cumulees()
+    for nom, stat in sorted(statistiques.items()):
+        lignes.append(f'simulateur_etape_secondes_total{{etape="{nom}"}} {stat["duree_totale"]:.6f}')
+    lignes += [
+        '# HELP simulateur_etape_appels_total Nombre d\'exécutions de chaque étape.',
+        '# TYPE simulateur_etape_appels_total counter',
+    ]
+    for nom, stat in sorted(statistiques.items()):
+        lignes.append(f'simulateur_etape_appels_total{{etape="{nom}"}} {stat["appels"]}')
+    lignes += [
+        '# HELP simulateur_etape_secondes_max Durée maximale observée pour chaque étape.',
+        '# TYPE simulateur_etape_secondes_max gauge',
+    ]
+    for nom, stat in sorted(statistiques.items()):
+        lignes.append(f'simulateur_etape_secondes_max{{etape="{nom}"}} {stat["duree_max"]:.6f}')
+    lignes += [
+        '# HELP simulateur_cache_total Accès aux caches par résultat (hit ou miss).',
+        '# TYPE simulateur_cache_total counter',
+    ]
+    for nom, stat in sorted(statistiques.items()):
+        if stat['cache_hits'] or stat['cache_miss']:
+            lignes.append(f'simulateur_cache_total{{etape="{nom}",resultat="hit"}} {stat["cache_hits"]}')
+            lignes.append(f'simulateur_cache_total{{etape="{nom}",resultat="miss"}} {stat["cache_miss"]}')
+    return '\n'.join(lignes) + '\n'
+
+
+class _GestionnairePrometheus(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        corps = format_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Serveur /metrics démarré une seule fois par processus (Streamlit ré-exécute le script à chaque interaction) ;
+# il n'écoute que la machine locale, sauf hôte indiqué (ex: '0.0.0.0' pour un collecteur distant)
+def demarrer_serveur_prometheus(port, hote='127.0.0.1'):
+    global _serveur_prometheus
+    with _verrou:
+        if _serveur_prometheus is None:
+            _serveur_prometheus = ThreadingHTTPServer((hote, port), _GestionnairePrometheus)
+            threading.Thread(target=_serveur_prometheus.serve_forever, daemon=True).start()
+    return _serveur_prometheus
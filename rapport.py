@@ -0,0 +1,127 @@
+# Rapport PDF d'analyse, construit à partir des résultats de la chaîne de traitement (pipeline)
+# Utilisé par la page Streamlit et par l'API : les images intermédiaires sont écrites dans un
+# dossier temporaire propre à chaque rapport, et les figures matplotlib n'utilisent pas pyplot,
+# ce qui permet de générer plusieurs rapports en même temps.
+import os
+import platform
+import tempfile
+
+import plotly.graph_objs as go
+import plotly.io as pio
+from fpdf import FPDF
+from matplotlib.figure import Figure
+
+import prevision
+import profilage
+
+# Lignes du tableau des métriques : (libellé, clé dans ResultatActif.metriques, format)
+LIGNES_METRIQUES = [
+    ("Volatilité annualisée", 'volatilite', "{:.2%}"),
+    ("Ratio de Sharpe", 'ratio_sharpe', "{:.2f}"),
+    ("Rendement total", 'rendement_total', "{:.2f}%"),
+    ("CAGR", 'cagr', "{:.2f}%"),
+    ("Drawdown maximal", 'drawdown_maximal', "{:.2%}"),
+]
+
+
+# Fonction pour définir le chemin de la police selon le système
+def get_font_path():
+    system = platform.system()
+    if system == 'Windows':
+        return r'C:\Windows\Fonts\arial.ttf'  # Windows
+    elif system == 'Darwin':  # macOS
+        return '/System/Library/Fonts/Supplemental/Arial.ttf'  # Utiliser Arial sur macOS
+    else:  # Linux
+        return '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'
+
+
+# Histogramme des rendements (positifs en vert, négatifs en rouge) enregistré en PNG
+def creer_histogramme(data, titre, chemin, color_positive="green", color_negative="red"):
+    rendements = data.dropna()
+    positif = rendements[rendements >= 0]
+    negatif = rendements[rendements < 0]
+
+    fig = Figure(figsize=(6, 4))
+    ax = fig.subplots()
+    ax.hist(positif, bins=20, alpha=0.7, label='Positifs', color=color_positive, edgecolor='black')
+    ax.hist(negatif, bins=20, alpha=0.7, label='Négatifs', color=color_negative, edgecolor='black')
+    ax.set_title(titre)
+    ax.set_xlabel("Rendement")
+    ax.set_ylabel("Fréquence")
+    ax.legend()
+    fig.savefig(chemin)
+    return chemin
+
+
+# Graphique Lump Sum vs DCA d'un actif, sans informations de survol (export statique)
+def figure_strategies(resultat, frequence_contributions):
+    return go.Figure(data=[
+        go.Scatter(x=resultat.donnees.index, y=resultat.valeur_lump_sum, mode='lines',
+                   name='Lump Sum', line=dict(color='blue', width=1)),
+        go.Scatter(x=resultat.dca.index, y=resultat.dca['Valeur Portefeuille DCA'], mode='lines',
+                   name=f'DCA {frequence_contributions}', line=dict(color='green', width=1)),
+    ])
+
+
+# Rapport complet : tableau des métriques, histogrammes, régressions et stratégies de chaque actif
+@profilage.chronometrer("creer_pdf")
+def creer_pdf(resultats, frequence_contributions, pdf_path="rapport_analyse.pdf"):
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    # Utiliser une police Unicode
+    pdf.add_font('Arial', '', get_font_path(), uni=True)
+    pdf.set_font("Arial", size=12)
+
+    # Titre
+    pdf.cell(200, 10, txt="Rapport d'Analyse d'Investissement", ln=True, align='C')
+
+    # Ajouter un espace
+    pdf.ln(10)
+
+    # Tableau des métriques déjà calculées : une colonne par actif, largeur répartie sur la page
+    largeur_colonne = min(50, 140 / len(resultats))
+    pdf.set_font("Arial", size=10 if len(resultats) <= 3 else 7)
+    pdf.set_fill_color(220, 220, 220)  # Couleur de fond pour l'en-tête
+    pdf.cell(50, 10, "Métriques", border=1, fill=True, align='C')
+    for r in resultats:
+        pdf.cell(largeur_colonne, 10, r.symbole, border=1, fill=True, align='C')
+    pdf.ln()
+
+    for libelle, cle, format_valeur in LIGNES_METRIQUES:
+        pdf.cell(50, 10, libelle, border=1, align='C')
+        for r in resultats:
+            pdf.cell(largeur_colonne, 10, format_valeur.format(r.metriques[cle]), border=1, align='C')
+        pdf.ln()
+
+    pdf.ln(10)
+
+    with tempfile.TemporaryDirectory(prefix="rapport_") as dossier:
+        # Histogramme de chaque actif
+        for position, r in enumerate(resultats):
+            histogramme = creer_histogramme(
+                r.donnees['Rendement Quotidien'],
+                f"Distribution des rendements ({r.symbole})",
+                os.path.join(dossier, f"histogramme_actif_{position + 1}.png")
+            )
+            pdf.image(histogramme, x=10, y=None, w=180)
+
+        # Graphiques de régression linéaire et de comparaison Lump Sum vs DCA de chaque actif
+        for position, r in enumerate(resultats):
+            fig_regression = go.Figure(data=prevision.traces_prevision(r.donnees['Prix Ajusté'], r.prevision, survol=False))
+            fig_regression.update_layout(title=f"Régression linéaire pour {r.symbole}", title_x=0.5)
+            chemin_regression = os.path.join(dossier, f"regression_actif_{position + 1}.png")
+            pio.write_image(fig_regression, chemin_regression)
+            pdf.add_page()
+            pdf.image(chemin_regression, x=10, y=30, w=180)
+
+            fig_strategies = figure_strategies(r, frequence_contributions)
+            fig_strategies.update_layout(title=f"Comparaison Lump Sum vs DCA ({r.symbole})", title_x=0.5)
+            chemin_strategies = os.path.join(dossier, f"graphique_comparaison_lumpsum_dca_{position + 1}.png")
+            pio.write_image(fig_strategies, chemin_strategies)
+            pdf.add_page()
+            pdf.image(chemin_strategies, x=10, y=30, w=180)
+
+    pdf.output(pdf_path)
+    return pdf_path
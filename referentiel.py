@@ -0,0 +1,98 @@
+# Référentiel local des symboles connus (symbole, nom, place, devise, historique disponible)
+# Lu depuis un simple fichier CSV, rechargé dès que le fichier change : il suffit de le
+# remplacer pour le mettre à jour, sans accès réseau. Les recherches se font dans une liste
+# triée de clés (symbole et mots du nom) par dichotomie, la validation par accès direct.
+import bisect
+import csv
+import os
+import re
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+CHEMIN = os.environ.get('SIMULATEUR_REFERENTIEL', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'referentiel.csv'))
+
+# Dates au format AAAA-MM-JJ ; dernière date vide pour un symbole toujours coté
+Fiche = namedtuple('Fiche', ['symbole', 'nom', 'place', 'devise', 'premiere_date', 'derniere_date'])
+Referentiel = namedtuple('Referentiel', ['fiches', 'cles'])  # {symbole: Fiche}, [(clé, symbole)] triée
+
+_verrou = threading.Lock()
+_charge = {'chemin': None, 'modification': None, 'referentiel': Referentiel({}, [])}
+
+
+def _date(texte):
+    return pd.Timestamp(texte).date() if texte else None
+
+
+# Lire un fichier de référentiel (colonnes : symbole, nom, place, devise, premiere_date, derniere_date)
+def lire(chemin):
+    fiches = {}
+    with open(chemin, encoding='utf-8', newline='') as fichier:
+        for ligne in csv.DictReader(fichier):
+            symbole = ligne['symbole'].strip().upper()
+            fiches[symbole] = Fiche(symbole, ligne['nom'].strip(), ligne['place'].strip(), ligne['devise'].strip(),
+                                    _date(ligne['premiere_date'].strip()), _date(ligne['derniere_date'].strip()))
+    cles = set()
+    for symbole, fiche in fiches.items():
+        cles.add((symbole.lower(), symbole))
+        cles.update((mot, symbole) for mot in re.findall(r'\w+', fiche.nom.lower()) if len(mot) > 1)
+    return Referentiel(fiches, sorted(cles))
+
+
+# Référentiel courant, relu uniquement si le fichier a été modifié depuis la dernière lecture
+def referentiel(chemin=None):
+    chemin = chemin or CHEMIN
+    try:
+        modification = os.stat(chemin).st_mtime_ns
+    except OSError:
+        return Referentiel({}, [])
+    with _verrou:
+        if _charge['chemin'] != chemin or _charge['modification'] != modification:
+            _charge.update(chemin=chemin, modification=modification, referentiel=lire(chemin))
+        return _charge['referentiel']
+
+
+def fiche(symbole):
+    return referentiel().fiches.get(symbole.upper())
+
+
+# Suggestions pour un début de symbole ou de mot du nom, symbole exact en tête
+def rechercher(texte, limite=10):
+    texte = texte.strip().lower()
+    if not texte:
+        return []
+    courant = referentiel()
+    resultats = [courant.fiches[texte.upper()]] if texte.upper() in courant.fiches else []
+    position = bisect.bisect_left(courant.cles, (texte, ''))
+    while position < len(courant.cles) and len(resultats) < limite and courant.cles[position][0].startswith(texte):
+        trouvee = courant.fiches[courant.cles[position][1]]
+        if trouvee not in resultats:
+            resultats.append(trouvee)
+        position += 1
+    return resultats
+
+
+# Le symbole est-il connu et sans historique sur la période demandée ?
+def hors_periode(symbole, date_debut, date_fin):
+    trouvee = fiche(symbole)
+    if trouvee is None:
+        return False  # Symbole absent du référentiel : seul le téléchargement peut trancher
+    return ((trouvee.premiere_date is not None and trouvee.premiere_date > pd.Timestamp(date_fin).date())
+            or (trouvee.derniere_date is not None and trouvee.derniere_date < pd.Timestamp(date_debut).date()))
+
+
+# Période ramenée à l'historique disponible lorsque tous les symboles sont connus : la date de
+# début n'est pas antérieure à la première cotation la plus ancienne, ni la date de fin
+# postérieure à la dernière cotation la plus récente (symboles retirés de la cote)
+def borner_periode(symboles, date_debut, date_fin):
+    fiches = [fiche(s) for s in symboles]
+    if not fiches or None in fiches:
+        return date_debut, date_fin
+    premieres = [f.premiere_date for f in fiches]
+    if None not in premieres and min(premieres) < date_fin:
+        date_debut = max(date_debut, min(premieres))
+    dernieres = [f.derniere_date for f in fiches]
+    if None not in dernieres and max(dernieres) > date_debut:
+        date_fin = min(date_fin, max(dernieres))
+    return date_debut, date_fin
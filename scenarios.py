@@ -0,0 +1,146 @@
+# Scénarios de crise historiques rejoués sur les positions actuelles
+# Chaque scénario est une fenêtre de dates (du sommet au creux) ; la bibliothèque des trajectoires
+# de rendements quotidiens est extraite une seule fois par (symbole source, devise) et gardée en
+# cache pour tout le processus. Toutes les positions et tous les scénarios sont ensuite évalués
+# dans un seul calcul vectorisé (positions × scénarios × jours).
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+import devises
+import magasin
+import profilage
+
+# Fenêtres de crise : nom -> (début, fin), du sommet au creux de l'indice américain
+SCENARIOS = {
+    'Crise financière 2008': ('2007-10-09', '2009-03-09'),
+    'Krach Covid 2020': ('2020-02-19', '2020-03-23'),
+    'Inflation et hausse des taux 2022': ('2022-01-03', '2022-10-12'),
+}
+
+SOURCE_DEFAUT = 'SPY'  # Trajectoires de repli quand l'actif n'existait pas encore
+JOURS_PAR_MOIS = 21  # Séances de bourse entre deux contributions mensuelles
+TOLERANCE_FENETRE = pd.Timedelta(days=7)  # Écart accepté entre la fenêtre et l'historique disponible
+
+# Position à soumettre aux scénarios : valeur actuelle et plan de contributions
+# (contribution versée toutes les `pas_contributions` séances, 0 pour aucune)
+Position = namedtuple('Position', ['actif', 'strategie', 'valeur', 'contribution', 'pas_contributions', 'source'])
+
+_verrou = threading.Lock()
+_cache_trajectoires = OrderedDict()  # (symbole, devise) -> {scénario: np.ndarray des rendements}
+
+
+# Période couvrant toutes les fenêtres : un seul téléchargement par symbole
+def _periode():
+    debut = min(pd.Timestamp(d) for d, _ in SCENARIOS.values())
+    fin = max(pd.Timestamp(f) for _, f in SCENARIOS.values()) + pd.Timedelta(days=1)
+    return debut.date(), fin.date()
+
+
+# Trajectoires de rendements quotidiens d'un symbole pour chaque scénario couvert par son historique
+def trajectoires(symbole, devise=None):
+    cle = (symbole, devise)
+    with _verrou:
+        bibliotheque = _cache_trajectoires.get(cle)
+    profilage.enregistrer_cache('scenarios', bibliotheque is not None)
+    if bibliotheque is not None:
+        return bibliotheque
+
+    debut, fin = _periode()
+    prix = magasin.prix_ajustes([symbole], debut, fin)[symbole]
+    if devise is not None and not prix.empty:
+        prix = devises.convertir(prix, devises.devise_symbole(symbole), devise, debut, fin)
+
+    bibliotheque = {}
+    for nom, (debut_fenetre, fin_fenetre) in SCENARIOS.items():
+        fenetre = prix.loc[debut_fenetre:fin_fenetre]
+        if (len(fenetre) < 2 or fenetre.index[0] - pd.Timestamp(debut_fenetre) > TOLERANCE_FENETRE
+                or pd.Timestamp(fin_fenetre) - fenetre.index[-1] > TOLERANCE_FENETRE):
+            continue  # Historique insuffisant pour ce scénario
+        valeurs = fenetre.to_numpy(dtype='float64')
+        bibliotheque[nom] = valeurs[1:] / valeurs[:-1] - 1
+
+    with _verrou:
+        magasin.memoriser(_cache_trajectoires, cle, bibliotheque)
+    return bibliotheque
+
+
+# Rejouer des trajectoires (matrice positions × scénarios × jours, complétée par des zéros) :
+# V_t = G_t × (V_0 + Σ_{k≤t} c_k / G_k), où G est la croissance cumulée de la trajectoire
+def rejouer(rendements, longueurs, valeurs, contributions, pas_contributions):
+    nombre_jours = rendements.shape[2]
+    jours = np.arange(1, nombre_jours + 1)
+    actifs = jours[None, None, :] <= longueurs[:, :, None]  # Jours appartenant au scénario
+
+    croissance = np.cumprod(1 + rendements, axis=2)
+    pas = np.where(pas_contributions > 0, pas_contributions, 1)
+    versements = np.where((jours[None, :] % pas[:, None] == 0) & (pas_contributions[:, None] > 0),
+                          contributions[:, None], 0.0)[:, None, :] * actifs
+    valeur = croissance * (valeurs[:, None, None] + np.cumsum(versements / croissance, axis=2))
+    investi = valeurs[:, None, None] + np.cumsum(versements, axis=2)
+
+    dernier = (longueurs - 1)[:, :, None]
+    valeur_finale = np.take_along_axis(valeur, dernier, axis=2)[:, :, 0]
+    investi_final = np.take_along_axis(investi, dernier, axis=2)[:, :, 0]
+    return {
+        'valeur_creux': np.where(actifs, valeur, np.inf).min(axis=2),
+        'valeur_finale': valeur_finale,
+        'contributions': investi_final - valeurs[:, None],
+        'perte_maximale': np.where(actifs, valeur / investi - 1, np.inf).min(axis=2),
+        'variation_finale': valeur_finale / investi_final - 1,
+    }
+
+
+# Tableau des scénarios pour une liste de positions : une ligne par (actif, stratégie, scénario)
+def stress_tests(positions, devise=None, source_repli=SOURCE_DEFAUT):
+    # Historiques des sources absentes de la bibliothèque téléchargés en un seul appel groupé
+    sources = {p.source for p in positions} | {source_repli}
+    with _verrou:
+        manquantes = sorted(s for s in sources if (s, devise) not in _cache_trajectoires)
+    if manquantes:
+        magasin.prix_ajustes(manquantes, *_periode())
+
+    repli = trajectoires(source_repli, devise)
+    noms = [nom for nom in SCENARIOS if nom in repli]
+    if not positions or not noms:
+        return pd.DataFrame()
+
+    # Trajectoire de chaque (position, scénario) : celle de la source de la position, sinon celle de repli
+    choix = []
+    for position in positions:
+        propres = trajectoires(position.source, devise) if position.source != source_repli else repli
+        choix.append([(position.source, propres[nom]) if nom in propres else (source_repli, repli[nom]) for nom in noms])
+
+    longueurs = np.array([[len(r) for _, r in ligne] for ligne in choix])
+    rendements = np.zeros((len(positions), len(noms), longueurs.max()))
+    for i, ligne in enumerate(choix):
+        for j, (_, r) in enumerate(ligne):
+            rendements[i, j, :len(r)] = r
+
+    with profilage.chronometre('scenarios_rejeu'):
+        resultats = rejouer(
+            rendements, longueurs,
+            np.array([p.valeur for p in positions], dtype='float64'),
+            np.array([p.contribution for p in positions], dtype='float64'),
+            np.array([p.pas_contributions for p in positions]),
+        )
+
+    lignes = []
+    for i, position in enumerate(positions):
+        for j, nom in enumerate(noms):
+            lignes.append({
+                'Actif': position.actif,
+                'Stratégie': position.strategie,
+                'Scénario': nom,
+                'Source': choix[i][j][0],
+                'Durée (séances)': int(longueurs[i, j]),
+                'Valeur actuelle': position.valeur,
+                'Contributions versées': resultats['contributions'][i, j],
+                'Valeur au creux': resultats['valeur_creux'][i, j],
+                'Valeur finale': resultats['valeur_finale'][i, j],
+                'Perte maximale': resultats['perte_maximale'][i, j],
+                'Variation finale': resultats['variation_finale'][i, j],
+            })
+    return pd.DataFrame(lignes).set_index(['Actif', 'Stratégie', 'Scénario'])
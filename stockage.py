@@ -0,0 +1,183 @@
+# Stockage local des historiques de prix, sur disque et par morceaux
+# Chaque couple (symbole, intervalle) est un dossier de fichiers Parquet ajoutés au fil de
+# l'eau, décrit par un petit index JSON : l'historique complet n'est jamais chargé d'un bloc.
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+RACINE = os.environ.get('SIMULATEUR_STOCKAGE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stockage'))
+
+_verrou = threading.Lock()
+
+
+def _dossier(symbole, intervalle):
+    return os.path.join(RACINE, intervalle, symbole.upper().replace('/', '_'))
+
+
+def _lire_index(dossier):
+    chemin = os.path.join(dossier, 'index.json')
+    if not os.path.exists(chemin):
+        return []
+    with open(chemin, encoding='utf-8') as fichier:
+        return json.load(fichier)
+
+
+def _ecrire_index(dossier, morceaux):
+    chemin = os.path.join(dossier, 'index.json')
+    with open(chemin + '.tmp', 'w', encoding='utf-8') as fichier:
+        json.dump(morceaux, fichier)
+    os.replace(chemin + '.tmp', chemin)
+
+
+# Morceaux stockés : liste de {'fichier', 'debut', 'fin', 'lignes'} dans l'ordre chronologique
+def morceaux(symbole, intervalle):
+    return _lire_index(_dossier(symbole, intervalle))
+
+
+def derniere_date(symbole, intervalle):
+    liste = morceaux(symbole, intervalle)
+    return pd.Timestamp(liste[-1]['fin']) if liste else None
+
+
+def premiere_date(symbole, intervalle):
+    liste = morceaux(symbole, intervalle)
+    return pd.Timestamp(liste[0]['debut']) if liste else None
+
+
+def symboles_stockes(intervalle):
+    dossier = os.path.join(RACINE, intervalle)
+    if not os.path.isdir(dossier):
+        return []
+    return sorted(nom for nom in os.listdir(dossier) if os.path.exists(os.path.join(dossier, nom, 'index.json')))
+
+
+# Date de la dernière mise à jour de l'historique (écriture ou vérification), heure locale
+def date_mise_a_jour(symbole, intervalle):
+    try:
+        return pd.Timestamp.fromtimestamp(os.stat(os.path.join(_dossier(symbole, intervalle), 'index.json')).st_mtime)
+    except OSError:
+        return None
+
+
+# Noter que l'historique a été vérifié à jour, même sans nouvelle ligne (jour férié, actif radié)
+def marquer_a_jour(symbole, intervalle):
+    try:
+        os.utime(os.path.join(_dossier(symbole, intervalle), 'index.json'))
+    except OSError:
+        pass
+
+
+def _ecrire_morceau(dossier, donnees):
+    debut, fin = donnees.index[0], donnees.index[-1]
+    nom_fichier = f"{debut:%Y%m%d%H%M%S}_{fin:%Y%m%d%H%M%S}.parquet"
+    chemin = os.path.join(dossier, nom_fichier)
+    donnees.to_parquet(chemin + '.tmp')
+    os.replace(chemin + '.tmp', chemin)
+    return {'fichier': nom_fichier, 'debut': debut.isoformat(), 'fin': fin.isoformat(), 'lignes': len(donnees)}
+
+
+# Ajouter un morceau de données (index de dates croissant) ; seules les lignes postérieures
+# à la dernière date stockée sont conservées, le stockage restant strictement chronologique
+def ajouter(symbole, intervalle, donnees):
+    if donnees is None or donnees.empty:
+        return 0
+    dossier = _dossier(symbole, intervalle)
+    with _verrou:
+        os.makedirs(dossier, exist_ok=True)
+        liste = _lire_index(dossier)
+        if liste:
+            donnees = donnees[donnees.index > pd.Timestamp(liste[-1]['fin'])]
+        if donnees.empty:
+            return 0
+        liste.append(_ecrire_morceau(dossier, donnees))
+        _ecrire_index(dossier, liste)
+    return len(donnees)
+
+
+# Ajouter un morceau antérieur à l'historique stocké (période de début avancée) ; seules les
+# lignes précédant la première date stockée sont conservées, le morceau passe en tête de l'index
+def ajouter_avant(symbole, intervalle, donnees):
+    if donnees is None or donnees.empty:
+        return 0
+    dossier = _dossier(symbole, intervalle)
+    with _verrou:
+        os.makedirs(dossier, exist_ok=True)
+        liste = _lire_index(dossier)
+        if liste:
+            donnees = donnees[donnees.index < pd.Timestamp(liste[0]['debut'])]
+        if donnees.empty:
+            return 0
+        liste.insert(0, _ecrire_morceau(dossier, donnees))
+        _ecrire_index(dossier, liste)
+    return len(donnees)
+
+
+# Remplacer tout l'historique (prix ajustés recalculés après un dividende ou une division) :
+# le nouveau morceau est écrit avant l'index, les anciens fichiers supprimés ensuite
+def remplacer(symbole, intervalle, donnees):
+    if donnees is None or donnees.empty:
+        return 0
+    dossier = _dossier(symbole, intervalle)
+    with _verrou:
+        os.makedirs(dossier, exist_ok=True)
+        anciens = [morceau['fichier'] for morceau in _lire_index(dossier)]
+        morceau = _ecrire_morceau(dossier, donnees)
+        _ecrire_index(dossier, [morceau])
+        for nom_fichier in anciens:
+            if nom_fichier != morceau['fichier']:
+                try:
+                    os.remove(os.path.join(dossier, nom_fichier))
+                except OSError:
+                    pass
+    return len(donnees)
+
+
+# Lire l'historique morceau par morceau entre deux dates (incluses)
+def lire_par_blocs(symbole, intervalle, debut=None, fin=None, colonnes=None):
+    dossier = _dossier(symbole, intervalle)
+    debut = pd.Timestamp(debut) if debut is not None else None
+    fin = pd.Timestamp(fin) if fin is not None else None
+    for morceau in _lire_index(dossier):
+        if debut is not None and pd.Timestamp(morceau['fin']) < debut:
+            continue
+        if fin is not None and pd.Timestamp(morceau['debut']) > fin:
+            break
+        bloc = pd.read_parquet(os.path.join(dossier, morceau['fichier']), columns=colonnes)
+        yield bloc.loc[debut:fin]
+
+
+# Lecture complète d'une plage (à réserver aux plages de taille raisonnable)
+def lire(symbole, intervalle, debut=None, fin=None, colonnes=None):
+    blocs = list(lire_par_blocs(symbole, intervalle, debut, fin, colonnes))
+    return pd.concat(blocs) if blocs else pd.DataFrame()
+
+
+# Lecture brute d'une colonne sur une plage (incluse), sans passer par pandas : (dates en
+# datetime64[ns], valeurs en float64). Pour les lectures en masse (criblage de l'univers).
+def lire_colonne(symbole, intervalle, colonne, debut=None, fin=None):
+    dossier = _dossier(symbole, intervalle)
+    debut = np.datetime64(pd.Timestamp(debut), 'ns') if debut is not None else None
+    fin = np.datetime64(pd.Timestamp(fin), 'ns') if fin is not None else None
+    dates, valeurs = [], []
+    for morceau in _lire_index(dossier):
+        if debut is not None and np.datetime64(morceau['fin'], 'ns') < debut:
+            continue
+        if fin is not None and np.datetime64(morceau['debut'], 'ns') > fin:
+            break
+        table = pq.ParquetFile(os.path.join(dossier, morceau['fichier'])).read()
+        nom_index = table.schema.pandas_metadata['index_columns'][0]
+        dates.append(table.column(nom_index).to_numpy().astype('datetime64[ns]'))
+        valeurs.append(table.column(colonne).to_numpy().astype('float64'))
+    if not dates:
+        return np.array([], dtype='datetime64[ns]'), np.array([], dtype='float64')
+    dates, valeurs = np.concatenate(dates), np.concatenate(valeurs)
+    garder = np.ones(len(dates), dtype=bool)
+    if debut is not None:
+        garder &= dates >= debut
+    if fin is not None:
+        garder &= dates <= fin
+    return dates[garder], valeurs[garder]
@@ -0,0 +1,9 @@
+# Configuration commune des tests : modules du simulateur importables depuis la racine du dépôt,
+# stockage local et cache persistant dans des dossiers temporaires (lus à l'import des modules)
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SIMULATEUR_STOCKAGE', tempfile.mkdtemp(prefix='tests_stockage_'))
+os.environ.setdefault('SIMULATEUR_CACHE', tempfile.mkdtemp(prefix='tests_cache_'))
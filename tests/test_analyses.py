@@ -0,0 +1,80 @@
+# Analyses vectorisées : statistiques relatives à un indice, comparées à des valeurs connues
+# et à un calcul pandas colonne par colonne, et principales baisses sur des épisodes connus
+import numpy as np
+import pandas as pd
+import pytest
+
+import analyses
+
+DATES = pd.bdate_range('2023-01-02', periods=300)
+
+
+def indice_aleatoire(graine=0):
+    return pd.Series(np.random.default_rng(graine).normal(0.0004, 0.01, len(DATES)), index=DATES)
+
+
+def test_actif_proportionnel_a_l_indice():
+    indice = indice_aleatoire()
+    statistiques = analyses.statistiques_relatives(pd.DataFrame({'X2': 2 * indice}), indice).loc['X2']
+    assert statistiques['Bêta'] == pytest.approx(2)
+    assert statistiques['Corrélation'] == pytest.approx(1)
+    assert statistiques['Alpha de Jensen'] == pytest.approx(0, abs=1e-12)
+    # Rendements actifs égaux à ceux de l'indice
+    assert statistiques['Tracking error'] == pytest.approx(indice.std() * np.sqrt(252))
+    assert statistiques["Ratio d'information"] == pytest.approx(indice.mean() * 252 / (indice.std() * np.sqrt(252)))
+    assert statistiques['Capture haussière'] == pytest.approx(2)
+    assert statistiques['Capture baissière'] == pytest.approx(2)
+
+
+def test_alpha_d_un_ecart_constant():
+    indice = indice_aleatoire()
+    statistiques = analyses.statistiques_relatives(pd.DataFrame({'A': indice + 0.0001}), indice,
+                                                   taux_sans_risque=0.02).loc['A']
+    assert statistiques['Bêta'] == pytest.approx(1)
+    assert statistiques['Alpha de Jensen'] == pytest.approx(0.0001 * 252)
+    assert statistiques['Tracking error'] == pytest.approx(0, abs=1e-12)
+
+
+def test_captures_sur_des_seances_connues():
+    indice = pd.Series([0.01, -0.02, 0.03, -0.01], index=DATES[:4])
+    rendements = pd.DataFrame({'A': [0.02, -0.01, 0.01, -0.02]}, index=DATES[:4])
+    statistiques = analyses.statistiques_relatives(rendements, indice).loc['A']
+    assert statistiques['Capture haussière'] == pytest.approx(0.03 / 0.04)
+    assert statistiques['Capture baissière'] == pytest.approx(0.03 / 0.03)
+
+
+def test_valeurs_manquantes_ignorees_actif_par_actif():
+    indice = indice_aleatoire()
+    generateur = np.random.default_rng(1)
+    rendements = pd.DataFrame({s: 0.5 * indice + generateur.normal(0, 0.005, len(DATES)) for s in ('A', 'B')})
+    rendements.iloc[:40, 0] = np.nan
+    rendements.iloc[100:120, 1] = np.nan
+    statistiques = analyses.statistiques_relatives(rendements, indice)
+    for symbole in rendements:
+        paire = pd.concat([rendements[symbole], indice], axis=1).dropna()
+        assert statistiques.loc[symbole, 'Bêta'] == pytest.approx(paire.cov().iloc[0, 1] / paire.iloc[:, 1].var())
+        assert statistiques.loc[symbole, 'Corrélation'] == pytest.approx(paire.corr().iloc[0, 1])
+
+
+def test_drawdowns_matrice():
+    valeurs = pd.DataFrame({'A': [100, 120, 90, 130], 'B': [np.nan, 50, 40, 60]}, index=DATES[:4])
+    attendu = pd.DataFrame({'A': [0, 0, -0.25, 0], 'B': [np.nan, 0, -0.2, 0]}, index=DATES[:4], dtype='float64')
+    pd.testing.assert_frame_equal(analyses.drawdowns(valeurs), attendu)
+
+
+def test_principaux_drawdowns_episodes_connus():
+    # Trois baisses : -10 % (reprise), -40 % (reprise), -20 % (pas de reprise à la fin)
+    prix = pd.Series([100, 90, 100, 110, 66, 88, 110, 120, 96, 100], index=DATES[:10], dtype='float64')
+    tableau = analyses.principaux_drawdowns(analyses.drawdowns(prix.to_frame())[0], nombre=2)
+    assert list(tableau.index) == [1, 2]
+    assert tableau['Profondeur'].tolist() == pytest.approx([-0.4, -0.2])
+    assert tableau['Début'].tolist() == [DATES[3], DATES[7]]
+    assert tableau['Creux'].tolist() == [DATES[4], DATES[8]]
+    assert tableau.loc[1, 'Reprise'] == DATES[6]
+    assert pd.isna(tableau.loc[2, 'Reprise'])
+    assert tableau['Durée (jours)'].tolist() == [(DATES[6] - DATES[3]).days, (DATES[9] - DATES[7]).days]
+
+
+def test_principaux_drawdowns_sans_baisse():
+    tableau = analyses.principaux_drawdowns(pd.Series([0.0, 0.0, 0.0], index=DATES[:3]))
+    assert tableau.empty
@@ -0,0 +1,97 @@
+# API HTTP : codes de statut et validation des paramètres, sur un serveur local et des prix
+# synthétiques (fournisseur hors ligne)
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+import yfinance as yf
+
+import api
+import hors_ligne
+import prevision
+
+
+@pytest.fixture(scope='module')
+def adresse():
+    origine = yf.download
+    yf.download = hors_ligne.telecharger
+    serveur = api.creer_serveur('127.0.0.1', 0)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{serveur.server_address[1]}'
+    serveur.shutdown()
+    yf.download = origine
+
+
+def requete(adresse, chemin, corps=None):
+    donnees = json.dumps(corps).encode('utf-8') if corps is not None and not isinstance(corps, bytes) else corps
+    demande = urllib.request.Request(adresse + chemin, data=donnees, method='POST' if donnees is not None else 'GET')
+    try:
+        with urllib.request.urlopen(demande) as reponse:
+            return reponse.status, json.loads(reponse.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_sante(adresse):
+    assert requete(adresse, '/sante') == (200, {'statut': 'ok'})
+
+
+def test_metriques(adresse):
+    statut, corps = requete(adresse, '/metriques?symboles=AAPL,MSFT&debut=2020-01-01&fin=2024-10-25&devise=USD')
+    assert statut == 200
+    assert set(corps) == {'AAPL', 'MSFT'}
+    assert {'volatilite', 'ratio_sharpe', 'rendement_total', 'cagr'} <= set(corps['AAPL'])
+
+
+def test_simulation_en_post(adresse):
+    statut, corps = requete(adresse, '/simulation', {'symboles': ['AAPL'], 'montant_initial': 5000, 'series': 1})
+    assert statut == 200
+    assert corps['AAPL']['montant_initial'] == 5000
+    assert len(corps['AAPL']['lump_sum']) > 0
+
+
+def test_prevision(adresse):
+    statut, corps = requete(adresse, '/prevision?symboles=AAPL&horizon=10&modele=Bootstrap')
+    assert statut == 200
+    assert corps['AAPL']['modele'] == 'Bootstrap'
+    assert len(corps['AAPL']['prevision']) == len(corps['AAPL']['borne_haute']) == 10
+
+
+@pytest.mark.parametrize('chemin', [
+    '/metriques',
+    '/metriques?symboles=AAPL&debut=2024-13-01',
+    '/metriques?symboles=AAPL&debut=2024-10-25&fin=2020-01-01',
+    '/metriques?symboles=AAPL&debut=2024-10-24&fin=2024-10-25',
+    '/metriques?symboles=AAPL&frequence=Quotidienne',
+    '/metriques?symboles=AAPL&devise=XYZ',
+    '/metriques?symboles=AAPL&intervalle=3d',
+    '/prevision?symboles=AAPL&horizon=x',
+    '/prevision?symboles=AAPL&horizon=0',
+    f'/prevision?symboles=AAPL&horizon={prevision.HORIZON_MAX_JOURS + 1}',
+    '/prevision?symboles=AAPL&modele=Inconnu',
+])
+def test_parametres_invalides(adresse, chemin):
+    statut, corps = requete(adresse, chemin)
+    assert statut == 400
+    assert corps['erreur']
+
+
+@pytest.mark.parametrize('corps', [
+    {'symboles': 'AAPL', 'taux_sans_risque': None},
+    {'symboles': 'AAPL', 'montant_initial': [10000]},
+    {'symboles': 'AAPL', 'horizon': None},
+])
+def test_types_invalides_en_post(adresse, corps):
+    route = '/prevision' if 'horizon' in corps else '/metriques'
+    assert requete(adresse, route, corps)[0] == 400
+
+
+def test_corps_json_invalide(adresse):
+    assert requete(adresse, '/metriques', b'[1, 2]')[0] == 400
+    assert requete(adresse, '/metriques', b'{pas du json')[0] == 400
+
+
+def test_route_inconnue(adresse):
+    assert requete(adresse, '/inconnue')[0] == 404
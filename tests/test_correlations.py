@@ -0,0 +1,50 @@
+# Corrélations entre actifs : matrices comparées à pandas, cache par paire et invalidation
+# lorsque l'historique d'un actif change
+import numpy as np
+import pandas as pd
+import pytest
+
+import correlations
+import intraday
+
+DATES = pd.bdate_range('2023-01-02', periods=250)
+
+
+def rendements(graine=0, symboles=('A', 'B', 'C')):
+    generateur = np.random.default_rng(graine)
+    commun = generateur.normal(0, 0.01, len(DATES))
+    return pd.DataFrame({s: commun + generateur.normal(0, 0.01, len(DATES)) for s in symboles}, index=DATES)
+
+
+def test_matrices_conformes_a_pandas():
+    matrice = rendements()
+    matrice.iloc[:20, 1] = np.nan
+    covariance, correlation = correlations.matrices(matrice, ('test', 'pandas'))
+    pd.testing.assert_frame_equal(correlation, matrice.corr(), check_names=False)
+    pd.testing.assert_frame_equal(covariance, matrice.cov() * intraday.JOURS_PAR_AN, check_names=False)
+
+
+def test_historique_reecrit_recalcule():
+    contexte = ('test', 'reecriture')
+    matrice = rendements(1)
+    _, avant = correlations.matrices(matrice, contexte)
+    # Même contexte, historique de B réécrit (ajustement de dividende par exemple)
+    reecrite = matrice.assign(B=matrice['B'] * 0.5 + matrice['A'] * 0.5)
+    _, apres = correlations.matrices(reecrite, contexte)
+    assert apres.loc['A', 'B'] == pytest.approx(reecrite.corr().loc['A', 'B'])
+    assert apres.loc['A', 'B'] != pytest.approx(avant.loc['A', 'B'])
+    assert apres.loc['A', 'C'] == pytest.approx(avant.loc['A', 'C'])
+
+
+def test_symbole_ajoute_ne_recalcule_que_sa_ligne():
+    contexte = ('test', 'ajout')
+    matrice = rendements(2, ('A', 'B', 'C', 'D'))
+    correlations.matrices(matrice[['A', 'B', 'C']], contexte)
+    # D cote aussi certains jours fériés des autres : dates supplémentaires dans la matrice
+    jours = pd.DatetimeIndex(['2023-01-07', '2023-01-08'])
+    etendue = pd.concat([matrice, pd.DataFrame({'D': [0.01, -0.01]}, index=jours)]).sort_index()
+    cles = [correlations._cle(contexte, correlations._empreintes(etendue), a, b)
+            for a in 'ABC' for b in 'ABC']
+    assert all(cle in correlations._cache_paires for cle in cles)
+    _, correlation = correlations.matrices(etendue, contexte)
+    assert correlation.loc['A', 'D'] == pytest.approx(etendue.corr().loc['A', 'D'])
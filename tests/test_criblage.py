@@ -0,0 +1,69 @@
+# Criblage : métriques vectorisées d'une matrice de prix, sur des cas connus et avec des actifs
+# qui ne cotent pas tous les jours
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import criblage
+import periodes
+import pipeline
+
+DATES = pd.bdate_range('2024-01-02', '2024-03-29')
+
+
+def parametres(**valeurs):
+    defaut = dict(date_debut=datetime.date(2024, 1, 1), date_fin=datetime.date(2024, 3, 30), taux_sans_risque=0.0,
+                  montant_initial=10000, montant_contribution=500, frequence_contributions='Mensuelle', devise='USD',
+                  intervalle='1d', taille_barres='1D')
+    defaut.update(valeurs)
+    return pipeline.Parametres(**defaut)
+
+
+def test_metriques_connues():
+    prix = pd.DataFrame({'A': [100.0, 110.0, 99.0, 121.0]}, index=DATES[:4])
+    ligne = criblage.metriques_matrice(prix, parametres()).loc['A']
+    rendements = np.array([0.1, -0.1, 121 / 99 - 1])
+    assert ligne['Première date'] == DATES[0]
+    assert ligne['Rendement total (%)'] == pytest.approx(21)
+    assert ligne['Volatilité (%)'] == pytest.approx(rendements.std(ddof=1) * np.sqrt(252) * 100)
+    assert ligne['Ratio de Sharpe'] == pytest.approx(rendements.mean() / rendements.std(ddof=1) * np.sqrt(252))
+    assert ligne['Drawdown maximal (%)'] == pytest.approx(-10)
+    assert ligne['Valeur finale Lump Sum'] == pytest.approx(12100)
+
+
+def test_dca_en_fin_de_mois():
+    # Prix constant, puis doublé à la dernière séance : achats à 100, 100 et 200
+    prix = pd.DataFrame({'A': np.r_[np.full(len(DATES) - 1, 100.0), 200.0]}, index=DATES)
+    ligne = criblage.metriques_matrice(prix, parametres()).loc['A']
+    assert ligne['Valeur finale DCA'] == pytest.approx((5 + 5 + 2.5) * 200)
+    assert ligne['Gain DCA (%)'] == pytest.approx(2500 / 1500 * 100 - 100)
+
+
+@pytest.mark.parametrize('frequence', pipeline.FREQUENCES)
+def test_dca_conforme_a_la_chaine_de_traitement(frequence):
+    # Périodes de periodes.construire (la première ne couvre que le premier mois)
+    prix = pd.Series(100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, len(DATES)))), index=DATES)
+    ligne = criblage.metriques_matrice(prix.to_frame('A'), parametres(frequence_contributions=frequence)).loc['A']
+    prix_par_periode = periodes.construire(prix)[frequence]
+    contribution = 500 * pipeline.MOIS_PAR_PERIODE[frequence]
+    assert ligne['Valeur finale DCA'] == pytest.approx(pipeline.calcul_dca(prix_par_periode, contribution)[-1])
+
+
+def test_colonne_incomplete_identique_a_l_actif_seul():
+    generateur = np.random.default_rng(0)
+    prix = pd.DataFrame(100 * np.exp(np.cumsum(generateur.normal(0, 0.01, (len(DATES), 2)), axis=0)),
+                        index=DATES, columns=['A', 'B'])
+    prix.iloc[:10, 1] = np.nan  # B cote plus tard
+    prix.iloc[20::7, 1] = np.nan  # et pas tous les jours
+    tableau = criblage.metriques_matrice(prix, parametres())
+    seul = criblage.metriques_matrice(prix[['B']].dropna(), parametres()).loc['B']
+    assert tableau.loc['B', 'Première date'] == DATES[10]
+    pd.testing.assert_series_equal(tableau.loc['B'].drop('Première date').astype(float),
+                                   seul.drop('Première date').astype(float))
+
+
+def test_actif_sans_rendement_ecarte():
+    prix = pd.DataFrame({'A': [100.0, 101.0, 102.0], 'B': [np.nan, np.nan, 50.0]}, index=DATES[:3])
+    assert list(criblage.metriques_matrice(prix, parametres()).index) == ['A']
@@ -0,0 +1,49 @@
+# Décumulation : taux maximal de chaque chemin (V_0 / S_H) comparé à des rentes connues et à
+# une simulation mois par mois, taux soutenable et probabilité de succès
+import numpy as np
+import pytest
+
+import decumulation
+
+
+# Capital restant après des retraits mensuels en début de période (taux annuel, indexé sur l'inflation)
+def capital_final(rendements, taux, inflation=0.0):
+    capital = 1.0
+    for mois, rendement in enumerate(rendements):
+        capital -= taux / 12 * (1 + inflation) ** (mois / 12)
+        capital *= 1 + rendement
+    return capital
+
+
+def test_rendements_nuls():
+    chemins = np.zeros((3, 120))
+    assert decumulation.taux_maximaux(chemins) == pytest.approx([0.1, 0.1, 0.1])
+
+
+def test_rendement_constant_donne_une_rente():
+    g, periodes = 0.004, 240
+    chemins = np.full((1, periodes), g)
+    actualisation = (1 + g) ** -np.arange(periodes)
+    assert decumulation.taux_maximaux(chemins)[0] == pytest.approx(12 / actualisation.sum())
+
+
+def test_taux_maximal_epuise_exactement_le_capital():
+    chemins = np.random.default_rng(0).normal(0.005, 0.04, (5, 180))
+    taux = decumulation.taux_maximaux(chemins, inflation=0.02)
+    for chemin, t in zip(chemins, taux):
+        assert capital_final(chemin, t, 0.02) == pytest.approx(0, abs=1e-9)
+        assert capital_final(chemin, t * 1.01, 0.02) < 0
+    valeurs = decumulation.valeurs_capital(chemins, 1.0, taux.min(), inflation=0.02)
+    assert valeurs[np.argmin(taux), -1] == pytest.approx(0, abs=1e-9)
+    assert (valeurs[:, -1] >= 0).all()
+
+
+def test_capital_final_conserve():
+    chemins = np.zeros((1, 120))
+    assert decumulation.taux_maximaux(chemins, capital_final=0.5)[0] == pytest.approx(0.05)
+
+
+def test_quantile_et_probabilite():
+    taux = np.array([0.02, 0.03, 0.04, 0.05, 0.06])
+    assert decumulation.taux_soutenable(taux, 0.75) == pytest.approx(0.03)
+    assert decumulation.probabilite_succes(taux, 0.04) == pytest.approx(0.6)
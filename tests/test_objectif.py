@@ -0,0 +1,54 @@
+# Solveur d'objectif : coefficients a_t et b_t comparés à une simulation mois par mois, et
+# contribution, montant initial et horizon requis sur des chemins à rendement constant
+import numpy as np
+import pytest
+
+import objectif
+
+
+# Valeur mois par mois : contribution en début de période, puis croissance du mois
+def simuler(rendements, montant_initial, contribution, mois_par_periode=1):
+    valeur, valeurs = montant_initial, []
+    for mois, rendement in enumerate(rendements):
+        if mois % mois_par_periode == 0:
+            valeur += contribution * mois_par_periode
+        valeur *= 1 + rendement
+        valeurs.append(valeur)
+    return np.array(valeurs)
+
+
+@pytest.mark.parametrize('mois_par_periode', [1, 3, 12])
+def test_coefficients_conformes_a_la_simulation(mois_par_periode):
+    chemins = np.random.default_rng(0).normal(0.006, 0.04, (4, 60))
+    a, b = objectif.coefficients(chemins, mois_par_periode)
+    for chemin, a_chemin, b_chemin in zip(chemins, a, b):
+        assert a_chemin * 10000 + b_chemin * 250 == pytest.approx(simuler(chemin, 10000, 250, mois_par_periode))
+
+
+def test_rendement_constant():
+    g = 0.005
+    a, b = objectif.coefficients(np.full((1, 24), g))
+    mois = np.arange(1, 25)
+    assert a[0] == pytest.approx((1 + g) ** mois)
+    assert b[0] == pytest.approx((1 + g) * ((1 + g) ** mois - 1) / g)
+
+
+def test_montants_et_horizon_requis_sans_rendement():
+    a, b = objectif.coefficients(np.zeros((3, 120)))
+    assert objectif.contribution_requise(a[:, -1], b[:, -1], 100000, 10000, 0.9) == pytest.approx(750)
+    assert objectif.montant_initial_requis(a[:, -1], b[:, -1], 100000, 500, 0.9) == pytest.approx(40000)
+    assert objectif.contribution_requise(a[:, -1], b[:, -1], 100000, 200000, 0.9) == 0
+    assert objectif.horizon_requis(a, b, 12000, 0, 1000, 0.9) == 12
+    assert objectif.horizon_requis(a, b, 10 ** 6, 0, 1000, 0.9) is None
+
+
+def test_quantiles_sur_les_chemins():
+    # Dix chemins à rendement constant, du plus faible au plus fort
+    chemins = np.repeat(np.linspace(0.0, 0.009, 10)[:, None], 120, axis=1)
+    a, b = objectif.coefficients(chemins)
+    requises = (100000 - a[:, -1] * 10000) / b[:, -1]
+    assert objectif.contribution_requise(a[:, -1], b[:, -1], 100000, 10000, 0.9) == pytest.approx(np.quantile(requises, 0.9))
+    garanti = np.quantile(a * 10000 + b * 500, 0.1, axis=0)
+    assert objectif.horizon_requis(a, b, 50000, 10000, 500, 0.9) == np.flatnonzero(garanti >= 50000)[0] + 1
+    valeurs = a[:, -1] * 10000 + b[:, -1] * 500
+    assert objectif.probabilite_atteinte(a[:, -1], b[:, -1], 100000, 10000, 500) == pytest.approx((valeurs >= 100000).mean())
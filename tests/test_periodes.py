@@ -0,0 +1,45 @@
+# Pyramide des prix de fin de période : chaque vue doit être celle de resample(...).last()
+import numpy as np
+import pandas as pd
+import pytest
+
+import periodes
+
+REGLES = {'Hebdomadaire': 'W', 'Mensuelle': 'ME', 'Trimestrielle': '3ME', 'Semestrielle': '6ME', 'Annuelle': '12ME'}
+
+
+def prix(dates):
+    generateur = np.random.default_rng(0)
+    return pd.Series(100 * np.exp(np.cumsum(generateur.normal(0, 0.01, len(dates)))), index=dates, name='AAPL')
+
+
+SERIES = {
+    'jours ouvrés': prix(pd.bdate_range('2019-03-13', '2024-10-25')),
+    'milieu de mois': prix(pd.bdate_range('2020-02-17', '2021-08-06')),
+    'avec trous': prix(pd.bdate_range('2018-01-01', '2022-12-31').delete(np.s_[300:420])),
+    'tous les jours': prix(pd.date_range('2023-01-01', '2024-06-30')),
+}
+
+
+@pytest.mark.parametrize('nom', SERIES)
+@pytest.mark.parametrize('frequence', periodes.FREQUENCES)
+def test_vues_comme_resample(nom, frequence):
+    serie = SERIES[nom]
+    attendu = serie.resample(REGLES[frequence]).last().dropna()
+    pd.testing.assert_series_equal(periodes.construire(serie)[frequence], attendu, check_freq=False)
+
+
+def test_pyramide_en_cache():
+    serie = SERIES['jours ouvrés']
+    assert periodes.pyramide(serie, 'test') is periodes.pyramide(serie, 'test')
+    assert periodes.pyramide(serie.iloc[:-1], 'test') is not periodes.pyramide(serie, 'test')
+
+
+def test_calendrier():
+    serie = SERIES['jours ouvrés']
+    tableau = periodes.calendrier(serie, 'test_calendrier')
+    mensuels = serie.resample('ME').last()
+    rendements = mensuels / pd.concat([serie.iloc[:1], mensuels.iloc[:-1]]).to_numpy() - 1
+    assert tableau.loc[2020, 'Mars'] == pytest.approx(rendements.loc['2020-03'].iloc[0])
+    annee = serie.loc['2021'].iloc[-1] / serie.loc['2020'].iloc[-1] - 1
+    assert tableau.loc[2021, 'Année'] == pytest.approx(annee)
@@ -0,0 +1,78 @@
+# Cache persistant des résultats : empreinte canonique, lecture et écriture, éviction
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+import persistance
+import pipeline
+
+
+@pytest.fixture(autouse=True)
+def dossier(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistance, 'DOSSIER', str(tmp_path))
+    persistance._cache_memoire.clear()
+    yield tmp_path
+    persistance._cache_memoire.clear()
+
+
+def parametres(**valeurs):
+    defaut = dict(date_debut=datetime.date(2020, 1, 1), date_fin=datetime.date(2024, 10, 25), taux_sans_risque=0.02,
+                  montant_initial=10000, montant_contribution=500, frequence_contributions='Mensuelle', devise='EUR',
+                  intervalle='1d', taille_barres='1D')
+    defaut.update(valeurs)
+    return pipeline.Parametres(**defaut)
+
+
+def test_empreinte_canonique():
+    assert persistance.empreinte({'a': 1, 'b': 2}) == persistance.empreinte({'b': 2, 'a': 1})
+    assert persistance.empreinte(datetime.date(2020, 1, 1)) == persistance.empreinte('2020-01-01')
+    assert persistance.empreinte({'a': 1}) != persistance.empreinte({'a': 2})
+    assert len(persistance.empreinte('x')) == 64
+
+
+PRIX = pd.Series([100.0, 101.5, 99.8], index=pd.bdate_range('2024-10-21', periods=3))
+
+
+def test_cle_resultat_entiers_et_flottants():
+    assert pipeline.cle_resultat('AAPL', parametres(), PRIX) == pipeline.cle_resultat(
+        'AAPL', parametres(montant_initial=10000.0, montant_contribution=500.0), PRIX)
+    assert pipeline.cle_resultat('AAPL', parametres(), PRIX) != pipeline.cle_resultat('MSFT', parametres(), PRIX)
+    assert pipeline.cle_resultat('AAPL', parametres(), PRIX) != pipeline.cle_resultat('AAPL', parametres(devise='USD'), PRIX)
+
+
+def test_cle_resultat_historique_reecrit():
+    # Prix ajustés après un dividende : même période, autre clé
+    assert pipeline.cle_resultat('AAPL', parametres(), PRIX) != pipeline.cle_resultat('AAPL', parametres(), PRIX * 0.99)
+    assert pipeline.cle_resultat('AAPL', parametres(), PRIX) == pipeline.cle_resultat('AAPL', parametres(), PRIX.copy())
+
+
+def test_ecriture_puis_lecture(dossier):
+    cle = persistance.empreinte('resultat')
+    assert persistance.lire(cle) is None
+    persistance.ecrire(cle, {'valeur': 42})
+    assert persistance.lire(cle) == {'valeur': 42}
+
+    persistance._cache_memoire.clear()  # Nouveau processus : relu depuis le disque
+    assert persistance.lire(cle) == {'valeur': 42}
+    assert os.path.exists(dossier / cle[:2] / f'{cle}.pkl')
+
+
+def test_fichier_corrompu(dossier):
+    cle = persistance.empreinte('corrompu')
+    (dossier / cle[:2]).mkdir()
+    (dossier / cle[:2] / f'{cle}.pkl').write_bytes(b'pas un pickle')
+    assert persistance.lire(cle) is None
+
+
+def test_eviction_des_moins_recemment_lus(dossier):
+    cles = [persistance.empreinte(i) for i in range(3)]
+    for age, cle in enumerate(cles):
+        persistance.ecrire(cle, 'x' * 1000)
+        os.utime(persistance._chemin(cle), (1000 + age, 1000 + age))
+    persistance._cache_memoire.clear()
+    persistance.lire(cles[0])  # Lu récemment : conservé
+
+    persistance.evincer(taille_max=2500)
+    assert [os.path.exists(persistance._chemin(cle)) for cle in cles] == [True, False, True]
@@ -0,0 +1,102 @@
+# Modèles de prévision : ajustements, bandes et quantiles simulés sur un horizon court
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import prevision
+
+DATES = pd.bdate_range('2022-01-03', '2024-10-25')
+
+
+def serie(valeurs, dates=DATES):
+    return pd.Series(valeurs, index=dates, name='AAPL')
+
+
+def aleatoire(graine=0, dates=DATES):
+    generateur = np.random.default_rng(graine)
+    return serie(100 * np.exp(np.cumsum(generateur.normal(0.0004, 0.01, len(dates)))), dates)
+
+
+def test_lineaire_retrouve_la_droite():
+    jours = (DATES - DATES[0]).days.to_numpy()
+    ajustement = prevision.ajuster_prevision(serie(50 + 0.1 * jours))
+    assert ajustement.pente == pytest.approx(0.1)
+    assert ajustement.ordonnee == pytest.approx(50)
+    assert ajustement.sigma == pytest.approx(0, abs=1e-9)
+    futur = pd.DatetimeIndex([DATES[-1] + pd.Timedelta(days=10)])
+    assert prevision.prix_prevus(ajustement, futur)[0] == pytest.approx(50 + 0.1 * (jours[-1] + 10))
+
+
+def test_log_lineaire_retrouve_la_croissance():
+    jours = (DATES - DATES[0]).days.to_numpy()
+    ajustement = prevision.ajuster_log_lineaire(serie(100 * np.exp(0.0003 * jours)))
+    assert ajustement.modele == 'Log-linéaire'
+    assert ajustement.pente == pytest.approx(0.0003)
+    bas, haut = prevision.bornes(ajustement, DATES[-5:], 1)
+    np.testing.assert_allclose(bas, haut)
+
+
+def test_derive_ewma():
+    ajustement = prevision.ajuster_derive_ewma(aleatoire())
+    dates = pd.date_range(DATES[-1] - pd.Timedelta(days=2), periods=10, freq='D')
+    bas, haut = prevision.bornes(ajustement, dates, 1)
+    assert np.isnan(haut[:3]).all()  # Pas de prévision sur l'historique
+    assert (np.diff(haut[3:] - bas[3:]) > 0).all()  # Bande élargie avec l'horizon
+
+
+def test_bootstrap_quantiles_sur_horizon_court():
+    prix = aleatoire()
+    ajustement = prevision.ajuster_bootstrap(prix, horizon=10)
+    quantiles, observations_par_jour = ajustement.details
+    assert quantiles.shape == (len(prevision.NIVEAUX_QUANTILES), math.ceil(10 * observations_par_jour))
+    assert (np.diff(quantiles, axis=0) >= 0).all()  # Quantiles croissants à chaque séance
+
+    dates = pd.date_range(DATES[-1] + pd.Timedelta(days=1), periods=10, freq='D')
+    centre = prevision.prix_prevus(ajustement, dates)
+    for k in (1, 2, 3):
+        bas, haut = prevision.bornes(ajustement, dates, k)
+        assert (bas <= centre).all() and (centre <= haut).all()
+    assert np.isnan(prevision.prix_prevus(ajustement, dates + pd.Timedelta(days=30))).all()  # Au-delà de l'horizon simulé
+
+    # Tirages reproductibles
+    np.testing.assert_array_equal(quantiles, prevision.ajuster_bootstrap(prix, horizon=10).details[0])
+
+
+def test_bootstrap_rendement_constant():
+    prix = serie(100 * 1.001 ** np.arange(len(DATES)))
+    ajustement = prevision.ajuster_bootstrap(prix, horizon=5)
+    quantiles, _ = ajustement.details
+    np.testing.assert_allclose(quantiles, quantiles[:1].repeat(len(quantiles), axis=0))
+    assert ajustement.sigma == pytest.approx(0, abs=1e-12)
+
+
+def test_bootstrap_intrajournalier_par_seance():
+    seances = pd.bdate_range('2024-09-02', '2024-10-25')
+    index = pd.DatetimeIndex([j + pd.Timedelta(hours=9, minutes=30) + k * pd.Timedelta(minutes=1)
+                              for j in seances for k in range(390)])
+    ajustement = prevision.ajuster_bootstrap(aleatoire(1, index), horizon=30)
+    quantiles, observations_par_jour = ajustement.details
+    assert observations_par_jour < 1  # Une observation par séance, pas par barre
+    assert quantiles.shape[1] == math.ceil(30 * observations_par_jour)
+
+
+def test_cache_et_horizon():
+    prix = aleatoire(2)
+    assert prevision.ajuster('Linéaire', 'AAPL', prix, 10) is prevision.ajuster('Linéaire', 'AAPL', prix, 500)
+    court = prevision.ajuster('Bootstrap', 'AAPL', prix, 10)
+    assert prevision.ajuster('Bootstrap', 'AAPL', prix, 10) is court
+    long = prevision.ajuster('Bootstrap', 'AAPL', prix, 100)
+    assert long.details[0].shape[1] > court.details[0].shape[1]
+
+
+def test_registre():
+    assert list(prevision.MODELES)[0] == prevision.MODELE_DEFAUT
+    modele = prevision.enregistrer_modele('Constant', lambda p: prevision.Prevision(
+        0.0, float(p.iloc[-1]), 0.0, p.index[0], p.index[-1], 'Constant'), prevision.MODELES['Linéaire'].bornes)
+    try:
+        ajustement = prevision.ajuster('Constant', 'AAPL', aleatoire())
+        assert ajustement.modele == 'Constant' and not modele.horizon
+    finally:
+        del prevision.MODELES['Constant']
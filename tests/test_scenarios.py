@@ -0,0 +1,55 @@
+# Scénarios de crise : le rejeu vectorisé (positions × scénarios × jours) comparé à une
+# simulation jour par jour
+import numpy as np
+import pytest
+
+import scenarios
+
+
+# Simulation de référence d'une position sur une trajectoire : croissance du jour, puis versement
+def simuler(rendements, valeur, contribution, pas):
+    initiale = investi = valeur
+    valeurs, investis = [], []
+    for jour, rendement in enumerate(rendements, start=1):
+        valeur *= 1 + rendement
+        if pas and jour % pas == 0:
+            valeur += contribution
+            investi += contribution
+        valeurs.append(valeur)
+        investis.append(investi)
+    valeurs, investis = np.array(valeurs), np.array(investis)
+    return {
+        'valeur_creux': valeurs.min(),
+        'valeur_finale': valeurs[-1],
+        'contributions': investis[-1] - initiale,
+        'perte_maximale': (valeurs / investis - 1).min(),
+        'variation_finale': valeurs[-1] / investis[-1] - 1,
+    }
+
+
+def test_rendement_constant_sans_contribution():
+    rendements = np.full((1, 1, 10), -0.01)
+    resultat = scenarios.rejouer(rendements, np.array([[10]]), np.array([1000.0]), np.array([0.0]), np.array([0]))
+    assert resultat['valeur_finale'][0, 0] == pytest.approx(1000 * 0.99 ** 10)
+    assert resultat['valeur_creux'][0, 0] == pytest.approx(1000 * 0.99 ** 10)
+    assert resultat['contributions'][0, 0] == 0
+    assert resultat['perte_maximale'][0, 0] == pytest.approx(0.99 ** 10 - 1)
+
+
+def test_rejeu_conforme_a_la_simulation_jour_par_jour():
+    generateur = np.random.default_rng(0)
+    longueurs = np.array([[30, 12], [30, 12]])
+    rendements = np.zeros((2, 2, 30))
+    for i in range(2):
+        for j in range(2):
+            rendements[i, j, :longueurs[i, j]] = generateur.normal(-0.002, 0.02, longueurs[i, j])
+    valeurs = np.array([10000.0, 5000.0])
+    contributions = np.array([0.0, 500.0])
+    pas = np.array([0, 5])
+
+    resultat = scenarios.rejouer(rendements, longueurs, valeurs, contributions, pas)
+    for i in range(2):
+        for j in range(2):
+            attendu = simuler(rendements[i, j, :longueurs[i, j]], valeurs[i], contributions[i], pas[i])
+            for cle, valeur in attendu.items():
+                assert resultat[cle][i, j] == pytest.approx(valeur), (cle, i, j)
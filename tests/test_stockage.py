@@ -0,0 +1,78 @@
+# Stockage local par morceaux : ajout, lecture et réécriture d'un historique
+import numpy as np
+import pandas as pd
+import pytest
+
+import stockage
+
+
+@pytest.fixture(autouse=True)
+def racine(tmp_path, monkeypatch):
+    monkeypatch.setattr(stockage, 'RACINE', str(tmp_path))
+
+
+def barres(debut, periodes, frequence='5min'):
+    index = pd.date_range(debut, periods=periodes, freq=frequence)
+    return pd.DataFrame({'Close': np.arange(periodes, dtype='float64') + 100, 'Volume': 1e6}, index=index)
+
+
+def test_ajout_puis_lecture():
+    donnees = barres('2024-10-01 09:30', 50)
+    assert stockage.ajouter('AAPL', '5m', donnees.iloc[:20]) == 20
+    assert stockage.ajouter('AAPL', '5m', donnees.iloc[20:]) == 30
+
+    pd.testing.assert_frame_equal(stockage.lire('AAPL', '5m'), donnees, check_freq=False)
+    assert len(stockage.morceaux('AAPL', '5m')) == 2
+    assert stockage.premiere_date('AAPL', '5m') == donnees.index[0]
+    assert stockage.derniere_date('AAPL', '5m') == donnees.index[-1]
+    assert stockage.symboles_stockes('5m') == ['AAPL']
+
+
+def test_ajout_ignore_les_lignes_deja_stockees():
+    donnees = barres('2024-10-01 09:30', 30)
+    stockage.ajouter('AAPL', '5m', donnees.iloc[:20])
+    assert stockage.ajouter('AAPL', '5m', donnees.iloc[10:]) == 10
+    assert stockage.ajouter('AAPL', '5m', donnees.iloc[:20]) == 0
+    pd.testing.assert_frame_equal(stockage.lire('AAPL', '5m'), donnees, check_freq=False)
+
+
+def test_ajout_avant_le_debut_stocke():
+    donnees = barres('2024-10-01 09:30', 60)
+    stockage.ajouter('AAPL', '5m', donnees.iloc[40:])
+    assert stockage.ajouter_avant('AAPL', '5m', donnees.iloc[20:45]) == 20
+    assert stockage.ajouter_avant('AAPL', '5m', donnees.iloc[:20]) == 20
+
+    lu = stockage.lire('AAPL', '5m')
+    pd.testing.assert_frame_equal(lu, donnees, check_freq=False)
+    assert [m['lignes'] for m in stockage.morceaux('AAPL', '5m')] == [20, 20, 20]
+
+
+def test_lecture_d_une_plage():
+    donnees = barres('2024-10-01 09:30', 40)
+    stockage.ajouter('AAPL', '5m', donnees.iloc[:20])
+    stockage.ajouter('AAPL', '5m', donnees.iloc[20:])
+    debut, fin = donnees.index[5], donnees.index[25]
+
+    pd.testing.assert_frame_equal(stockage.lire('AAPL', '5m', debut, fin), donnees.loc[debut:fin], check_freq=False)
+    dates, valeurs = stockage.lire_colonne('AAPL', '5m', 'Close', debut, fin)
+    np.testing.assert_array_equal(dates, donnees.loc[debut:fin].index.to_numpy())
+    np.testing.assert_array_equal(valeurs, donnees.loc[debut:fin, 'Close'].to_numpy())
+
+
+def test_remplacement_de_l_historique(tmp_path):
+    stockage.ajouter('AAPL', '1d', barres('2024-01-01', 10, 'D').iloc[:5])
+    stockage.ajouter('AAPL', '1d', barres('2024-01-01', 10, 'D').iloc[5:])
+    nouveau = barres('2024-01-01', 10, 'D') * 0.5
+
+    assert stockage.remplacer('AAPL', '1d', nouveau) == 10
+    pd.testing.assert_frame_equal(stockage.lire('AAPL', '1d'), nouveau, check_freq=False)
+    fichiers = sorted(p.name for p in (tmp_path / '1d' / 'AAPL').iterdir())
+    assert fichiers == sorted([stockage.morceaux('AAPL', '1d')[0]['fichier'], 'index.json'])
+
+
+def test_historique_absent():
+    assert stockage.morceaux('INCONNU', '1d') == []
+    assert stockage.derniere_date('INCONNU', '1d') is None
+    assert stockage.lire('INCONNU', '1d').empty
+    dates, valeurs = stockage.lire_colonne('INCONNU', '1d', 'Close')
+    assert len(dates) == len(valeurs) == 0